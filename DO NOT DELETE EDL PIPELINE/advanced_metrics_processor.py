@@ -1,16 +1,26 @@
+import numpy as np
 import pandas as pd
 import os
 import glob
 import sys
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
-from pipeline_utils import BASE_DIR, apply_sma_fields, load_json, save_json
+SRC_DIR = Path(__file__).resolve().parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from edl_pipeline.config import env_int
+from edl_pipeline.features import complete_ohlcv_features, default_feature_cache, load_features
+from edl_pipeline.reporting import print_symbol_errors
+from pipeline_utils import BASE_DIR, apply_sma_fields, chunked, load_json, save_json
 
 # --- Configuration ---
 JSON_INPUT = os.path.join(BASE_DIR, "all_stocks_fundamental_analysis.json")
 PRICE_BANDS_FILE = os.path.join(BASE_DIR, "complete_price_bands.json")
 OHLCV_DIR = os.path.join(BASE_DIR, "ohlcv_data")
 JSON_OUTPUT = os.path.join(BASE_DIR, "all_stocks_fundamental_analysis.json")
+CHUNK_SIZE = 64
 
 SCANNER_DERIVED_FIELDS = [
     'as_of_date', 'gap_percent', 'range_percent', 'avg_volume_20',
@@ -31,10 +41,6 @@ SCANNER_DERIVED_FIELDS = [
 # or its vendor-calculated moving averages.
 LIVE_SCANNER_FIELDS = {'rupee_volume', 'sma10', 'sma20', 'sma50', 'sma200'}
 
-def calculate_ema(series, periods):
-    return series.ewm(span=periods, adjust=False).mean()
-
-
 def value_or_none(value, digits=2):
     if pd.isna(value):
         return None
@@ -64,185 +70,185 @@ def drop_copied_live_snapshot(df):
     return df
 
 
-def process_symbol_csv(csv_path):
+def process_symbol_csv(csv_path, feature_cache=None):
+    """Return (symbol, metrics); metrics is None when history is too short."""
     sym = os.path.basename(csv_path).replace(".csv", "")
-    try:
-        df = pd.read_csv(csv_path)
-        if df.empty or len(df) < 5:
-            return sym, None
+    # Rolling features come from the shared cache, computed over complete
+    # OHLCV rows only; they are causal, so dropping a copied trailing row
+    # keeps them valid.
+    df = load_features(csv_path, feature_cache)
+    if df.empty or len(df) < 5:
+        return sym, None
 
-        # Ensure numeric
-        for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-        
-        df = df.dropna()
-        if df.empty: return sym, None
+    df = complete_ohlcv_features(df, feature_cache)
+    if df.empty: return sym, None
 
-        df = df.sort_values('Date') if 'Date' in df.columns else df
-        df = drop_copied_live_snapshot(df)
-        if len(df) < 5:
-            return sym, None
+    df = drop_copied_live_snapshot(df)
+    if len(df) < 5:
+        return sym, None
 
-        # Latest row
-        latest = df.iloc[-1]
-        prev = df.iloc[-2] if len(df) > 1 else latest
+    # Latest row
+    latest = df.iloc[-1]
+    prev = df.iloc[-2] if len(df) > 1 else latest
 
-        # --- Calculations ---
-        
-        # 1. ATH
-        ath = df['High'].max()
-        pct_from_ath = ((ath - latest['Close']) / ath) * 100 if ath > 0 else 0
-        
-        # 2. Gap Up % and Day Range %
-        gap_up_pct = ((latest['Open'] - prev['Close']) / prev['Close']) * 100 if prev['Close'] > 0 else 0
-        day_range_pct = ((latest['High'] - latest['Low']) / latest['Low']) * 100 if latest['Low'] > 0 else 0
-        
-        # 3. ADR (Average Daily Range)
-        df['Daily_Range_Pct'] = ((df['High'] - df['Low']) / df['Low']) * 100
-        adr_5 = df['Daily_Range_Pct'].tail(5).mean()
-        adr_14 = df['Daily_Range_Pct'].tail(14).mean()
-        adr_20 = df['Daily_Range_Pct'].tail(20).mean()
-        adr_30 = df['Daily_Range_Pct'].tail(30).mean()
-
-        # 4. Returns & Low Benchmarks
-        # 6 Month Return (~126 trading days)
-        price_6m_ago = df['Close'].iloc[-126] if len(df) >= 126 else df['Close'].iloc[0]
-        returns_6m = ((latest['Close'] - price_6m_ago) / price_6m_ago) * 100
-        
-        # 52W Low (~252 trading days)
-        low_52w = df['Low'].tail(252).min()
-        pct_from_52w_low = ((latest['Close'] - low_52w) / low_52w) * 100 if low_52w > 0 else 0
+    # --- Calculations ---
+    
+    # 1. ATH
+    ath = df['High'].max()
+    pct_from_ath = ((ath - latest['Close']) / ath) * 100 if ath > 0 else 0
+    
+    # 2. Gap Up % and Day Range %
+    gap_up_pct = ((latest['Open'] - prev['Close']) / prev['Close']) * 100 if prev['Close'] > 0 else 0
+    day_range_pct = ((latest['High'] - latest['Low']) / latest['Low']) * 100 if latest['Low'] > 0 else 0
+    
+    # 3. ADR (Average Daily Range)
+    adr_5 = df['Daily_Range_Pct'].tail(5).mean()
+    adr_14 = df['Daily_Range_Pct'].tail(14).mean()
+    adr_20 = df['Daily_Range_Pct'].tail(20).mean()
+    adr_30 = df['Daily_Range_Pct'].tail(30).mean()
+
+    # 4. Returns & Low Benchmarks
+    # 6 Month Return (~126 trading days)
+    price_6m_ago = df['Close'].iloc[-126] if len(df) >= 126 else df['Close'].iloc[0]
+    returns_6m = ((latest['Close'] - price_6m_ago) / price_6m_ago) * 100
+    
+    # 52W Low (~252 trading days)
+    low_52w = df['Low'].tail(252).min()
+    pct_from_52w_low = ((latest['Close'] - low_52w) / low_52w) * 100 if low_52w > 0 else 0
+
+    # 5. Volume Metrics
+    df['Turnover_Cr'] = (df['Close'] * df['Volume']) / 10000000 
+    avg_rupee_vol_30 = df['Turnover_Cr'].tail(30).mean()
+    
+    avg_vol_20 = df['Volume'].tail(21).iloc[:-1].mean()
+    rvol = latest['Volume'] / avg_vol_20 if avg_vol_20 > 0 else 0
+    
+    ema_vol_200_latest = df['EMA_Volume_200'].iloc[-1]
+    
+    # % from 52W High of 200D EMA Volume
+    ema_vol_200_52w_high = df['EMA_Volume_200'].tail(252).max()
+    pct_from_ema_200_52w_high = ((ema_vol_200_latest - ema_vol_200_52w_high) / ema_vol_200_52w_high) * 100 if ema_vol_200_52w_high > 0 else 0
+
+    # 6. Turnover Moving Averages
+    turnover_20 = df['Turnover_Cr'].tail(20).mean()
+    turnover_50 = df['Turnover_Cr'].tail(50).mean()
+    turnover_100 = df['Turnover_Cr'].tail(100).mean()
+
+    # 7. Normalized scanner fields. Values are null when there is not enough
+    # history to calculate a trustworthy metric; missing windows are NaN so
+    # comparisons stay defined and availability is checked with pd.notna.
+    close = float(latest['Close'])
+    high = float(latest['High'])
+    low = float(latest['Low'])
+    open_price = float(latest['Open'])
+    volume = float(latest['Volume'])
+    prior_20 = df.iloc[-21:-1] if len(df) >= 21 else pd.DataFrame()
+
+    sma_series = {period: df[f'SMA_{period}'] for period in (10, 20, 50, 200)}
+    rolling_sma = {
+        period: series.iloc[-1] if len(df) >= period else np.nan
+        for period, series in sma_series.items()
+    }
+    previous_sma = {
+        period: series.iloc[-2] if len(df) >= period + 1 else np.nan
+        for period, series in sma_series.items()
+    }
+
+    atr14 = df['ATR_14'].iloc[-1] if len(df) >= 14 else None
+    adr20 = (df['High'] - df['Low']).tail(20).mean() if len(df) >= 20 else None
+    adr_percent_20 = df['Daily_Range_Pct'].tail(20).mean() if len(df) >= 20 else None
+    avg_volume_20 = prior_20['Volume'].mean() if len(prior_20) == 20 else None
+    avg_rupee_volume_20 = (prior_20['Close'] * prior_20['Volume']).mean() if len(prior_20) == 20 else None
+
+    prior_20_high = df['High'].iloc[-21:-1].max() if len(df) >= 21 else np.nan
+    prior_50_high = df['High'].iloc[-51:-1].max() if len(df) >= 51 else np.nan
+    prior_52w_high = df['High'].iloc[-253:-1].max() if len(df) >= 253 else np.nan
+    current_range = high - low
+    prior_six_ranges = (df['High'] - df['Low']).iloc[-7:-1] if len(df) >= 7 else pd.Series(dtype=float)
+
+    scanner_metrics = {
+        'as_of_date': str(latest['Date']) if 'Date' in df.columns else None,
+        'rupee_volume': value_or_none(close * volume),
+        'gap_percent': value_or_none(gap_up_pct),
+        'range_percent': value_or_none(day_range_pct),
+        'avg_volume_20': value_or_none(avg_volume_20, 0),
+        'avg_rupee_volume_20': value_or_none(avg_rupee_volume_20),
+        'relative_volume_20': value_or_none(volume / avg_volume_20) if avg_volume_20 and avg_volume_20 > 0 else None,
+        'atr14': value_or_none(atr14),
+        'atr_percent_14': value_or_none((atr14 / close) * 100) if atr14 is not None and close > 0 else None,
+        'adr20': value_or_none(adr20),
+        'adr_percent_20': value_or_none(adr_percent_20),
+        'close_above_sma10': boolean_or_none(close > rolling_sma[10], pd.notna(rolling_sma[10])),
+        'close_above_sma20': boolean_or_none(close > rolling_sma[20], pd.notna(rolling_sma[20])),
+        'close_above_sma50': boolean_or_none(close > rolling_sma[50], pd.notna(rolling_sma[50])),
+        'close_above_sma200': boolean_or_none(close > rolling_sma[200], pd.notna(rolling_sma[200])),
+        'sma10_above_sma20': boolean_or_none(rolling_sma[10] > rolling_sma[20], pd.notna(rolling_sma[10]) and pd.notna(rolling_sma[20])),
+        'sma20_above_sma50': boolean_or_none(rolling_sma[20] > rolling_sma[50], pd.notna(rolling_sma[20]) and pd.notna(rolling_sma[50])),
+        'sma50_above_sma200': boolean_or_none(rolling_sma[50] > rolling_sma[200], pd.notna(rolling_sma[50]) and pd.notna(rolling_sma[200])),
+        'sma50_crossed_above_sma200_today': boolean_or_none(
+            previous_sma[50] <= previous_sma[200] and rolling_sma[50] > rolling_sma[200],
+            pd.notna(previous_sma[50]) and pd.notna(previous_sma[200]),
+        ),
+        'distance_from_sma20_percent': value_or_none(((close - rolling_sma[20]) / rolling_sma[20]) * 100) if rolling_sma[20] else None,
+        'distance_from_sma50_percent': value_or_none(((close - rolling_sma[50]) / rolling_sma[50]) * 100) if rolling_sma[50] else None,
+        'distance_from_sma200_percent': value_or_none(((close - rolling_sma[200]) / rolling_sma[200]) * 100) if rolling_sma[200] else None,
+        'distance_from_52w_high_percent': value_or_none(((close - prior_52w_high) / prior_52w_high) * 100) if prior_52w_high else None,
+        'distance_from_52w_low_percent': value_or_none(pct_from_52w_low),
+        'bullish_candle': close > open_price,
+        'close_near_day_high': boolean_or_none(
+            current_range > 0 and (high - close) / current_range <= 0.25,
+            current_range > 0,
+        ),
+        'breakout_above_20d_high': boolean_or_none(close > prior_20_high, pd.notna(prior_20_high)),
+        'breakout_above_50d_high': boolean_or_none(close > prior_50_high, pd.notna(prior_50_high)),
+        'near_52w_high': boolean_or_none(close >= prior_52w_high * 0.95, pd.notna(prior_52w_high)),
+        'breakout_above_52w_high': boolean_or_none(close > prior_52w_high, pd.notna(prior_52w_high)),
+        'is_nr7': boolean_or_none(current_range <= prior_six_ranges.min(), len(prior_six_ranges) == 6),
+        'is_inside_day': boolean_or_none(high <= float(prev['High']) and low >= float(prev['Low']), len(df) >= 2),
+        'is_bullish_engulfing': boolean_or_none(
+            close > open_price and float(prev['Close']) < float(prev['Open'])
+            and open_price <= float(prev['Close']) and close >= float(prev['Open']),
+            len(df) >= 2,
+        ),
+    }
+    scanner_metrics.update({
+        f'sma{period}': value_or_none(value)
+        for period, value in rolling_sma.items() if pd.notna(value)
+    })
+
+    return sym, {
+        "30 Days Average Rupee Volume(Cr.)": round(avg_rupee_vol_30, 2),
+        "RVOL": round(rvol, 2),
+        "Daily Rupee Turnover 20(Cr.)": round(turnover_20, 2),
+        "Daily Rupee Turnover 50(Cr.)": round(turnover_50, 2),
+        "Daily Rupee Turnover 100(Cr.)": round(turnover_100, 2),
+        "200 Days EMA Volume": round(ema_vol_200_latest, 0),
+        "% from 52W High 200 Days EMA Volume": round(pct_from_ema_200_52w_high, 2),
+        "5 Days MA ADR(%)": round(adr_5, 2),
+        "14 Days MA ADR(%)": round(adr_14, 2),
+        "20 Days MA ADR(%)": round(adr_20, 2),
+        "30 Days MA ADR(%)": round(adr_30, 2),
+        "% from ATH": round(pct_from_ath, 2),
+        "ATH_Value": round(ath, 2),
+        "Gap Up %": round(gap_up_pct, 2),
+        "Day Range(%)": round(day_range_pct, 2),
+        "6 Month Returns(%)": round(returns_6m, 2),
+        "% from 52W Low": round(pct_from_52w_low, 2),
+        **scanner_metrics,
+    }
+
+
+def process_symbol_chunk(csv_paths, feature_cache=None):
+    """Process a chunk of CSVs in one worker and keep per-symbol errors."""
+    results = []
+    for csv_path in csv_paths:
+        sym = os.path.basename(csv_path).replace(".csv", "")
+        try:
+            results.append((*process_symbol_csv(csv_path, feature_cache), None))
+        except Exception as error:
+            results.append((sym, None, f"{type(error).__name__}: {error}"))
+    return results
 
-        # 5. Volume Metrics
-        df['Turnover_Cr'] = (df['Close'] * df['Volume']) / 10000000 
-        avg_rupee_vol_30 = df['Turnover_Cr'].tail(30).mean()
-        
-        avg_vol_20 = df['Volume'].tail(21).iloc[:-1].mean()
-        rvol = latest['Volume'] / avg_vol_20 if avg_vol_20 > 0 else 0
-        
-        df['EMA_Vol_200'] = calculate_ema(df['Volume'], 200)
-        ema_vol_200_latest = df['EMA_Vol_200'].iloc[-1]
-        
-        # % from 52W High of 200D EMA Volume
-        ema_vol_200_52w_high = df['EMA_Vol_200'].tail(252).max()
-        pct_from_ema_200_52w_high = ((ema_vol_200_latest - ema_vol_200_52w_high) / ema_vol_200_52w_high) * 100 if ema_vol_200_52w_high > 0 else 0
-
-        # 6. Turnover Moving Averages
-        turnover_20 = df['Turnover_Cr'].tail(20).mean()
-        turnover_50 = df['Turnover_Cr'].tail(50).mean()
-        turnover_100 = df['Turnover_Cr'].tail(100).mean()
-
-        # 7. Normalized scanner fields. Values are null when there is not enough
-        # history to calculate a trustworthy metric.
-        close = float(latest['Close'])
-        high = float(latest['High'])
-        low = float(latest['Low'])
-        open_price = float(latest['Open'])
-        volume = float(latest['Volume'])
-        prior_20 = df.iloc[-21:-1] if len(df) >= 21 else pd.DataFrame()
-
-        sma_series = {
-            period: df['Close'].rolling(period, min_periods=period).mean()
-            for period in (10, 20, 50, 200)
-        }
-        rolling_sma = {
-            period: series.iloc[-1] if len(df) >= period else None
-            for period, series in sma_series.items()
-        }
-        previous_sma = {
-            period: series.iloc[-2] if len(df) >= period + 1 else None
-            for period, series in sma_series.items()
-        }
-
-        true_range = pd.concat([
-            df['High'] - df['Low'],
-            (df['High'] - df['Close'].shift(1)).abs(),
-            (df['Low'] - df['Close'].shift(1)).abs(),
-        ], axis=1).max(axis=1)
-        atr14 = true_range.ewm(alpha=1 / 14, adjust=False, min_periods=14).mean().iloc[-1] if len(df) >= 14 else None
-        adr20 = (df['High'] - df['Low']).tail(20).mean() if len(df) >= 20 else None
-        adr_percent_20 = df['Daily_Range_Pct'].tail(20).mean() if len(df) >= 20 else None
-        avg_volume_20 = prior_20['Volume'].mean() if len(prior_20) == 20 else None
-        avg_rupee_volume_20 = (prior_20['Close'] * prior_20['Volume']).mean() if len(prior_20) == 20 else None
-
-        prior_20_high = df['High'].iloc[-21:-1].max() if len(df) >= 21 else None
-        prior_50_high = df['High'].iloc[-51:-1].max() if len(df) >= 51 else None
-        prior_52w_high = df['High'].iloc[-253:-1].max() if len(df) >= 253 else None
-        current_range = high - low
-        prior_six_ranges = (df['High'] - df['Low']).iloc[-7:-1] if len(df) >= 7 else pd.Series(dtype=float)
-
-        scanner_metrics = {
-            'as_of_date': str(latest['Date']) if 'Date' in df.columns else None,
-            'rupee_volume': value_or_none(close * volume),
-            'gap_percent': value_or_none(gap_up_pct),
-            'range_percent': value_or_none(day_range_pct),
-            'avg_volume_20': value_or_none(avg_volume_20, 0),
-            'avg_rupee_volume_20': value_or_none(avg_rupee_volume_20),
-            'relative_volume_20': value_or_none(volume / avg_volume_20) if avg_volume_20 and avg_volume_20 > 0 else None,
-            'atr14': value_or_none(atr14),
-            'atr_percent_14': value_or_none((atr14 / close) * 100) if atr14 is not None and close > 0 else None,
-            'adr20': value_or_none(adr20),
-            'adr_percent_20': value_or_none(adr_percent_20),
-            'close_above_sma10': boolean_or_none(close > rolling_sma[10], rolling_sma[10] is not None),
-            'close_above_sma20': boolean_or_none(close > rolling_sma[20], rolling_sma[20] is not None),
-            'close_above_sma50': boolean_or_none(close > rolling_sma[50], rolling_sma[50] is not None),
-            'close_above_sma200': boolean_or_none(close > rolling_sma[200], rolling_sma[200] is not None),
-            'sma10_above_sma20': boolean_or_none(rolling_sma[10] > rolling_sma[20], rolling_sma[10] is not None and rolling_sma[20] is not None),
-            'sma20_above_sma50': boolean_or_none(rolling_sma[20] > rolling_sma[50], rolling_sma[20] is not None and rolling_sma[50] is not None),
-            'sma50_above_sma200': boolean_or_none(rolling_sma[50] > rolling_sma[200], rolling_sma[50] is not None and rolling_sma[200] is not None),
-            'sma50_crossed_above_sma200_today': boolean_or_none(
-                previous_sma[50] <= previous_sma[200] and rolling_sma[50] > rolling_sma[200],
-                previous_sma[50] is not None and previous_sma[200] is not None,
-            ),
-            'distance_from_sma20_percent': value_or_none(((close - rolling_sma[20]) / rolling_sma[20]) * 100) if rolling_sma[20] else None,
-            'distance_from_sma50_percent': value_or_none(((close - rolling_sma[50]) / rolling_sma[50]) * 100) if rolling_sma[50] else None,
-            'distance_from_sma200_percent': value_or_none(((close - rolling_sma[200]) / rolling_sma[200]) * 100) if rolling_sma[200] else None,
-            'distance_from_52w_high_percent': value_or_none(((close - prior_52w_high) / prior_52w_high) * 100) if prior_52w_high else None,
-            'distance_from_52w_low_percent': value_or_none(pct_from_52w_low),
-            'bullish_candle': close > open_price,
-            'close_near_day_high': boolean_or_none(
-                (high - close) / current_range <= 0.25,
-                current_range > 0,
-            ),
-            'breakout_above_20d_high': boolean_or_none(close > prior_20_high, prior_20_high is not None),
-            'breakout_above_50d_high': boolean_or_none(close > prior_50_high, prior_50_high is not None),
-            'near_52w_high': boolean_or_none(close >= prior_52w_high * 0.95, prior_52w_high is not None),
-            'breakout_above_52w_high': boolean_or_none(close > prior_52w_high, prior_52w_high is not None),
-            'is_nr7': boolean_or_none(current_range <= prior_six_ranges.min(), len(prior_six_ranges) == 6),
-            'is_inside_day': boolean_or_none(high <= float(prev['High']) and low >= float(prev['Low']), len(df) >= 2),
-            'is_bullish_engulfing': boolean_or_none(
-                close > open_price and float(prev['Close']) < float(prev['Open'])
-                and open_price <= float(prev['Close']) and close >= float(prev['Open']),
-                len(df) >= 2,
-            ),
-        }
-        scanner_metrics.update({
-            f'sma{period}': value_or_none(value)
-            for period, value in rolling_sma.items() if value is not None
-        })
-
-        return sym, {
-            "30 Days Average Rupee Volume(Cr.)": round(avg_rupee_vol_30, 2),
-            "RVOL": round(rvol, 2),
-            "Daily Rupee Turnover 20(Cr.)": round(turnover_20, 2),
-            "Daily Rupee Turnover 50(Cr.)": round(turnover_50, 2),
-            "Daily Rupee Turnover 100(Cr.)": round(turnover_100, 2),
-            "200 Days EMA Volume": round(ema_vol_200_latest, 0),
-            "% from 52W High 200 Days EMA Volume": round(pct_from_ema_200_52w_high, 2),
-            "5 Days MA ADR(%)": round(adr_5, 2),
-            "14 Days MA ADR(%)": round(adr_14, 2),
-            "20 Days MA ADR(%)": round(adr_20, 2),
-            "30 Days MA ADR(%)": round(adr_30, 2),
-            "% from ATH": round(pct_from_ath, 2),
-            "ATH_Value": round(ath, 2),
-            "Gap Up %": round(gap_up_pct, 2),
-            "Day Range(%)": round(day_range_pct, 2),
-            "6 Month Returns(%)": round(returns_6m, 2),
-            "% from 52W Low": round(pct_from_52w_low, 2),
-            **scanner_metrics,
-        }
-    except Exception as e:
-        return sym, None
 
 def main():
     print("Loading base analysis data...")
@@ -263,13 +269,32 @@ def main():
     print("Processing OHLCV metrics for all stocks...")
     csv_files = glob.glob(os.path.join(OHLCV_DIR, "*.csv"))
     
+    # The work is CPU-bound pandas, so symbols are spread across processes in
+    # chunks to amortize the per-task pickling cost.
+    feature_cache = default_feature_cache()
+    chunks = [chunk for _index, chunk in chunked(sorted(csv_files), CHUNK_SIZE)]
+    workers = env_int("EDL_METRICS_WORKERS", os.cpu_count() or 1, minimum=1)
     advanced_metrics_map = {}
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = [executor.submit(process_symbol_csv, cf) for cf in csv_files]
-        for future in futures:
-            sym, result = future.result()
-            if result:
-                advanced_metrics_map[sym] = result
+    errors = {}
+    skipped = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_results in executor.map(process_symbol_chunk, chunks, [feature_cache] * len(chunks)):
+            for sym, result, error in chunk_results:
+                if error:
+                    errors[sym] = error
+                elif result:
+                    advanced_metrics_map[sym] = result
+                else:
+                    skipped += 1
+
+    print(
+        f"OHLCV metrics: {len(advanced_metrics_map)} computed | "
+        f"{skipped} insufficient history | {len(errors)} failed"
+    )
+    print_symbol_errors(errors)
+    if csv_files and not advanced_metrics_map:
+        print("Error: no OHLCV metrics could be computed.")
+        return False
 
     print(f"Updating {len(base_data)} stocks in master JSON...")
     
@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from edl_pipeline.field_usage import field_usage
+
+def main():
+    report = field_usage()
+    print(
+        f"Dashboard scan: {len(report['used'])}/{report['catalogue_size']} catalogue fields read by "
+        f"{len(report['consumers'])} modules, {report['requested_size']} requested"
+    )
+    if report["unused"]:
+        print(f"  Not read (not requested): {', '.join(report['unused'])}")
+    if report["requested_unused"]:
+        print(f"  Requested but no longer read: {', '.join(report['requested_unused'])}")
+    if report["duplicate_requests"]:
+        print(f"  Requested more than once: {', '.join(report['duplicate_requests'])}")
+    if report["newly_used"]:
+        for field in report["newly_used"]:
+            print(f"  NEW: {field} is read by {', '.join(report['used'][field])} but not requested")
+        print("Add the new fields to DASHBOARD_USED_FIELDS in edl_pipeline/scanx_planner.py.")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
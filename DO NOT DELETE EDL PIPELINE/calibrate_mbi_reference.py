@@ -3,15 +3,23 @@
 This is an evidence tool, not part of the production pipeline. It fetches a
 short, reproducible OHLCV snapshot, evaluates plausible universe and return
 definitions, and writes the ranked results to ``calibration/``.
+
+The snapshot is loaded once into a date x symbol panel of closes, returns, and
+cumulative-sum moving averages.  The 4.5R grid broadcasts every cap floor and
+return threshold over that panel in one array pass per cap/price mode, and
+the mode blocks run on a process pool.  ``--optimize`` replaces the grid with
+coordinate descent over plateau-exact line searches, plus walk-forward
+validation on held-out reference dates and parameter confidence ranges.
 """
 
 from __future__ import annotations
 
 import json
 import math
+import os
+import sys
 import time
-from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 import csv
 import io
@@ -20,7 +28,12 @@ from pathlib import Path
 import numpy as np
 import requests
 
-from pipeline_utils import fetch_scanx_data, get_headers, save_json
+SRC_DIR = Path(__file__).resolve().parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from edl_pipeline.scanx_planner import MBI_UNIVERSE_QUERY, scanx_rows
+from pipeline_utils import chunked, get_headers, save_json
 
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -108,22 +121,6 @@ REFERENCE_DERIVED = {
 }
 
 
-def _universe_payload():
-    return {
-        "data": {
-            "sort": "Mcap",
-            "sorder": "desc",
-            "count": 5000,
-            "fields": ["Sym", "DispSym", "Sid", "Mcap", "Ltp", "Exch", "OgInst"],
-            "params": [
-                {"field": "OgInst", "op": "", "val": "ES"},
-                {"field": "Exch", "op": "", "val": "NSE"},
-            ],
-            "pgno": 0,
-        }
-    }
-
-
 def _history_payload(stock):
     return {
         "EXCH": stock.get("Exch") or "NSE",
@@ -172,7 +169,7 @@ def _fetch_history(stock):
 def build_snapshot():
     stocks = [
         row
-        for row in fetch_scanx_data(_universe_payload(), timeout=30)
+        for row in scanx_rows(MBI_UNIVERSE_QUERY, timeout=30)
         if row.get("Sym")
         and row.get("Sid")
         and row.get("Mcap") is not None
@@ -217,38 +214,99 @@ def load_snapshot(refresh=False):
     return build_snapshot()
 
 
-def observations(snapshot):
-    rows = []
-    target_dates = sorted(set(REFERENCE_45R) | set(REFERENCE_XP))
-    for stock in snapshot["stocks"]:
-        history = stock["history"]
-        all_dates = sorted(history)
-        date_index = {date: index for index, date in enumerate(all_dates)}
-        for date in target_dates:
-            index = date_index.get(date)
-            if index is None or index == 0:
+CALIBRATION_DATES = sorted(set(REFERENCE_45R) | set(REFERENCE_EXTREME_PCTS))
+MA_PERIODS = (10, 20, 50, 200)
+CAP_MODES = ("latest_snapshot", "historical_scaled")
+PRICE_MODES = ("latest_snapshot", "historical_close")
+BROAD_CAP_FLOORS = (
+    0, 100, 250, 500, 750, 999, 1250, 1500, 2000, 2500,
+    3000, 4000, 5000, 7500, 10000,
+)
+
+
+class CalibrationPanel:
+    """Date x symbol closes, returns, and moving averages for a snapshot.
+
+    Every stock's own history defines its previous close and its moving-average
+    windows, so gaps in one stock never shift another stock's calculations.
+    Missing cells are NaN.
+    """
+
+    def __init__(self, snapshot):
+        stocks = snapshot["stocks"]
+        self.symbols = [stock["symbol"] for stock in stocks]
+        self.market_cap = np.array([float(stock["market_cap"]) for stock in stocks])
+        self.latest_price = np.array([float(stock["latest_price"]) for stock in stocks])
+        self.dates = sorted({date for stock in stocks for date in stock["history"]})
+        self.date_rows = {date: row for row, date in enumerate(self.dates)}
+
+        shape = (len(self.dates), len(stocks))
+        self.close = np.full(shape, np.nan)
+        self.previous_close = np.full(shape, np.nan)
+        self.observation = np.full(shape, -1, dtype=np.int64)
+        self.sma = {period: np.full(shape, np.nan) for period in MA_PERIODS}
+        self.ema = {period: np.full(shape, np.nan) for period in MA_PERIODS}
+
+        for column, stock in enumerate(stocks):
+            history_dates = sorted(stock["history"])
+            if not history_dates:
                 continue
-            close = float(history[date])
-            previous_close = float(history[all_dates[index - 1]])
-            rows.append(
-                (
-                    date,
-                    float(stock["market_cap"]),
-                    float(stock["latest_price"]),
-                    close,
-                    previous_close,
-                    100.0 * (close / previous_close - 1.0),
-                )
-            )
-    dtype = [
-        ("date", "U10"),
-        ("market_cap", "f8"),
-        ("latest_price", "f8"),
-        ("close", "f8"),
-        ("previous_close", "f8"),
-        ("return_pct", "f8"),
-    ]
-    return np.array(rows, dtype=dtype)
+            rows = np.array([self.date_rows[date] for date in history_dates])
+            closes = np.array([float(stock["history"][date]) for date in history_dates])
+            self.close[rows, column] = closes
+            self.previous_close[rows[1:], column] = closes[:-1]
+            self.observation[rows, column] = np.arange(len(rows))
+            totals = np.concatenate(([0.0], np.cumsum(closes)))
+            for period in MA_PERIODS:
+                if len(closes) >= period:
+                    self.sma[period][rows[period - 1:], column] = (
+                        totals[period:] - totals[:-period]
+                    ) / period
+                self.ema[period][rows, column] = _ema(closes, period)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.returns = 100.0 * (self.close / self.previous_close - 1.0)
+
+    def symbol_mask(self, cap_floor, price_floor, allowed_symbols=None):
+        """Select stocks by latest market cap and price, as the snapshot filters do."""
+        mask = (self.market_cap > cap_floor) & (self.latest_price >= price_floor)
+        if allowed_symbols is not None:
+            mask &= np.array([symbol in allowed_symbols for symbol in self.symbols], dtype=bool)
+        return mask
+
+
+def _ema(closes, period):
+    """EMA seeded with the first close, as the published indicator does."""
+    alpha = 2.0 / (period + 1.0)
+    decay = 1.0 - alpha
+    values = np.empty(len(closes))
+    value = closes[0]
+    # Blockwise closed form of value = alpha * close + decay * value.
+    for start in range(0, len(closes), 64):
+        block = alpha * closes[start:start + 64]
+        powers = decay ** np.arange(len(block))
+        block_values = powers * (decay * value + np.cumsum(block / powers))
+        values[start:start + len(block)] = block_values
+        value = block_values[-1]
+    return values
+
+
+def observations(panel, dates=CALIBRATION_DATES):
+    """Return the reference-date cross sections needed by the 4.5R grid."""
+    rows = [panel.date_rows.get(date) for date in dates]
+    close = np.full((len(dates), len(panel.symbols)), np.nan)
+    returns = np.full((len(dates), len(panel.symbols)), np.nan)
+    for position, row in enumerate(rows):
+        if row is not None:
+            close[position] = panel.close[row]
+            returns[position] = panel.returns[row]
+    return {
+        "dates": list(dates),
+        "market_cap": panel.market_cap,
+        "latest_price": panel.latest_price,
+        "close": close,
+        "returns": returns,
+    }
 
 
 def _score_45r(calculated):
@@ -261,42 +319,90 @@ def _score_45r(calculated):
     return math.sqrt(sum(errors) / len(errors))
 
 
-def calculate_ratios(
+def calculate_ratio_grid(
     data,
-    cap_floor,
-    return_threshold,
+    cap_floors,
+    return_thresholds,
     cap_mode,
     price_mode,
     price_floor=1.0,
 ):
+    """Count eligible stocks, advances, and declines for every floor/threshold.
+
+    Returns ``eligible[date, floor]`` and ``advances``/``declines`` shaped
+    ``[date, floor, threshold]``, computed in one broadcast pass.
+    """
+    cap_floors = np.asarray(cap_floors, dtype=float)
+    return_thresholds = np.asarray(return_thresholds, dtype=float)
+    close = data["close"]
+    returns = data["returns"]
+    with np.errstate(invalid="ignore"):
+        if cap_mode == "historical_scaled":
+            market_cap = data["market_cap"] * close / data["latest_price"]
+        else:
+            market_cap = np.broadcast_to(data["market_cap"], close.shape)
+        price = close if price_mode == "historical_close" else np.broadcast_to(
+            data["latest_price"],
+            close.shape,
+        )
+        eligible = (
+            ~np.isnan(returns)[:, :, None]
+            & (market_cap[:, :, None] > cap_floors)
+            & (price >= price_floor)[:, :, None]
+        )
+        advancing = returns[:, :, None] > return_thresholds
+        declining = returns[:, :, None] < -return_thresholds
+
+    weights = eligible.astype(np.float32)
+    advances = np.matmul(weights.transpose(0, 2, 1), advancing.astype(np.float32))
+    declines = np.matmul(weights.transpose(0, 2, 1), declining.astype(np.float32))
+    return (
+        eligible.sum(axis=1),
+        np.rint(advances).astype(np.int64),
+        np.rint(declines).astype(np.int64),
+    )
+
+
+def _ratio_cell(dates, eligible, advances, declines):
     calculated = {}
     counts = {}
     extreme_percentages = {}
-    for date in sorted(set(REFERENCE_45R) | set(REFERENCE_EXTREME_PCTS)):
-        day = data[data["date"] == date]
-        if cap_mode == "historical_scaled":
-            market_cap = day["market_cap"] * day["close"] / day["latest_price"]
-        else:
-            market_cap = day["market_cap"]
-        price = day["close"] if price_mode == "historical_close" else day["latest_price"]
-        eligible = (market_cap > cap_floor) & (price >= price_floor)
-        returns = day["return_pct"][eligible]
-        advances = int(np.count_nonzero(returns > return_threshold))
-        declines = int(np.count_nonzero(returns < -return_threshold))
-        calculated[date] = 100.0 * advances / declines if declines else None
-        eligible_count = int(np.count_nonzero(eligible))
+    for position, date in enumerate(dates):
+        eligible_count = int(eligible[position])
+        advance_count = int(advances[position])
+        decline_count = int(declines[position])
+        calculated[date] = 100.0 * advance_count / decline_count if decline_count else None
         extreme_percentages[date] = {
-            "advance": 100.0 * advances / eligible_count if eligible_count else None,
-            "decline": 100.0 * declines / eligible_count if eligible_count else None,
+            "advance": 100.0 * advance_count / eligible_count if eligible_count else None,
+            "decline": 100.0 * decline_count / eligible_count if eligible_count else None,
         }
         counts[date] = {
             "eligible": eligible_count,
-            "advances": advances,
-            "declines": declines,
+            "advances": advance_count,
+            "declines": decline_count,
         }
     return calculated, counts, extreme_percentages
 
 
+def calculate_ratios(
+    data,
+    cap_floor,
+    return_threshold,
+    cap_mode,
+    price_mode,
+    price_floor=1.0,
+):
+    eligible, advances, declines = calculate_ratio_grid(
+        data,
+        [cap_floor],
+        [return_threshold],
+        cap_mode,
+        price_mode,
+        price_floor,
+    )
+    return _ratio_cell(data["dates"], eligible[:, 0], advances[:, 0, 0], declines[:, 0, 0])
+
+
 def _score_extreme_percentages(calculated):
     errors = []
     for date, targets in REFERENCE_EXTREME_PCTS.items():
@@ -309,169 +415,397 @@ def _score_extreme_percentages(calculated):
     return math.sqrt(sum(errors) / len(errors))
 
 
-def calibrate_45r(data):
+def _calibration_result(
+    cap_mode,
+    price_mode,
+    cap_floor,
+    return_threshold,
+    calculated,
+    counts,
+    extreme_percentages,
+):
+    ratio_score = _score_45r(calculated)
+    percentage_score = _score_extreme_percentages(extreme_percentages)
+    return {
+        "score": ratio_score + percentage_score / 10.0,
+        "score_log_rmse": ratio_score,
+        "score_extreme_pct_rmse": percentage_score,
+        "cap_mode": cap_mode,
+        "price_mode": price_mode,
+        "market_cap_floor_crore": round(float(cap_floor), 2),
+        "return_threshold_pct": round(float(return_threshold), 3),
+        "calculated": {
+            date: round(value, 3) if value is not None else None
+            for date, value in calculated.items()
+        },
+        "extreme_percentages": {
+            date: {
+                key: round(value, 3) if value is not None else None
+                for key, value in values.items()
+            }
+            for date, values in extreme_percentages.items()
+        },
+        "counts": counts,
+    }
+
+
+def _calibrate_block(data, cap_mode, price_mode, cap_floors, return_thresholds):
+    eligible, advances, declines = calculate_ratio_grid(
+        data,
+        cap_floors,
+        return_thresholds,
+        cap_mode,
+        price_mode,
+    )
     results = []
-    broad_cap_floors = [
-        0, 100, 250, 500, 750, 999, 1250, 1500, 2000, 2500,
-        3000, 4000, 5000, 7500, 10000,
-    ]
-    for cap_mode in ("latest_snapshot", "historical_scaled"):
-        for price_mode in ("latest_snapshot", "historical_close"):
-            for cap_floor in broad_cap_floors:
-                for return_threshold in np.arange(3.5, 5.51, 0.1):
-                    calculated, counts, extreme_percentages = calculate_ratios(
-                        data,
-                        float(cap_floor),
-                        float(return_threshold),
-                        cap_mode,
-                        price_mode,
-                    )
-                    ratio_score = _score_45r(calculated)
-                    percentage_score = _score_extreme_percentages(extreme_percentages)
-                    results.append(
-                        {
-                            "score": ratio_score + percentage_score / 10.0,
-                            "score_log_rmse": ratio_score,
-                            "score_extreme_pct_rmse": percentage_score,
-                            "cap_mode": cap_mode,
-                            "price_mode": price_mode,
-                            "market_cap_floor_crore": round(float(cap_floor), 2),
-                            "return_threshold_pct": round(float(return_threshold), 3),
-                            "calculated": {
-                                date: round(value, 3) if value is not None else None
-                                for date, value in calculated.items()
-                            },
-                            "extreme_percentages": {
-                                date: {
-                                    key: round(value, 3) if value is not None else None
-                                    for key, value in values.items()
-                                }
-                                for date, values in extreme_percentages.items()
-                            },
-                            "counts": counts,
-                        }
-                    )
+    for floor_index, cap_floor in enumerate(cap_floors):
+        for threshold_index, return_threshold in enumerate(return_thresholds):
+            results.append(
+                _calibration_result(
+                    cap_mode,
+                    price_mode,
+                    cap_floor,
+                    return_threshold,
+                    *_ratio_cell(
+                        data["dates"],
+                        eligible[:, floor_index],
+                        advances[:, floor_index, threshold_index],
+                        declines[:, floor_index, threshold_index],
+                    ),
+                )
+            )
+    return results
+
+
+def calibrate_45r(data, workers=None):
+    """Score the cap-floor x return-threshold grid for every cap and price mode.
+
+    Each mode pair is one broadcast block; blocks run on a process pool.
+    """
+    cap_floors = [float(cap_floor) for cap_floor in BROAD_CAP_FLOORS]
+    return_thresholds = [float(value) for value in np.arange(3.5, 5.51, 0.1)]
+    blocks = [(cap_mode, price_mode) for cap_mode in CAP_MODES for price_mode in PRICE_MODES]
+    workers = workers or min(len(blocks), os.cpu_count() or 1)
+
+    results = []
+    if workers == 1:
+        for cap_mode, price_mode in blocks:
+            results.extend(_calibrate_block(data, cap_mode, price_mode, cap_floors, return_thresholds))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _calibrate_block,
+                    data,
+                    cap_mode,
+                    price_mode,
+                    cap_floors,
+                    return_thresholds,
+                )
+                for cap_mode, price_mode in blocks
+            ]
+            for future in futures:
+                results.extend(future.result())
+    return sorted(results, key=lambda result: result["score"])
+
+
+OPTIMIZER_BOUNDS = {
+    "market_cap_floor_crore": (0.0, 10000.0),
+    "return_threshold_pct": (3.5, 5.5),
+}
+OPTIMIZER_START = {"market_cap_floor_crore": 999.0, "return_threshold_pct": 4.5}
+OPTIMIZER_MAX_ROUNDS = 10
+LINE_SEARCH_CHUNK = 512
+CONFIDENCE_TOLERANCE = 0.05
+WALK_FORWARD_MIN_TRAIN = 5
+
+
+def _score_counts(dates, eligible, advances, declines):
+    """Vectorized ``_score_45r + _score_extreme_percentages / 10`` over ``[date, cell]`` counts."""
+    ratio_targets = np.log([REFERENCE_45R[date] for date in dates])[:, None]
+    advance_targets = np.array([REFERENCE_EXTREME_PCTS[date]["advance"] for date in dates])[:, None]
+    decline_targets = np.array([REFERENCE_EXTREME_PCTS[date]["decline"] for date in dates])[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_ratio = np.log(100.0 * advances / declines)
+        advance_pct = 100.0 * advances / eligible
+        decline_pct = 100.0 * declines / eligible
+    ratio_score = np.sqrt(np.mean((log_ratio - ratio_targets) ** 2, axis=0))
+    percentage_score = np.sqrt(
+        np.mean(
+            np.concatenate(((advance_pct - advance_targets) ** 2, (decline_pct - decline_targets) ** 2)),
+            axis=0,
+        )
+    )
+    scores = ratio_score + percentage_score / 10.0
+    invalid = ((declines == 0) | (advances == 0)).any(axis=0) | (eligible == 0).any(axis=0)
+    return np.where(invalid, np.inf, scores)
+
+
+class CalibrationObjective:
+    """Cached 4.5R score for one cap/price mode on a subset of reference dates.
+
+    The score is piecewise constant: it only changes where a cap floor or a
+    return threshold crosses an observed market cap or absolute return.  Line
+    searches therefore evaluate one representative per plateau, and every
+    evaluated ``(cap floor, threshold)`` pair is cached.
+    """
+
+    def __init__(self, data, cap_mode, price_mode, dates=None):
+        dates = list(dates or data["dates"])
+        rows = [data["dates"].index(date) for date in dates]
+        self.data = {
+            **data,
+            "dates": dates,
+            "close": data["close"][rows],
+            "returns": data["returns"][rows],
+        }
+        self.cap_mode = cap_mode
+        self.price_mode = price_mode
+        self.cache = {}
+        self.evaluations = 0
+
+    def breakpoints(self, name):
+        returns = self.data["returns"]
+        observed = ~np.isnan(returns)
+        if name == "return_threshold_pct":
+            return np.unique(np.abs(returns[observed]))
+        if self.cap_mode == "historical_scaled":
+            caps = self.data["market_cap"] * self.data["close"] / self.data["latest_price"]
+            return np.unique(caps[observed])
+        return np.unique(self.data["market_cap"][observed.any(axis=0)])
+
+    def plateaus(self, name, bounds):
+        """Return ``(centres, edges)`` of the constant-score intervals inside ``bounds``."""
+        low, high = bounds
+        values = self.breakpoints(name)
+        edges = np.concatenate(([low], values[(values > low) & (values < high)], [high]))
+        return (edges[:-1] + edges[1:]) / 2.0, edges
+
+    def line_scores(self, name, values, params):
+        """Score ``values`` for parameter ``name`` with the other parameter held fixed."""
+        cells = [
+            (float(value), params["return_threshold_pct"])
+            if name == "market_cap_floor_crore"
+            else (params["market_cap_floor_crore"], float(value))
+            for value in values
+        ]
+        missing = [cell for cell in dict.fromkeys(cells) if cell not in self.cache]
+        for _, chunk in chunked(missing, LINE_SEARCH_CHUNK):
+            if name == "market_cap_floor_crore":
+                floors = [cell[0] for cell in chunk]
+                thresholds = [chunk[0][1]]
+            else:
+                floors = [chunk[0][0]]
+                thresholds = [cell[1] for cell in chunk]
+            eligible, advances, declines = calculate_ratio_grid(
+                self.data,
+                floors,
+                thresholds,
+                self.cap_mode,
+                self.price_mode,
+            )
+            scores = _score_counts(
+                self.data["dates"],
+                np.repeat(eligible[:, :, None], len(thresholds), axis=2).reshape(len(self.data["dates"]), -1),
+                advances.reshape(len(self.data["dates"]), -1),
+                declines.reshape(len(self.data["dates"]), -1),
+            )
+            self.cache.update(zip(chunk, scores.tolist()))
+            self.evaluations += len(chunk)
+        return np.array([self.cache[cell] for cell in cells])
+
+    def __call__(self, params):
+        return float(self.line_scores("return_threshold_pct", [params["return_threshold_pct"]], params)[0])
+
+
+def coordinate_descent(objective, start=None, bounds=None, max_rounds=OPTIMIZER_MAX_ROUNDS):
+    """Minimize ``objective`` one parameter at a time with exact plateau line searches."""
+    bounds = bounds or OPTIMIZER_BOUNDS
+    params = dict(start or OPTIMIZER_START)
+    best = objective(params)
+    rounds = 0
+    while rounds < max_rounds:
+        rounds += 1
+        improved = False
+        for name in bounds:
+            centres, _edges = objective.plateaus(name, bounds[name])
+            scores = objective.line_scores(name, centres, params)
+            position = int(np.argmin(scores))
+            if scores[position] < best:
+                params[name] = float(centres[position])
+                best = float(scores[position])
+                improved = True
+        if not improved:
+            break
+    return params, best, rounds
+
+
+def parameter_confidence(objective, params, bounds=None, tolerance=CONFIDENCE_TOLERANCE):
+    """Return each parameter's contiguous range scoring within ``tolerance`` of the optimum."""
+    bounds = bounds or OPTIMIZER_BOUNDS
+    best = objective(params)
+    confidence = {}
+    for name in bounds:
+        centres, edges = objective.plateaus(name, bounds[name])
+        scores = objective.line_scores(name, centres, params)
+        if not np.isfinite(best):
+            confidence[name] = None
+            continue
+        accepted = scores <= best * (1.0 + tolerance)
+        position = int(np.searchsorted(edges, params[name], side="right")) - 1
+        position = min(max(position, 0), len(centres) - 1)
+        first = last = position
+        while first > 0 and accepted[first - 1]:
+            first -= 1
+        while last < len(centres) - 1 and accepted[last + 1]:
+            last += 1
+        confidence[name] = {
+            "low": round(float(edges[first]), 3),
+            "high": round(float(edges[last + 1]), 3),
+            "plateau": [round(float(edges[position]), 3), round(float(edges[position + 1]), 3)],
+        }
+    return confidence
+
+
+def walk_forward_45r(data, cap_mode, price_mode, min_train=WALK_FORWARD_MIN_TRAIN):
+    """Refit on each expanding window of dates and score the next held-out date."""
+    dates = list(data["dates"])
+    folds = []
+    for split in range(min_train, len(dates)):
+        train = CalibrationObjective(data, cap_mode, price_mode, dates[:split])
+        params, train_score, _rounds = coordinate_descent(train)
+        test = CalibrationObjective(data, cap_mode, price_mode, dates[split:split + 1])
+        folds.append({
+            "train_dates": [dates[0], dates[split - 1]],
+            "test_date": dates[split],
+            **{name: round(value, 3) for name, value in params.items()},
+            "train_score": train_score,
+            "test_score": test(params),
+        })
+    finite = [fold["test_score"] for fold in folds if math.isfinite(fold["test_score"])]
+    return {
+        "folds": folds,
+        "mean_test_score": sum(finite) / len(finite) if finite else None,
+        "parameter_range": {
+            name: [min(fold[name] for fold in folds), max(fold[name] for fold in folds)]
+            if folds
+            else None
+            for name in OPTIMIZER_BOUNDS
+        },
+    }
+
+
+def _optimize_block(data, cap_mode, price_mode, walk_forward):
+    objective = CalibrationObjective(data, cap_mode, price_mode)
+    params, _score, rounds = coordinate_descent(objective)
+    confidence = parameter_confidence(objective, params)
+    result = _calibration_result(
+        cap_mode,
+        price_mode,
+        params["market_cap_floor_crore"],
+        params["return_threshold_pct"],
+        *calculate_ratios(
+            data,
+            params["market_cap_floor_crore"],
+            params["return_threshold_pct"],
+            cap_mode,
+            price_mode,
+        ),
+    )
+    result.update({
+        "rounds": rounds,
+        "evaluations": objective.evaluations,
+        "confidence": confidence,
+    })
+    if walk_forward:
+        result["walk_forward"] = walk_forward_45r(data, cap_mode, price_mode)
+    return result
+
+
+def optimize_45r(data, workers=None, walk_forward=True):
+    """Coordinate-descent counterpart of ``calibrate_45r`` with one result per mode."""
+    blocks = [(cap_mode, price_mode) for cap_mode in CAP_MODES for price_mode in PRICE_MODES]
+    workers = workers or min(len(blocks), os.cpu_count() or 1)
+    if workers == 1:
+        results = [
+            _optimize_block(data, cap_mode, price_mode, walk_forward)
+            for cap_mode, price_mode in blocks
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_optimize_block, data, cap_mode, price_mode, walk_forward)
+                for cap_mode, price_mode in blocks
+            ]
+            results = [future.result() for future in futures]
     return sorted(results, key=lambda result: result["score"])
 
 
 def calculate_ma_breadth(
-    snapshot,
+    panel,
     cap_floor=999.0,
     price_floor=1.0,
     allowed_symbols=None,
 ):
-    dates = sorted(REFERENCE_MA_PCTS)
-    periods = (10, 20, 50, 200)
-    counts = {
-        date: {
-            ma_type: {
-                period: {"eligible": 0, "valid": 0, "above": 0}
-                for period in periods
-            }
-            for ma_type in ("sma", "ema")
-        }
-        for date in dates
-    }
-    for stock in snapshot["stocks"]:
-        if allowed_symbols is not None and stock["symbol"] not in allowed_symbols:
-            continue
-        if stock["market_cap"] <= cap_floor or stock["latest_price"] < price_floor:
-            continue
-        history = stock["history"]
-        history_dates = sorted(history)
-        closes = [float(history[date]) for date in history_dates]
-        date_index = {date: index for index, date in enumerate(history_dates)}
-        ema_values = {}
-        for period in periods:
-            alpha = 2.0 / (period + 1.0)
-            values = []
-            value = closes[0]
-            for close in closes:
-                value = alpha * close + (1.0 - alpha) * value
-                values.append(value)
-            ema_values[period] = values
-        for date in dates:
-            index = date_index.get(date)
-            if index is None:
-                continue
-            for period in periods:
-                for ma_type in ("sma", "ema"):
-                    cell = counts[date][ma_type][period]
-                    cell["eligible"] += 1
-                    if index + 1 < period:
-                        continue
-                    moving_average = (
-                        sum(closes[index + 1 - period:index + 1]) / period
-                        if ma_type == "sma"
-                        else ema_values[period][index]
-                    )
-                    cell["valid"] += 1
-                    cell["above"] += int(closes[index] > moving_average)
-
+    selected = panel.symbol_mask(cap_floor, price_floor, allowed_symbols)
     output = {}
-    for date, type_counts in counts.items():
+    for date in sorted(REFERENCE_MA_PCTS):
+        row = panel.date_rows.get(date)
+        if row is None:
+            present = np.zeros(len(panel.symbols), dtype=bool)
+            observation = np.zeros(len(panel.symbols), dtype=np.int64)
+            close = np.full(len(panel.symbols), np.nan)
+        else:
+            close = panel.close[row]
+            present = selected & ~np.isnan(close)
+            observation = panel.observation[row]
+        eligible = int(present.sum())
         output[date] = {}
-        for ma_type, period_counts in type_counts.items():
+        for ma_type, averages in (("sma", panel.sma), ("ema", panel.ema)):
             output[date][ma_type] = {}
-            for period, cell in period_counts.items():
+            for period in MA_PERIODS:
+                valid_mask = present & (observation + 1 >= period)
+                valid = int(valid_mask.sum())
+                if row is None:
+                    above = 0
+                else:
+                    with np.errstate(invalid="ignore"):
+                        above = int((valid_mask & (close > averages[period][row])).sum())
                 output[date][ma_type][period] = {
-                    **cell,
-                    "pct_valid_denominator": (
-                        100.0 * cell["above"] / cell["valid"] if cell["valid"] else None
-                    ),
-                    "pct_eligible_denominator": (
-                        100.0 * cell["above"] / cell["eligible"] if cell["eligible"] else None
-                    ),
+                    "eligible": eligible,
+                    "valid": valid,
+                    "above": above,
+                    "pct_valid_denominator": 100.0 * above / valid if valid else None,
+                    "pct_eligible_denominator": 100.0 * above / eligible if eligible else None,
                 }
     return output
 
 
 def calculate_xp_series(
-    snapshot,
+    panel,
     cap_floor=100.0,
     price_floor=1.0,
     start_date=None,
     allowed_symbols=None,
 ):
-    aggregates = defaultdict(
-        lambda: {
-            "eligible": 0,
-            "up_4_5": 0,
-            "down_4_5": 0,
-            "above_10": 0,
-            "above_20": 0,
+    selected = panel.symbol_mask(cap_floor, price_floor, allowed_symbols)
+    with np.errstate(invalid="ignore"):
+        columns = {
+            "eligible": selected & ~np.isnan(panel.close),
+            "up_4_5": selected & (panel.returns >= 4.5),
+            "down_4_5": selected & (panel.returns < -4.5),
+            "above_10": selected & (panel.close > panel.sma[10]),
+            "above_20": selected & (panel.close > panel.sma[20]),
         }
-    )
-    for stock in snapshot["stocks"]:
-        if allowed_symbols is not None and stock["symbol"] not in allowed_symbols:
-            continue
-        if stock["market_cap"] <= cap_floor or stock["latest_price"] < price_floor:
-            continue
-        history_dates = sorted(stock["history"])
-        closes = [float(stock["history"][date]) for date in history_dates]
-        for index, date in enumerate(history_dates):
-            row = aggregates[date]
-            row["eligible"] += 1
-            if index:
-                daily_return = 100.0 * (closes[index] / closes[index - 1] - 1.0)
-                row["up_4_5"] += int(daily_return >= 4.5)
-                row["down_4_5"] += int(daily_return < -4.5)
-            if index + 1 >= 10:
-                row["above_10"] += int(
-                    closes[index] > sum(closes[index - 9:index + 1]) / 10.0
-                )
-            if index + 1 >= 20:
-                row["above_20"] += int(
-                    closes[index] > sum(closes[index - 19:index + 1]) / 20.0
-                )
+    sums = {name: values.sum(axis=1).tolist() for name, values in columns.items()}
 
     previous_xp = 12.0
     previous_z = None
     output = {}
-    for date in sorted(aggregates):
+    for position, date in enumerate(panel.dates):
         if start_date is not None and date < start_date:
             continue
-        row = aggregates[date]
+        row = {name: values[position] for name, values in sums.items()}
         eligible = row["eligible"]
         if not eligible:
             continue
@@ -508,6 +842,39 @@ def calculate_xp_series(
     return {date: output.get(date) for date in REFERENCE_XP}
 
 
+def _least_squares_multiplier(pairs):
+    return sum(raw * target for raw, target in pairs) / sum(raw * raw for raw, _ in pairs)
+
+
+def walk_forward_xp_multiplier(series, min_train=WALK_FORWARD_MIN_TRAIN):
+    """Refit the XP output multiplier on expanding windows and test the next date."""
+    dated = [
+        (date, float(series[date]["xp"]), float(target))
+        for date, target in sorted(REFERENCE_XP.items())
+        if series.get(date) is not None
+    ]
+    folds = []
+    for split in range(min_train, len(dated)):
+        multiplier = _least_squares_multiplier([(raw, target) for _, raw, target in dated[:split]])
+        test_date, raw, target = dated[split]
+        folds.append({
+            "train_dates": [dated[0][0], dated[split - 1][0]],
+            "test_date": test_date,
+            "multiplier": multiplier,
+            "test_error": raw * multiplier - target,
+            "rounded_match": round(raw * multiplier) == target,
+        })
+    multipliers = [fold["multiplier"] for fold in folds]
+    return {
+        "folds": folds,
+        "mean_absolute_test_error": (
+            sum(abs(fold["test_error"]) for fold in folds) / len(folds) if folds else None
+        ),
+        "rounded_matches": sum(fold["rounded_match"] for fold in folds),
+        "multiplier_range": [min(multipliers), max(multipliers)] if multipliers else None,
+    }
+
+
 def evaluate_xp_output_calibration(series):
     """Score a transparent output-only calibration against displayed XP."""
     pairs = [
@@ -515,10 +882,7 @@ def evaluate_xp_output_calibration(series):
         for date, target in REFERENCE_XP.items()
         if series.get(date) is not None
     ]
-    least_squares_multiplier = (
-        sum(raw * target for raw, target in pairs)
-        / sum(raw * raw for raw, _ in pairs)
-    )
+    least_squares_multiplier = _least_squares_multiplier(pairs)
     rounding_lower = max((target - 0.5) / raw for raw, target in pairs)
     rounding_upper = min((target + 0.5) / raw for raw, target in pairs)
     has_exact_rounding_interval = rounding_lower < rounding_upper
@@ -557,6 +921,7 @@ def evaluate_xp_output_calibration(series):
             else None
         ),
         "selected": metrics(selected_multiplier),
+        "walk_forward": walk_forward_xp_multiplier(series),
         "warning": (
             "Output-only calibration on ten published dates. Revalidate on "
             "unseen dates and whenever the upstream universe changes."
@@ -674,6 +1039,7 @@ def calculate_nse_ratios(
 
 def main():
     refresh = "--refresh" in __import__("sys").argv
+    optimize = "--optimize" in __import__("sys").argv
     snapshot = load_snapshot(refresh=refresh)
     nse_bhavcopy = load_nse_bhavcopy_returns(refresh=refresh)
     calibrated_series = {"EQ", "BE", "BZ", "ST"}
@@ -683,9 +1049,10 @@ def main():
         for row in nse_bhavcopy[latest_bhavcopy_date]
         if row["series"] in calibrated_series
     }
-    data = observations(snapshot)
-    ranked = calibrate_45r(data)
-    xp_cap_100 = calculate_xp_series(snapshot)
+    panel = CalibrationPanel(snapshot)
+    data = observations(panel)
+    ranked = optimize_45r(data) if optimize else calibrate_45r(data)
+    xp_cap_100 = calculate_xp_series(panel)
     report = {
         "reference_4_5r": REFERENCE_45R,
         "reference_xp": REFERENCE_XP,
@@ -693,24 +1060,24 @@ def main():
         "reference_extreme_percentages": REFERENCE_EXTREME_PCTS,
         "reference_ma_percentages": REFERENCE_MA_PCTS,
         "reference_derived": REFERENCE_DERIVED,
-        "ma_breadth_cap_100": calculate_ma_breadth(snapshot, cap_floor=100.0),
+        "ma_breadth_cap_100": calculate_ma_breadth(panel, cap_floor=100.0),
         "ma_breadth_cap_100_calibrated_series": calculate_ma_breadth(
-            snapshot,
+            panel,
             cap_floor=100.0,
             allowed_symbols=calibrated_symbols,
         ),
-        "ma_breadth_cap_999": calculate_ma_breadth(snapshot),
+        "ma_breadth_cap_999": calculate_ma_breadth(panel),
         "xp_series_cap_100": xp_cap_100,
         "xp_output_calibration_cap_100": evaluate_xp_output_calibration(
             xp_cap_100
         ),
         "em_availability": evaluate_em_availability(),
         "xp_series_cap_100_ytd": calculate_xp_series(
-            snapshot,
+            panel,
             start_date="2026-01-01",
         ),
         "xp_series_cap_100_calibrated_series": calculate_xp_series(
-            snapshot,
+            panel,
             allowed_symbols=calibrated_symbols,
         ),
         "nse_bhavcopy_eq": calculate_nse_ratios(snapshot, nse_bhavcopy, {"EQ"}),
@@ -722,6 +1089,7 @@ def main():
         "nse_bhavcopy_all_series": calculate_nse_ratios(snapshot, nse_bhavcopy, None),
         "snapshot_fetched_at": snapshot["fetched_at"],
         "stock_histories": len(snapshot["stocks"]),
+        "calibration_mode": "optimizer" if optimize else "grid",
         "top_4_5r_candidates": ranked[:50],
     }
     save_json(REPORT_PATH, report, indent=2)
@@ -0,0 +1,82 @@
+"""Compare breadth methodology variants against the published methodology.
+
+Usage: python compare_breadth_methodologies.py [variants.json]
+
+The variants file is a JSON list of methodology overrides, for example
+``[{"version": "sma-4pct", "advance_threshold": 4.0}, {"version": "ema",
+"default_ma_type": "EMA"}]``.  Every variant is evaluated against one shared
+history panel per set of indicator windows.
+"""
+
+from dataclasses import replace
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+SRC_DIR = BASE_DIR / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from edl_pipeline.breadth.config import load_methodology
+from edl_pipeline.breadth.evaluation import evaluate_methodologies
+from edl_pipeline.features import FeatureCache
+from pipeline_utils import load_json
+
+
+UNIVERSE_FILE = BASE_DIR / "dhan_data_response.json"
+OHLCV_DIR = BASE_DIR / "ohlcv_data"
+INDEX_FILE = BASE_DIR / "indices_ohlcv_data" / "NIFTY.csv"
+METHODOLOGY_FILE = BASE_DIR / "breadth_methodology.json"
+VARIANTS_FILE = BASE_DIR / "breadth_methodology_variants.json"
+FEATURE_CACHE_DIR = BASE_DIR / "feature_cache"
+OUTPUT_DIR = BASE_DIR / "breadth_variants"
+REPORT_FILE = BASE_DIR / "breadth_methodology_comparison.json"
+
+
+def load_variants(baseline, path):
+    variants = [baseline]
+    for overrides in load_json(path):
+        if "ma_periods" in overrides:
+            overrides["ma_periods"] = tuple(overrides["ma_periods"])
+        variants.append(replace(baseline, **overrides))
+    return variants
+
+
+def main():
+    variants_file = Path(sys.argv[1]) if len(sys.argv) > 1 else VARIANTS_FILE
+    for path, hint in (
+        (UNIVERSE_FILE, "Run fetch_dhan_data.py first."),
+        (OHLCV_DIR, "Run fetch_all_ohlcv.py first."),
+        (INDEX_FILE, "Run fetch_indices_ohlcv.py first."),
+        (METHODOLOGY_FILE, ""),
+        (variants_file, "Pass a JSON list of methodology overrides."),
+    ):
+        if not path.exists():
+            print(f"Error: {path.name} is missing. {hint}".rstrip())
+            return False
+
+    baseline = load_methodology(METHODOLOGY_FILE)
+    methodologies = load_variants(baseline, variants_file)
+    print(f"Evaluating {len(methodologies)} breadth methodologies...")
+    artifacts, report = evaluate_methodologies(
+        load_json(UNIVERSE_FILE),
+        OHLCV_DIR,
+        INDEX_FILE,
+        methodologies,
+        output_dir=OUTPUT_DIR,
+        report_path=REPORT_FILE,
+        feature_cache=FeatureCache(FEATURE_CACHE_DIR, baseline),
+    )
+    for variant in report["variants"]:
+        latest = variant["latest"]
+        print(
+            f"  {variant['name']}: {variant['quality']['processed_symbols']} symbols | "
+            f"{latest['date']} 4.5R={latest['ratio_4_5']} XP={latest['xp']}"
+        )
+    print(f"Saved: {OUTPUT_DIR} ({len(artifacts)} variants)")
+    print(f"Saved: {REPORT_FILE}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
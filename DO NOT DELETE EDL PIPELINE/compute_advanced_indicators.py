@@ -0,0 +1,65 @@
+import random
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from edl_pipeline.config import env_int
+from edl_pipeline.features import OHLCV_DIR
+from edl_pipeline.reporting import print_symbol_errors
+from edl_pipeline.technical_indicators import PARITY_TOLERANCE_PCT, compute_indicators, parity_report
+from fetch_advanced_indicators import fetch_indicators
+from pipeline_utils import load_json, save_json
+
+# --- Configuration ---
+INPUT_FILE = "master_isin_map.json"
+OUTPUT_FILE = "advanced_indicator_data.json"
+PARITY_FILE = "advanced_indicator_parity.json"
+# Symbols to re-fetch from the live endpoint for the parity report; 0 disables it.
+PARITY_SAMPLE = 0
+
+
+def fetch_remote_sample(master_list, size, seed=0):
+    """Fetch live endpoint payloads for ``size`` random symbols with a Sid."""
+    candidates = [item for item in master_list if item.get("Sid")]
+    remote = {}
+    for item in random.Random(seed).sample(candidates, min(size, len(candidates))):
+        record = fetch_indicators(item)
+        if record:
+            remote[record["Symbol"]] = record
+    return remote
+
+
+def write_parity_report(master_list, payloads, sample_size):
+    remote = fetch_remote_sample(master_list, sample_size)
+    report = parity_report({record["Symbol"]: record for record in payloads}, remote)
+    save_json(PARITY_FILE, report)
+    print(f"Parity vs endpoint ({report['symbols_compared']} symbols) -> {PARITY_FILE}")
+    for name, field in report["fields"].items():
+        print(f"  {name}: {field['within_tolerance']}/{field['compared']} within {PARITY_TOLERANCE_PCT}%")
+    for name, field in report["actions"].items():
+        print(f"  {name} action: {field['matching']}/{field['compared']} matching")
+
+
+def main():
+    if not OHLCV_DIR.exists():
+        print("Error: ohlcv_data is missing. Run fetch_all_ohlcv.py first.")
+        return False
+
+    master_list = load_json(INPUT_FILE, default=[])
+    symbols = {item.get("Symbol") for item in master_list} if master_list else None
+    payloads, errors = compute_indicators(symbols=symbols)
+    save_json(OUTPUT_FILE, payloads)
+    print(f"Computed indicators for {len(payloads)} stocks locally ({len(errors)} failed) -> {OUTPUT_FILE}")
+    print_symbol_errors(errors)
+
+    sample_size = env_int("EDL_INDICATOR_PARITY_SAMPLE", PARITY_SAMPLE, minimum=0)
+    if sample_size:
+        write_parity_report(master_list, payloads, sample_size)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
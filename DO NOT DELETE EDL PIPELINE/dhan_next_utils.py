@@ -1,9 +1,23 @@
 import json
 import re
+import sys
+import time
+from pathlib import Path
 
 import requests
 
-from pipeline_utils import get_headers
+SRC_DIR = Path(__file__).resolve().parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from edl_pipeline.http_cache import cached_get
+from pipeline_utils import get_headers, load_json, resolve_path, save_json
+
+# Every rendered Dhan page carries the same build id, so one lookup serves all
+# Next.js fetchers in a run; a _next/data 404 means it rotated.
+BUILD_ID_FILE = "dhan_build_id.json"
+BUILD_ID_PAGE = "https://dhan.co/all-indices/"
+BUILD_ID_TTL_SECONDS = 3600
 
 
 def user_agent_headers():
@@ -20,12 +34,48 @@ def get_build_id(page_url):
         return None
 
 
+def resolve_build_id(page_url=BUILD_ID_PAGE, path=None, ttl_seconds=BUILD_ID_TTL_SECONDS):
+    """Return the build id cached by an earlier script, fetching ``page_url`` when missing or expired."""
+    path = path or BUILD_ID_FILE
+    cached = load_json(path, default={})
+    if isinstance(cached, dict) and cached.get("build_id"):
+        try:
+            age = time.time() - float(cached.get("resolved_at", 0))
+        except (TypeError, ValueError):
+            age = None
+        if age is not None and 0 <= age < ttl_seconds:
+            return cached["build_id"]
+
+    build_id = get_build_id(page_url)
+    if build_id:
+        save_json(path, {"build_id": build_id, "resolved_at": time.time(), "page_url": page_url})
+    return build_id
+
+
+def invalidate_build_id(build_id, path=None):
+    """Forget the cached build id if it is still ``build_id``."""
+    path = path or BUILD_ID_FILE
+    cached = load_json(path, default={})
+    if isinstance(cached, dict) and cached.get("build_id") == build_id:
+        resolve_path(path).unlink(missing_ok=True)
+
+
+def next_data_url(build_id, page_path):
+    return f"https://dhan.co/_next/data/{build_id}/{page_path}.json"
+
+
 def get_next_data(build_id, page_path, timeout=15):
+    """Fetch ``/_next/data`` JSON, retrying once with a fresh build id after a 404."""
     if not build_id:
         return {}
-    url = f"https://dhan.co/_next/data/{build_id}/{page_path}.json"
     try:
-        response = requests.get(url, headers=user_agent_headers(), timeout=timeout)
+        response = cached_get(next_data_url(build_id, page_path), headers=user_agent_headers(), timeout=timeout)
+        if response.status_code == 404:
+            invalidate_build_id(build_id)
+            fresh_id = resolve_build_id()
+            if not fresh_id or fresh_id == build_id:
+                return {}
+            response = cached_get(next_data_url(fresh_id, page_path), headers=user_agent_headers(), timeout=timeout)
         return response.json() if response.status_code == 200 else {}
     except Exception:
         return {}
@@ -35,7 +85,7 @@ def get_embedded_next_data(page_url, timeout=15):
     try:
         from bs4 import BeautifulSoup
 
-        response = requests.get(page_url, headers=user_agent_headers(), timeout=timeout)
+        response = cached_get(page_url, headers=user_agent_headers(), timeout=timeout)
         soup = BeautifulSoup(response.text, "html.parser")
         script = soup.find("script", id="__NEXT_DATA__")
         return json.loads(script.string) if script else {}
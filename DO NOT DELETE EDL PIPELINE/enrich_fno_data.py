@@ -10,7 +10,7 @@ import os
 import sys
 from datetime import datetime
 
-from dhan_next_utils import get_build_id, get_next_data
+from dhan_next_utils import get_next_data, resolve_build_id
 from pipeline_utils import BASE_DIR, load_json, save_json
 
 MASTER_JSON = os.path.join(BASE_DIR, "all_stocks_fundamental_analysis.json")
@@ -76,7 +76,7 @@ def main():
 
     # 3. Fetch lot sizes and expiry
     print("Fetching Dhan buildId...")
-    build_id = get_build_id(BUILD_ID_PAGE)
+    build_id = resolve_build_id(BUILD_ID_PAGE)
     print(f"  BuildId: {build_id}")
 
     print("Fetching F&O lot sizes...")
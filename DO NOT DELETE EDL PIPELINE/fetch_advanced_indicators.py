@@ -1,11 +1,19 @@
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 
+SRC_DIR = Path(__file__).resolve().parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from edl_pipeline.crawler import Endpoint
+from edl_pipeline.per_isin import crawl_items, crawl_succeeded
+from edl_pipeline.priority import sort_by_market_cap
 from pipeline_utils import load_json, post_json, save_json
 
 # --- Configuration ---
 INPUT_FILE = "master_isin_map.json"
 OUTPUT_FILE = "advanced_indicator_data.json"
+REPORT_FILE = "advanced_indicators_crawl_report.json"
 API_URL = "https://ow-static-scanx.dhan.co/staticscanx/indicator"
 MAX_THREADS = 50  # Fast parallel execution
 
@@ -45,29 +53,27 @@ def fetch_indicators(item):
 
 def main():
     try:
-        master_list = load_json(INPUT_FILE)
+        master_list = sort_by_market_cap(load_json(INPUT_FILE))
     except FileNotFoundError:
         print(f"Error: {INPUT_FILE} not found. Please run fetch_dhan_data.py first.")
         return False
 
     print(f"Starting advanced indicator fetch for {len(master_list)} stocks...")
-    all_results = []
-    
-    with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-        future_to_stock = {executor.submit(fetch_indicators, stock): stock for stock in master_list}
-        
-        completed = 0
-        for future in as_completed(future_to_stock):
-            res = future.result()
-            if res:
-                all_results.append(res)
-            completed += 1
-            if completed % 100 == 0:
-                print(f"Progress: {completed}/{len(master_list)} done.")
+    report = crawl_items([crawl_endpoint()], master_list, MAX_THREADS, REPORT_FILE, progress_every=100)
+    return crawl_succeeded(report)
 
+def save_indicators(all_results):
     save_json(OUTPUT_FILE, all_results)
     print(f"Successfully saved indicators for {len(all_results)} stocks to {OUTPUT_FILE}")
-    return True
+
+def crawl_endpoint():
+    """Register the indicator fetch with the shared per-ISIN crawler."""
+    return Endpoint(
+        "advanced_indicators",
+        fetch_indicators,
+        finish=lambda results: save_indicators([res for _item, res in results if res]),
+        max_concurrency=MAX_THREADS,
+    )
 
 if __name__ == "__main__":
     sys.exit(0 if main() else 1)
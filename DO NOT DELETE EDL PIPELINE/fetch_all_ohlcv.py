@@ -4,7 +4,13 @@ import sys
 import time
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 
+SRC_DIR = Path(__file__).resolve().parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from edl_pipeline.scanx_planner import LIVE_SNAPSHOT_QUERY, scanx_rows
 from ohlcv_utils import (
     chunk_history_range,
     merge_rows_by_date,
@@ -14,7 +20,7 @@ from ohlcv_utils import (
     symbol_csv_path,
     write_ohlcv_csv,
 )
-from pipeline_utils import ensure_dir, fetch_scanx_data, get_headers, load_json, resolve_path
+from pipeline_utils import ensure_dir, get_headers, load_json, resolve_path
 
 # --- Configuration ---
 INPUT_FILE = "dhan_data_response.json"
@@ -28,15 +34,8 @@ FETCH_ATTEMPTS = 3
 def get_live_snapshots():
     """Fetches live OHLCV snapshot for all stocks to fill in Today's gap."""
     print("Fetching live snapshots for stocks (Today's data)...")
-    payload = {
-        "data": {
-            "sort": "Volume", "sorder": "desc", "count": 5000,
-            "fields": ["Sym", "Open", "High", "Low", "Ltp", "Volume"],
-            "params": [{"field": "Exch", "op": "", "val": "NSE"}]
-        }
-    }
     try:
-        return {item["Sym"]: item for item in fetch_scanx_data(payload, timeout=15) if item.get("Sym")}
+        return {item["Sym"]: item for item in scanx_rows(LIVE_SNAPSHOT_QUERY, timeout=15) if item.get("Sym")}
     except Exception:
         pass
     return {}
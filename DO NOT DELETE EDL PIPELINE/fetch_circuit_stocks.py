@@ -1,7 +1,7 @@
 import requests
 import json
 from bs4 import BeautifulSoup
-from dhan_next_utils import get_build_id
+from dhan_next_utils import get_next_data, resolve_build_id
 
 BUILD_ID_PAGE = "https://dhan.co/all-indices/"
 
@@ -29,7 +29,7 @@ def fetch_circuit_stocks():
         "Content-Type": "application/json"
     }
 
-    build_id = get_build_id(BUILD_ID_PAGE)
+    build_id = resolve_build_id(BUILD_ID_PAGE)
 
     for filename, config in scans_config.items():
         print(f"Processing {filename}...")
@@ -70,10 +70,9 @@ def fetch_circuit_stocks():
         if not success and build_id:
             print(f"  Secondary Fetch: Next.js Direct JSON API...")
             try:
-                direct_url = f"https://dhan.co/_next/data/{build_id}/{config['web_key']}.json"
-                response = requests.get(direct_url, headers=headers, timeout=10)
-                if response.status_code == 200:
-                    page_props = response.json().get('pageProps', {})
+                data_json = get_next_data(build_id, config['web_key'], timeout=10)
+                if data_json:
+                    page_props = data_json.get('pageProps', {})
                     # The data structure might be nested in listData or mktData
                     def find_list(obj):
                         if isinstance(obj, list) and len(obj) > 3:
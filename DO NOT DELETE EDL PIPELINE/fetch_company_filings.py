@@ -1,27 +1,48 @@
 import sys
-import requests
-import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from pipeline_utils import ensure_dir, get_headers, load_json, resolve_path, save_json
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from edl_pipeline.batching import BatchEndpoint, BatchFetcher, batch_size
+from edl_pipeline.config import env_bool
+from edl_pipeline.crawler import Endpoint
+from edl_pipeline.per_isin import crawl_items, crawl_succeeded
+from edl_pipeline.priority import sort_by_market_cap
+from edl_pipeline.filing_classifier import filing_key
+from edl_pipeline.filings_store import FilingsStore
+from pipeline_utils import ensure_dir, get_headers, http_session, load_json, resolve_path, save_json
 
 # --- Configuration ---
 INPUT_FILE = "master_isin_map.json"
 OUTPUT_DIR = "company_filings"
+REPORT_FILE = "company_filings_crawl_report.json"
 LEGACY_URL = "https://ow-static-scanx.dhan.co/staticscanx/company_filings"
 LODR_URL = "https://ow-static-scanx.dhan.co/staticscanx/lodr"
 MAX_THREADS = 20  # Fast with 20 threads
 FORCE_UPDATE = True # Set to True to refresh all filings
+PAGE_SIZE = 100
+# Incremental mode (EDL_FILINGS_INCREMENTAL=1) pages in small steps from the
+# newest filing and stops at the first page that reaches the stored cursor.
+INCREMENTAL_PAGE_SIZE = 20
+MAX_STORED_FILINGS = 200
 
 
-def fetch_endpoint(url, isin, headers):
-    payload = {"data": {"isin": isin, "pg_no": 1, "count": 100}}
+def fetch_page(url, isin, headers, page=1, count=PAGE_SIZE):
+    """Return one page of filings, or None when the request fails."""
+    payload = {"data": {"isin": isin, "pg_no": page, "count": count}}
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
+        response = http_session().post(url, json=payload, headers=headers, timeout=10)
         if response.status_code == 200:
             return response.json().get("data", []) or []
     except Exception:
         pass
-    return []
+    return None
+
+
+def fetch_endpoint(url, isin, headers, page=1, count=PAGE_SIZE):
+    return fetch_page(url, isin, headers, page, count) or []
 
 
 def dedupe_filings(items):
@@ -39,7 +60,66 @@ def dedupe_filings(items):
     final_list.sort(key=lambda x: x.get("news_date", "1900-01-01"), reverse=True)
     return final_list
 
-def fetch_filings(item):
+def reached_cursor(entry, known_keys, cursor_date):
+    """True once paging has reached a filing stored by an earlier run."""
+    if str(filing_key(entry)) in known_keys:
+        return True
+    return bool(cursor_date) and (entry.get("news_date") or "") < cursor_date
+
+
+def fetch_new_filings(url, isin, headers, known_keys, cursor_date):
+    """Page newest-first until a page reaches the cursor or the full depth.
+
+    Returns None when a page fails, so an error is not mistaken for no news.
+    """
+    items = []
+    for page in range(1, PAGE_SIZE // INCREMENTAL_PAGE_SIZE + 1):
+        batch = fetch_page(url, isin, headers, page, INCREMENTAL_PAGE_SIZE)
+        if batch is None:
+            return None
+        items.extend(batch)
+        if len(batch) < INCREMENTAL_PAGE_SIZE or any(reached_cursor(entry, known_keys, cursor_date) for entry in batch):
+            break
+    return items
+
+
+def save_if_changed(output_path, final_list):
+    """Write the filings file unless it already holds ``final_list``."""
+    if output_path.exists():
+        try:
+            if load_json(output_path).get("data") == final_list:
+                return False
+        except Exception:
+            pass
+    save_json(output_path, {"code": 0, "data": final_list})
+    return True
+
+
+def batch_endpoint(url, name):
+    """Describe ``url`` for the multi-ISIN probe; a batch returns PAGE_SIZE rows per ISIN."""
+    return BatchEndpoint(
+        name,
+        url,
+        batch_payload=lambda isins: {"data": {"isins": isins, "pg_no": 1, "count": PAGE_SIZE * len(isins)}},
+        single=lambda isin: fetch_endpoint(url, isin, get_headers()),
+        row_limit=lambda isins: PAGE_SIZE * len(isins),
+    )
+
+
+def prefetch_batched(stock_list):
+    """Return ``{isin: (legacy rows, lodr rows)}`` using multi-ISIN requests where allowed."""
+    isins = [item["ISIN"] for item in stock_list if item.get("ISIN")]
+    fetched = []
+    for name, url in (("company_filings", LEGACY_URL), ("lodr_filings", LODR_URL)):
+        endpoint = batch_endpoint(url, name)
+        fetcher = BatchFetcher(endpoint, batch_size(endpoint, isins), workers=MAX_THREADS)
+        fetched.append(fetcher.fetch_many(isins))
+        print(f"{name}: batch size {fetcher.size} | {fetcher.stats}")
+    legacy, lodr = fetched
+    return {isin: (legacy.get(isin, []), lodr.get(isin, [])) for isin in isins}
+
+
+def fetch_filings(item, store=None, incremental=False, prefetched=None):
     symbol = item.get("Symbol")
     isin = item.get("ISIN")
     
@@ -53,53 +133,81 @@ def fetch_filings(item):
         return "skipped"
 
     headers = get_headers()
-    final_list = dedupe_filings(
-        fetch_endpoint(LEGACY_URL, isin, headers) + fetch_endpoint(LODR_URL, isin, headers)
-    )
+    cursor = store.cursor(isin) if incremental and store is not None else None
+    known_keys = store.known_keys(symbol) if cursor is not None else set()
+    if cursor is not None and known_keys:
+        legacy = fetch_new_filings(LEGACY_URL, isin, headers, known_keys, cursor["news_date"])
+        lodr = fetch_new_filings(LODR_URL, isin, headers, known_keys, cursor["news_date"])
+        if legacy is None or lodr is None:
+            return "error"
+        fetched = legacy + lodr
+        stored = store.filings(symbol)
+        if not any(str(filing_key(entry)) not in known_keys for entry in fetched):
+            save_if_changed(output_path, stored)
+            return "unchanged"
+        final_list = dedupe_filings(fetched + stored)[:MAX_STORED_FILINGS]
+    elif prefetched is not None:
+        final_list = dedupe_filings(prefetched[0] + prefetched[1])
+    else:
+        final_list = dedupe_filings(
+            fetch_endpoint(LEGACY_URL, isin, headers) + fetch_endpoint(LODR_URL, isin, headers)
+        )
 
     if not final_list:
         return "empty"
 
-    save_json(output_path, {"code": 0, "data": final_list})
-    return "success"
+    changed = save_if_changed(output_path, final_list)
+    if store is not None:
+        store.replace_symbol(symbol, final_list, isin)
+    return "success" if changed else "unchanged"
+
+def crawl_endpoint():
+    """Register the filings fetch with the shared per-ISIN crawler."""
+    ensure_dir(OUTPUT_DIR)
+    store = FilingsStore()
+    incremental = env_bool("EDL_FILINGS_INCREMENTAL", False)
+    return Endpoint(
+        "company_filings",
+        lambda item: fetch_filings(item, store, incremental),
+        max_concurrency=MAX_THREADS,
+    )
 
 def main():
     ensure_dir(OUTPUT_DIR)
 
     print(f"Loading ISIN mapping from {INPUT_FILE}...")
     try:
-        stock_list = load_json(INPUT_FILE)
+        stock_list = sort_by_market_cap(load_json(INPUT_FILE))
     except Exception as e:
         print(f"Error: Could not load {INPUT_FILE}: {e}")
         return False
 
     total = len(stock_list)
     print(f"Starting Multi-threaded Filing Fetch (Threads: {MAX_THREADS}) for {total} stocks...")
-    
-    success_count = 0
-    skipped_count = 0
-    error_count = 0
-    start_time = time.time()
-
-    with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-        future_to_stock = {executor.submit(fetch_filings, item): item["Symbol"] for item in stock_list}
-        
-        count = 0
-        for future in as_completed(future_to_stock):
-            count += 1
-            res = future.result()
-            if res == "success": success_count += 1
-            elif res == "skipped": skipped_count += 1
-            else: error_count += 1
-
-            if count % 100 == 0 or count == total:
-                elapsed = time.time() - start_time
-                print(f"[{count}/{total}] | Success: {success_count} | Skipped: {skipped_count} | Errors: {error_count} | Elapsed: {elapsed:.1f}s")
 
+    store = FilingsStore()
+    incremental = env_bool("EDL_FILINGS_INCREMENTAL", False)
+    if incremental:
+        print("Incremental mode: fetching only filings newer than each ISIN's stored cursor.")
+    # Batched prefetch replaces the full per-ISIN fetch; incremental paging stays per ISIN.
+    prefetched = {}
+    if env_bool("EDL_ISIN_BATCHING", False) and not incremental:
+        prefetched = prefetch_batched(stock_list)
+    endpoint = Endpoint(
+        "company_filings",
+        lambda item: fetch_filings(item, store, incremental, prefetched.get(item.get("ISIN"))),
+        max_concurrency=MAX_THREADS,
+    )
+    report = crawl_items([endpoint], stock_list, MAX_THREADS, REPORT_FILE, progress_every=100)
+
+    statuses = report.statuses["company_filings"]
     print("\n--- Final Report ---")
-    print(f"Total Time: {time.time() - start_time:.1f}s")
-    print(f"Finished: {success_count} | Errors: {error_count} | Skipped: {skipped_count}")
-    return True
+    print(f"Total Time: {report.elapsed:.1f}s")
+    print(
+        f"Finished: {statuses['success']} | Unchanged: {statuses['unchanged']} | "
+        f"Empty: {statuses['empty']} | Errors: {statuses['error']} | Skipped: {statuses['skipped']}"
+    )
+    return crawl_succeeded(report)
 
 if __name__ == "__main__":
     sys.exit(0 if main() else 1)
@@ -1,21 +1,21 @@
 import sys
+from pathlib import Path
 
-from pipeline_utils import SCANX_FETCH_URL, fetch_scanx_data, resolve_path, save_json
+SRC_DIR = Path(__file__).resolve().parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
 
+from edl_pipeline.config import env_bool
+from edl_pipeline.scanx_planner import DASHBOARD_FULL_QUERY, DASHBOARD_QUERY, scanx_rows
+from pipeline_utils import SCANX_FETCH_URL, resolve_path, save_json
 
-DASHBOARD_FIELDS = [
-    "Isin", "DispSym", "Mcap", "Pe", "DivYeild", "Revenue", "Year1RevenueGrowth", "NetProfitMargin",
-    "YoYLastQtrlyProfitGrowth", "EBIDTAMargin", "volume", "PricePerchng1year", "PricePerchng3year",
-    "PricePerchng5year", "Ind_Pe", "Pb", "DivYeild", "Eps", "DaySMA10CurrentCandle", "DaySMA20CurrentCandle",
-    "DaySMA50CurrentCandle", "DaySMA200CurrentCandle",
-    "DayRSI14CurrentCandle", "ROCE", "Ltp", "Roe", "RtAwayFrom5YearHigh", "RtAwayFrom1MonthHigh",
-    "High5yr", "High3Yr", "High1Yr", "High1Wk", "Sym", "PricePerchng1mon", "PricePerchng1week",
-    "PricePerchng3mon", "YearlyEarningPerShare", "OCFGrowthOnYr", "Year1CAGREPSGrowth", "NetChangeInCash",
-    "FreeCashFlow", "PricePerchng2week", "DayBbUpper_Sub_BbLower", "DayATR14CurrentCandleMul_2",
-    "Min5HighCurrentCandle", "Min15HighCurrentCandle", "Min5EMA50CurrentCandle", "Min15EMA50CurrentCandle",
-    "Min15SMA100CurrentCandle", "Open", "High", "Low", "Volume", "BcClose", "Rmp", "PledgeBenefit",
-    "PricePerchng6mon", "Sector", "TotalShares", "ShareCapital", "Exch", "Inst", "Seg", "idxlist", "Sid", "FnoFlag"
-]
+
+DASHBOARD_FIELDS = list(DASHBOARD_QUERY.fields)
+
+
+def dashboard_query():
+    """The projected query, or every catalogue field with ``EDL_SCANX_ALL_FIELDS=1``."""
+    return DASHBOARD_FULL_QUERY if env_bool("EDL_SCANX_ALL_FIELDS", False) else DASHBOARD_QUERY
 
 
 def build_master_map(stocks):
@@ -40,27 +40,9 @@ def fetch_all_dhan_data():
     output_file = resolve_path("dhan_data_response.json")
     master_map_file = resolve_path("master_isin_map.json")
 
-    # Payload as specified by the user
-    # Trying a large count to get "all available" in one call as requested
-    payload = {
-        "data": {
-            "sort": "Mcap",
-            "sorder": "desc",
-            "count": 5000, # Large count to try and get everything
-            "fields": DASHBOARD_FIELDS,
-            "params": [
-                {"field": "OgInst", "op": "", "val": "ES"},
-                {"field": "Exch", "op": "", "val": "NSE"}
-            ],
-            "pgno": 0,
-            "sorder": "desc",
-            "sort": "Mcap"
-        }
-    }
-
     print(f"Fetching data from {SCANX_FETCH_URL}...")
     try:
-        cleaned_data = fetch_scanx_data(payload, timeout=30)
+        cleaned_data = scanx_rows(dashboard_query(), timeout=30)
 
         if cleaned_data:
             save_json(output_file, cleaned_data)
@@ -1,6 +1,6 @@
 import sys
 
-from dhan_next_utils import get_build_id, get_embedded_next_data, get_next_data
+from dhan_next_utils import get_embedded_next_data, get_next_data, resolve_build_id
 from pipeline_utils import save_json
 
 
@@ -40,7 +40,7 @@ def flatten_expiry_data(expiry_data_raw):
     return flattened_data
 
 def fetch_fno_expiry_calendar():
-    build_id = get_build_id(BUILD_ID_PAGE)
+    build_id = resolve_build_id(BUILD_ID_PAGE)
     if not build_id:
         print("Could not find dynamic buildId. Falling back to static extraction...")
 
@@ -1,6 +1,6 @@
 import sys
 
-from dhan_next_utils import find_nested_list, get_build_id, get_embedded_next_data, get_next_data
+from dhan_next_utils import find_nested_list, get_embedded_next_data, get_next_data, resolve_build_id
 from pipeline_utils import save_json
 
 
@@ -39,7 +39,7 @@ def clean_lot_size_item(item):
     return entry
 
 def fetch_fno_lot_sizes():
-    build_id = get_build_id(PAGE_URL)
+    build_id = resolve_build_id(PAGE_URL)
 
     print(f"Primary Fetch: Direct JSON via Next.js Data API...")
     try:
@@ -1,9 +1,29 @@
+import gzip
+import hashlib
+import json
+import os
 import sys
 import time
+from datetime import datetime, timedelta
+from pathlib import Path
 
 import requests
 
-from pipeline_utils import chunked, get_headers, load_json, save_json
+SRC_DIR = Path(__file__).resolve().parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from edl_pipeline.config import env_int
+from edl_pipeline.filings_store import open_filings_store
+from edl_pipeline.fundamentals_index import FUNDAMENTALS_INDEX_FILE, write_fundamentals_index
+from pipeline_utils import (
+    atomic_replace_bytes,
+    chunked,
+    get_headers,
+    load_json,
+    resolve_path,
+    save_json,
+)
 
 
 MASTER_MAP_FILE = "master_isin_map.json"
@@ -12,6 +32,14 @@ OUTPUT_FILE = "fundamental_data.json"
 BATCH_SIZE = 100
 REQUEST_DELAY_SECONDS = 0.5
 
+# Survives intermediate cleanup so targeted runs can reuse unchanged records.
+CACHE_FILE = "fundamentals_cache.json.gz"
+CACHE_VERSION = 1
+REFRESH_MODES = ("full", "targeted")
+ANNOUNCEMENTS_FILE = "all_company_announcements.json"
+CORPORATE_ACTION_FILES = ("upcoming_corporate_actions.json", "history_corporate_actions.json")
+RESULTS_ACTION_TYPE = "QUARTERLY RESULT ANNOUNCEMENT"
+
 
 def build_isin_lookup(master_map):
     return {
@@ -28,39 +56,169 @@ def attach_symbol_metadata(rows, isin_lookup):
             item.update(metadata)
     return rows
 
-def fetch_fundamental_data():
-    headers = get_headers()
 
-    # 1. Load ISINs from Master Map
+def refresh_mode():
+    """Return ``EDL_FUNDAMENTALS_MODE``: ``full`` (default) or ``targeted``."""
+    value = (os.getenv("EDL_FUNDAMENTALS_MODE") or "full").strip().lower()
+    if value not in REFRESH_MODES:
+        print(f"  WARNING: Ignoring invalid EDL_FUNDAMENTALS_MODE={value!r}; using full.")
+        return "full"
+    return value
+
+
+def record_digest(row):
+    """Hash one upstream record, ignoring the symbol metadata attached locally."""
+    content = {key: value for key, value in row.items() if key not in ("Symbol", "Name")}
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_cache(path=CACHE_FILE):
     try:
-        master_map = load_json(MASTER_MAP_FILE)
-    except FileNotFoundError:
-        print(f"Error: {MASTER_MAP_FILE} not found. Please run 'fetch_dhan_data.py' first.")
-        return False
+        with gzip.open(resolve_path(path), "rt", encoding="utf-8") as handle:
+            cache = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("records", {})
 
-    isin_lookup = build_isin_lookup(master_map)
-    all_isins = list(isin_lookup.keys())
-    total_isins = len(all_isins)
-    print(f"Loaded {total_isins} ISINs from master map.")
 
-    all_fundamental_data = []
-    
-    for start_index, batch_isins in chunked(all_isins, BATCH_SIZE):
+def save_cache(records, path=CACHE_FILE):
+    payload = json.dumps({"version": CACHE_VERSION, "records": records}).encode("utf-8")
+    atomic_replace_bytes(path, gzip.compress(payload, compresslevel=6))
+
+
+def update_cache(cache, rows, today):
+    """Fold fetched rows into ``cache`` and return how many changed content."""
+    changed = 0
+    for row in rows:
+        isin = row.get("isin")
+        if not isin:
+            continue
+        digest = record_digest(row)
+        previous = cache.get(isin)
+        if previous is None or previous.get("sha256") != digest:
+            changed += 1
+            changed_at = today
+        else:
+            changed_at = previous.get("changed_at", today)
+        cache[isin] = {
+            "sha256": digest,
+            "fetched_at": today,
+            "changed_at": changed_at,
+            "data": {key: value for key, value in row.items() if key not in ("Symbol", "Name")},
+        }
+    return changed
+
+
+def _in_window(date_text, start, end):
+    return bool(date_text) and start <= str(date_text)[:10] <= end
+
+
+def load_result_actions(start, end):
+    """Return corporate actions from the local calendars, or fetch the window.
+
+    Phase 1 runs before ``fetch_corporate_actions.py`` and intermediate cleanup
+    removes the calendars, so a missing pair costs one small scan request.
+    """
+    paths = [resolve_path(filename) for filename in CORPORATE_ACTION_FILES]
+    if any(path.exists() for path in paths):
+        return [action for path in paths if path.exists() for action in load_json(path, default=[]) or []]
+    try:
+        from fetch_corporate_actions import fetch_actions
+
+        return fetch_actions(start, end)
+    except Exception as e:
+        print(f"  WARNING: Could not fetch result dates: {e}")
+        return []
+
+
+def results_trigger_symbols(today, lookback_days, lookahead_days=0, store=None):
+    """Return symbols with recent results filings, announcements, or result dates.
+
+    Results filings come from the persistent ``filings_store.sqlite``, which
+    still holds the previous runs' filings in Phase 1 and after cleanup.  The
+    announcement feed is read when a run left it behind.  Quarterly result
+    dates count from the lookback window up to ``lookahead_days`` ahead, so
+    a board meeting due in the next days is refreshed without waiting for
+    its filing.
+    """
+    current = datetime.strptime(today, "%Y-%m-%d")
+    start = (current - timedelta(days=lookback_days)).strftime("%Y-%m-%d")
+    end = (current + timedelta(days=lookahead_days)).strftime("%Y-%m-%d")
+    symbols = set()
+
+    if store is None:
+        store = open_filings_store()
+    if store is not None:
+        symbols.update(
+            symbol
+            for symbol, news_date in store.latest_results(since=start).items()
+            if _in_window(news_date, start, today)
+        )
+
+    for announcement in load_json(ANNOUNCEMENTS_FILE, default=[]) or []:
+        event_text = (announcement.get("Event") or "").lower()
+        if (
+            announcement.get("Type") == "Results Update" or "results are out" in event_text
+        ) and _in_window(announcement.get("Date"), start, today):
+            symbols.add(announcement.get("Symbol"))
+
+    for action in load_result_actions(start, end):
+        if action.get("Type") == RESULTS_ACTION_TYPE and _in_window(action.get("ExDate"), start, end):
+            symbols.add(action.get("Symbol"))
+
+    symbols.discard(None)
+    return symbols
+
+
+def sweep_bucket(isin, sweep_days):
+    return int(hashlib.sha1(isin.encode("utf-8")).hexdigest()[:8], 16) % sweep_days
+
+
+def plan_refresh(isin_lookup, cache, today, trigger_symbols, sweep_days):
+    """Return ``{isin: reason}`` for every ISIN a targeted run should refetch.
+
+    Reasons are ``new`` (not cached), ``results`` (a recent or due results
+    event), ``stale`` (not fetched for two sweep cycles), and ``sweep`` (the
+    ISIN's rotating slot is today, so every ISIN is revisited once per
+    ``sweep_days``).
+    """
+    today_date = datetime.strptime(today, "%Y-%m-%d")
+    stale_before = (today_date - timedelta(days=2 * sweep_days)).strftime("%Y-%m-%d")
+    slot = today_date.toordinal() % sweep_days
+    plan = {}
+    for isin, metadata in isin_lookup.items():
+        cached = cache.get(isin)
+        if cached is None:
+            plan[isin] = "new"
+        elif metadata.get("Symbol") in trigger_symbols:
+            plan[isin] = "results"
+        elif cached.get("fetched_at", "") < stale_before:
+            plan[isin] = "stale"
+        elif sweep_bucket(isin, sweep_days) == slot:
+            plan[isin] = "sweep"
+    return plan
+
+
+def fetch_batches(isins, headers):
+    rows = []
+    for start_index, batch_isins in chunked(isins, BATCH_SIZE):
         batch_number = start_index // BATCH_SIZE + 1
         end_index = start_index + len(batch_isins)
         print(f"Fetching batch {batch_number}: {len(batch_isins)} ISINs ({start_index}-{end_index})...")
         payload = {"data": {"isins": batch_isins}}
-        
+
         try:
             response = requests.post(API_URL, json=payload, headers=headers, timeout=30)
-            
+
             if response.status_code == 200:
                 data = response.json()
-                
+
                 if data.get('status') == 'success':
                     batch_results = data.get('data', [])
                     if batch_results:
-                        all_fundamental_data.extend(attach_symbol_metadata(batch_results, isin_lookup))
+                        rows.extend(batch_results)
                         print(f"  Success: Received {len(batch_results)} records.")
                     else:
                         print("  Warning: No data returned for this batch.")
@@ -68,16 +226,74 @@ def fetch_fundamental_data():
                     print(f"  API Error: {data.get('message')}")
             else:
                 print(f"  HTTP Error: {response.status_code}")
-                
+
         except Exception as e:
             print(f"  Exception fetching batch: {e}")
-            
+
         time.sleep(REQUEST_DELAY_SECONDS)
+    return rows
+
+
+def fetch_fundamental_data(mode=None, today=None):
+    headers = get_headers()
+    mode = mode or refresh_mode()
+    today = today or datetime.now().strftime("%Y-%m-%d")
+
+    # 1. Load ISINs from Master Map
+    try:
+        master_map = load_json(MASTER_MAP_FILE)
+    except FileNotFoundError:
+        print(f"Error: {MASTER_MAP_FILE} not found. Please run 'fetch_dhan_data.py' first.")
+        return False
+
+    isin_lookup = build_isin_lookup(master_map)
+    all_isins = list(isin_lookup.keys())
+    total_isins = len(all_isins)
+    print(f"Loaded {total_isins} ISINs from master map.")
+
+    # 2. Decide what to fetch
+    cache = load_cache()
+    if mode == "targeted":
+        sweep_days = env_int("EDL_FUNDAMENTALS_SWEEP_DAYS", 30, minimum=1)
+        lookback_days = env_int("EDL_FUNDAMENTALS_RESULTS_LOOKBACK_DAYS", 3, minimum=0)
+        lookahead_days = env_int("EDL_FUNDAMENTALS_RESULTS_LOOKAHEAD_DAYS", 2, minimum=0)
+        plan = plan_refresh(
+            isin_lookup,
+            cache,
+            today,
+            results_trigger_symbols(today, lookback_days, lookahead_days),
+            sweep_days,
+        )
+        reasons = {reason: sum(1 for value in plan.values() if value == reason) for reason in ("new", "results", "stale", "sweep")}
+        print(
+            f"Targeted refresh: {len(plan)}/{total_isins} ISINs "
+            + " | ".join(f"{reason}: {count}" for reason, count in reasons.items())
+        )
+        fetch_isins = [isin for isin in all_isins if isin in plan]
+    else:
+        fetch_isins = all_isins
+
+    fetched = fetch_batches(fetch_isins, headers)
+    changed = update_cache(cache, fetched, today)
+    if fetched:
+        save_cache(cache)
+        print(f"Fundamentals cache: {len(fetched)} refetched | {changed} changed")
+
+    if mode == "targeted":
+        all_fundamental_data = [dict(cache[isin]["data"]) for isin in all_isins if isin in cache]
+    else:
+        all_fundamental_data = fetched
+    attach_symbol_metadata(all_fundamental_data, isin_lookup)
 
     # 3. Save Consolidated Data
     if all_fundamental_data:
         save_json(OUTPUT_FILE, all_fundamental_data)
         print(f"\nSuccessfully saved fundamental data for {len(all_fundamental_data)} securities to {OUTPUT_FILE}")
+        try:
+            indexed = write_fundamentals_index(all_fundamental_data)
+            print(f"Indexed {indexed} records in {FUNDAMENTALS_INDEX_FILE.name}")
+        except Exception as e:
+            print(f"  WARNING: Could not write {FUNDAMENTALS_INDEX_FILE.name}: {e}")
         return True
 
     print("\nFailed to fetch any fundamental data.")
@@ -1,19 +1,72 @@
 import sys
-import requests
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from pipeline_utils import ensure_dir, get_headers, load_json, resolve_path, save_json
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from edl_pipeline.config import env_bool, env_int
+from edl_pipeline.crawler import Endpoint
+from edl_pipeline.per_isin import crawl_items, crawl_succeeded
+from edl_pipeline.priority import sort_by_market_cap
+from edl_pipeline.news_store import NewsStore, publish_timestamp
+from pipeline_utils import ensure_dir, get_headers, http_session, load_json, resolve_path, save_json
 
 # --- Configuration ---
 INPUT_FILE = "master_isin_map.json"
 OUTPUT_DIR = "market_news"
+REPORT_FILE = "market_news_crawl_report.json"
 API_URL = "https://news-live.dhan.co/v2/news/getLiveNews"
 MAX_THREADS = 15  # 15 threads to be safe with this API
 NEWS_LIMIT = 50   # User requested 50 news items per stock
+NEWS_RETENTION_DAYS = 30
+
+def build_payload(isin, since=0):
+    return {
+        "categories": ["ALL"],
+        "page_no": 0,
+        "limit": NEWS_LIMIT,
+        "first_news_timeStamp": since,
+        "last_news_timeStamp": 0,
+        "news_feed_type": "live",
+        "stock_list": [isin],
+        "entity_id": ""
+    }
+
+def process_news_items(news_items):
+    """Clean and structure the raw news items."""
+    processed_news = []
+    for news in news_items:
+        news_obj = news.get("news_object", {})
+        processed_news.append({
+            "Title": news_obj.get("title", ""),
+            "Summary": news_obj.get("text", ""),
+            "Sentiment": news_obj.get("overall_sentiment", "neutral"),
+            "PublishDate": news.get("publish_date", 0),
+            "Source": news.get("category", "")
+        })
+    return processed_news
 
-def fetch_market_news(item):
+def sync_news_log(store, symbol, isin, output_path, processed_news, cursor, retention_days):
+    """Append new items to the rolling log and rewrite the file only when it changed."""
+    if cursor is not None:
+        processed_news = [news for news in processed_news if publish_timestamp(news) >= cursor]
+    added = store.append(isin, symbol, processed_news, retention_days)
+    if not added and output_path.exists():
+        return "unchanged"
+    news_log = store.news(isin)
+    if not news_log:
+        return "empty"
+    save_json(output_path, {"Symbol": symbol, "ISIN": isin, "News": news_log})
+    return "success" if added else "unchanged"
+
+def fetch_market_news(item, store=None, retention_days=NEWS_RETENTION_DAYS):
     """
     Fetches the last 50 market news items for a specific ISIN.
+
+    With a ``NewsStore``, only items newer than the ISIN's cursor are
+    requested and merged into its rolling news log.
     """
     symbol = item.get("Symbol")
     isin = item.get("ISIN")
@@ -22,43 +75,22 @@ def fetch_market_news(item):
         return None
         
     output_path = resolve_path(OUTPUT_DIR) / f"{symbol}_news.json"
-    
-    # Simple check to skip if recently fetched (optional, can be removed for full freshness)
-    # For now, we fetch fresh every time as news updates frequently
-    
-    payload = {
-        "categories": ["ALL"],
-        "page_no": 0,
-        "limit": NEWS_LIMIT,
-        "first_news_timeStamp": 0,
-        "last_news_timeStamp": 0,
-        "news_feed_type": "live",
-        "stock_list": [isin],
-        "entity_id": ""
-    }
+    cursor = store.cursor(isin) if store is not None else None
+    payload = build_payload(isin, cursor or 0)
     
     headers = get_headers()
     
     try:
-        response = requests.post(API_URL, json=payload, headers=headers, timeout=10)
+        response = http_session().post(API_URL, json=payload, headers=headers, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
-            news_items = data.get("data", {}).get("latest_news", [])
+            processed_news = process_news_items(data.get("data", {}).get("latest_news", []) or [])
+
+            if store is not None:
+                return sync_news_log(store, symbol, isin, output_path, processed_news, cursor, retention_days)
             
-            if news_items:
-                # Clean and structure the news items
-                processed_news = []
-                for news in news_items:
-                    news_obj = news.get("news_object", {})
-                    processed_news.append({
-                        "Title": news_obj.get("title", ""),
-                        "Summary": news_obj.get("text", ""),
-                        "Sentiment": news_obj.get("overall_sentiment", "neutral"),
-                        "PublishDate": news.get("publish_date", 0),
-                        "Source": news.get("category", "")
-                    })
-                
+            if processed_news:
                 save_json(output_path, {"Symbol": symbol, "ISIN": isin, "News": processed_news})
                 return "success"
             else:
@@ -72,10 +104,21 @@ def fetch_market_news(item):
     except Exception as e:
         return "error"
 
+def crawl_endpoint():
+    """Register the news fetch with the shared per-ISIN crawler."""
+    ensure_dir(OUTPUT_DIR)
+    store = NewsStore() if env_bool("EDL_NEWS_INCREMENTAL", False) else None
+    retention_days = env_int("EDL_NEWS_RETENTION_DAYS", NEWS_RETENTION_DAYS, minimum=1)
+    return Endpoint(
+        "market_news",
+        lambda item: fetch_market_news(item, store, retention_days),
+        max_concurrency=MAX_THREADS,
+    )
+
 def main():
     print(f"Loading ISIN mapping from {INPUT_FILE}...")
     try:
-        stock_list = load_json(INPUT_FILE)
+        stock_list = sort_by_market_cap(load_json(INPUT_FILE))
     except Exception as e:
         print(f"Error: Could not load {INPUT_FILE}: {e}")
         return False
@@ -85,32 +128,21 @@ def main():
     total = len(stock_list)
     print(f"Starting Market News Fetch (Limit: {NEWS_LIMIT} items) for {total} stocks...")
     
-    success_count = 0
-    empty_count = 0
-    error_count = 0
-    start_time = time.time()
-
-    with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-        future_to_stock = {executor.submit(fetch_market_news, item): item["Symbol"] for item in stock_list}
-        
-        count = 0
-        for future in as_completed(future_to_stock):
-            count += 1
-            res = future.result()
-            
-            if res == "success": success_count += 1
-            elif res == "empty": empty_count += 1
-            else: error_count += 1
-            
-            if count % 50 == 0 or count == total:
-                elapsed = time.time() - start_time
-                print(f"[{count}/{total}] | Success: {success_count} | Empty: {empty_count} | Errors: {error_count} | Elapsed: {elapsed:.1f}s")
+    if env_bool("EDL_NEWS_INCREMENTAL", False):
+        retention_days = env_int("EDL_NEWS_RETENTION_DAYS", NEWS_RETENTION_DAYS, minimum=1)
+        print(f"Incremental mode: syncing items newer than each ISIN's cursor ({retention_days}-day log).")
+    report = crawl_items([crawl_endpoint()], stock_list, MAX_THREADS, REPORT_FILE, progress_every=50)
 
+    statuses = report.statuses["market_news"]
+    errors = sum(statuses.values()) - statuses["success"] - statuses["unchanged"] - statuses["empty"]
     print("\n--- Final Report ---")
-    print(f"Total Time: {time.time() - start_time:.1f}s")
-    print(f"News Found: {success_count} stocks | No News: {empty_count} | Errors: {error_count}")
+    print(f"Total Time: {report.elapsed:.1f}s")
+    print(
+        f"News Found: {statuses['success']} stocks | Unchanged: {statuses['unchanged']} | "
+        f"No News: {statuses['empty']} | Errors: {errors}"
+    )
     print(f"Data saved to: {resolve_path(OUTPUT_DIR)}/")
-    return True
+    return crawl_succeeded(report)
 
 if __name__ == "__main__":
     sys.exit(0 if main() else 1)
@@ -1,66 +1,101 @@
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 
+SRC_DIR = Path(__file__).resolve().parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from edl_pipeline.batching import BatchEndpoint, BatchFetcher, batch_size
+from edl_pipeline.config import env_bool
+from edl_pipeline.crawler import Endpoint
+from edl_pipeline.per_isin import crawl_items, crawl_succeeded
+from edl_pipeline.priority import sort_by_market_cap
 from pipeline_utils import load_json, post_json, save_json
 
 # --- Configuration ---
 INPUT_FILE = "master_isin_map.json"
 OUTPUT_FILE = "all_company_announcements.json"
+REPORT_FILE = "announcements_crawl_report.json"
 API_URL = "https://ow-static-scanx.dhan.co/staticscanx/announcements"
 MAX_THREADS = 40  # Faster for small payloads
+# Rows a batch request asks for per ISIN; a batch that fills them may be truncated.
+BATCH_ROWS_PER_ISIN = 100
+
+def fetch_announcement_rows(isin):
+    """Fetch the raw announcement rows for a single ISIN"""
+    try:
+        announcements = post_json(API_URL, {"data": {"isin": isin}}, timeout=10).get("data")
+    except Exception:
+        return []
+    return announcements if isinstance(announcements, list) else []
+
+def announcement_records(item, announcements):
+    if not announcements:
+        return None
+    return [
+        {
+            "Symbol": item.get("Symbol"),
+            "Name": item.get("Name"),
+            "Event": ann.get("events"),
+            "Date": ann.get("date"),
+            "Type": ann.get("type")
+        } for ann in announcements
+    ]
 
 def fetch_announcements(item):
     """Fetch announcements for a single ISIN"""
-    symbol = item.get("Symbol")
-    isin = item.get("ISIN")
-    name = item.get("Name")
+    return announcement_records(item, fetch_announcement_rows(item.get("ISIN")))
 
-    payload = {"data": {"isin": isin}}
+BATCH_ENDPOINT = BatchEndpoint(
+    "announcements",
+    API_URL,
+    batch_payload=lambda isins: {"data": {"isins": isins, "count": BATCH_ROWS_PER_ISIN * len(isins)}},
+    single=fetch_announcement_rows,
+    row_limit=lambda isins: BATCH_ROWS_PER_ISIN * len(isins),
+)
 
-    try:
-        announcements = post_json(API_URL, payload, timeout=10).get("data")
-        if announcements and isinstance(announcements, list):
-            return [
-                {
-                    "Symbol": symbol,
-                    "Name": name,
-                    "Event": ann.get("events"),
-                    "Date": ann.get("date"),
-                    "Type": ann.get("type")
-                } for ann in announcements
-            ]
-        return None
-    except Exception:
-        return None
+def fetch_batched(master_list):
+    """Fetch every stock's announcements with multi-ISIN requests where the endpoint allows."""
+    isins = [item["ISIN"] for item in master_list if item.get("ISIN")]
+    size = batch_size(BATCH_ENDPOINT, isins)
+    fetcher = BatchFetcher(BATCH_ENDPOINT, size, workers=MAX_THREADS)
+    rows = fetcher.fetch_many(isins)
+    print(f"Batch size {size}: {fetcher.stats}")
+    all_results = []
+    for item in master_list:
+        all_results.extend(announcement_records(item, rows.get(item.get("ISIN"))) or [])
+    return all_results
 
 def main():
     try:
-        master_list = load_json(INPUT_FILE)
+        master_list = sort_by_market_cap(load_json(INPUT_FILE))
     except FileNotFoundError:
         print(f"Error: {INPUT_FILE} not found.")
         return False
 
     print(f"Starting fetch for {len(master_list)} stocks...")
-    all_results = []
-    
-    with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-        future_to_stock = {executor.submit(fetch_announcements, stock): stock for stock in master_list}
-        
-        completed = 0
-        for future in as_completed(future_to_stock):
-            res = future.result()
-            if res:
-                all_results.extend(res)
-            completed += 1
-            if completed % 100 == 0:
-                print(f"Progress: {completed}/{len(master_list)} done.")
+    if env_bool("EDL_ISIN_BATCHING", False):
+        save_announcements(fetch_batched(master_list))
+        return True
+
+    report = crawl_items([crawl_endpoint()], master_list, MAX_THREADS, REPORT_FILE, progress_every=100)
+    return crawl_succeeded(report)
 
+def save_announcements(all_results):
     # Sort results by date descending
     all_results.sort(key=lambda x: x.get("Date", ""), reverse=True)
 
     save_json(OUTPUT_FILE, all_results)
     print(f"Successfully saved {len(all_results)} announcements to {OUTPUT_FILE}")
-    return True
+
+def crawl_endpoint():
+    """Register the announcements fetch with the shared per-ISIN crawler."""
+    return Endpoint(
+        "announcements",
+        fetch_announcements,
+        finish=lambda results: save_announcements([ann for _item, res in results if res for ann in res]),
+        max_concurrency=MAX_THREADS,
+    )
 
 if __name__ == "__main__":
     sys.exit(0 if main() else 1)
@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+import fetch_advanced_indicators
+import fetch_company_filings
+import fetch_market_news
+import fetch_new_announcements
+from edl_pipeline.config import PipelineConfig, env_int
+from edl_pipeline.per_isin import crawl_items, crawl_succeeded
+from pipeline_utils import load_json
+
+# --- Configuration ---
+INPUT_FILE = "master_isin_map.json"
+REPORT_FILE = "per_isin_crawl_report.json"
+# One pool serves every per-ISIN endpoint; each endpoint keeps its own cap.
+CRAWL_WORKERS = 64
+
+ENDPOINT_MODULES = (
+    fetch_company_filings,
+    fetch_new_announcements,
+    fetch_advanced_indicators,
+    fetch_market_news,
+)
+
+
+def build_endpoints(config=None):
+    config = config or PipelineConfig.from_env()
+    modules = ENDPOINT_MODULES
+    if config.local_indicators and config.fetch_ohlcv:
+        # compute_advanced_indicators.py builds the indicator payloads from OHLCV.
+        modules = tuple(module for module in modules if module is not fetch_advanced_indicators)
+    return [module.crawl_endpoint() for module in modules]
+
+
+def main():
+    try:
+        master_list = load_json(INPUT_FILE)
+    except FileNotFoundError:
+        print(f"Error: {INPUT_FILE} not found. Please run fetch_dhan_data.py first.")
+        return False
+
+    endpoints = build_endpoints()
+    workers = env_int("EDL_CRAWL_WORKERS", CRAWL_WORKERS, minimum=1)
+    print(f"Crawling {len(master_list)} stocks across {len(endpoints)} endpoints with {workers} shared workers...")
+    return crawl_succeeded(crawl_items(endpoints, master_list, workers, REPORT_FILE))
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
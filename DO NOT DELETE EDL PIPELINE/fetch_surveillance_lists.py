@@ -2,7 +2,8 @@ import requests
 import json
 import re
 from bs4 import BeautifulSoup
-from dhan_next_utils import get_build_id
+from dhan_next_utils import get_next_data, resolve_build_id
+from edl_pipeline.http_cache import cached_get
 
 BUILD_ID_PAGE = "https://dhan.co/all-indices/"
 
@@ -28,7 +29,7 @@ def fetch_surveillance_lists():
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
     }
 
-    build_id = get_build_id(BUILD_ID_PAGE)
+    build_id = resolve_build_id(BUILD_ID_PAGE)
 
     for filename, config in lists_config.items():
         gid = config['gid']
@@ -41,7 +42,7 @@ def fetch_surveillance_lists():
         print(f"Primary Fetch: Gviz API (Spreadsheet) for {filename}...")
         try:
             url = f"{spreadsheet_base_url}{gid}"
-            response = requests.get(url, headers=headers, timeout=10)
+            response = cached_get(url, headers=headers, timeout=10)
             response.raise_for_status()
             
             text = response.text
@@ -78,11 +79,9 @@ def fetch_surveillance_lists():
         if not success and build_id:
             print(f"Secondary Fetch: Next.js Direct JSON API for {filename}...")
             try:
-                direct_url = f"https://dhan.co/_next/data/{build_id}/{data_key}.json"
-                response = requests.get(direct_url, headers=headers, timeout=10)
-                if response.status_code == 200:
+                data_json = get_next_data(build_id, data_key, timeout=10)
+                if data_json:
                     # Search for list in Next.js props
-                    data_json = response.json()
                     page_props = data_json.get('pageProps', {})
                     
                     def find_list(obj):
@@ -1,8 +1,15 @@
 from datetime import datetime, timedelta
 import io
+import sys
+from pathlib import Path
 
 import pandas as pd
-import requests
+
+SRC_DIR = Path(__file__).resolve().parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from edl_pipeline.http_cache import cached_get
 
 
 NSE_ARCHIVE_HEADERS = {
@@ -32,7 +39,7 @@ def fetch_latest_nse_csv(base_url, label, lookback_days=8, timeout=15):
 
         print(f"Checking for {label} on {date_str}...")
         try:
-            response = requests.get(url, headers=NSE_ARCHIVE_HEADERS, timeout=timeout)
+            response = cached_get(url, headers=NSE_ARCHIVE_HEADERS, timeout=timeout)
             if response.status_code == 404:
                 print(f"  No file found for {date_str} (404).")
                 continue
@@ -10,6 +10,8 @@ import gzip
 import json
 import os
 import random
+import sys
+import threading
 import time
 from pathlib import Path
 from tempfile import NamedTemporaryFile
@@ -118,10 +120,26 @@ def atomic_replace_text(path, text):
     atomic_replace_bytes(path, text.encode("utf-8"))
 
 
+def _mirror_intermediate(path, data):
+    """Copy an intermediate into the optional SQLite store (EDL_INTERMEDIATE_DB)."""
+    src_dir = str(Path(__file__).resolve().parent / "src")
+    if src_dir not in sys.path:
+        sys.path.insert(0, src_dir)
+    try:
+        from edl_pipeline.intermediate_store import intermediate_db_enabled, mirror_json
+
+        if intermediate_db_enabled():
+            mirror_json(path, data)
+    except Exception as e:
+        print(f"  WARNING: Could not mirror {path} into the intermediate store: {e}")
+
+
 def save_json(path, data, indent=4, ensure_ascii=True):
     """Write JSON atomically to a pipeline-relative path and create parent dirs."""
     text = json.dumps(data, indent=indent, ensure_ascii=ensure_ascii)
     atomic_replace_text(path, text)
+    if os.getenv("EDL_INTERMEDIATE_DB"):
+        _mirror_intermediate(path, data)
 
 
 def compress_file(src, dst, compresslevel=9):
@@ -151,12 +169,30 @@ def chunked(items, size):
         yield i, items[i:i + size]
 
 
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+HTTP_POOL_SIZE = 64
+
+
+def http_session():
+    """Return the process-wide session so concurrent fetchers share one keep-alive pool."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _SESSION = session
+        return _SESSION
+
+
 def post_json(url, payload, include_origin=False, timeout=30, retries=2, backoff=0.5):
     """POST JSON with bounded retries and return the decoded response."""
     last_error = None
     for attempt in range(retries + 1):
         try:
-            response = requests.post(
+            response = http_session().post(
                 url,
                 json=payload,
                 headers=get_headers(include_origin=include_origin),
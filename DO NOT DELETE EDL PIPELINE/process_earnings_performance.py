@@ -1,11 +1,19 @@
 import os
 import sys
 import pandas as pd
+from pathlib import Path
 
+SRC_DIR = Path(__file__).resolve().parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from edl_pipeline.features import default_feature_cache, load_features
+from edl_pipeline.filings_store import open_filings_store
 from pipeline_utils import BASE_DIR, load_json, save_json
 
 # --- Configuration ---
 FILINGS_DIR = os.path.join(BASE_DIR, "company_filings")
+FILINGS_STORE = os.path.join(BASE_DIR, "filings_store.sqlite")
 OHLCV_DIR = os.path.join(BASE_DIR, "ohlcv_data")
 MASTER_JSON = os.path.join(BASE_DIR, "all_stocks_fundamental_analysis.json")
 
@@ -20,7 +28,7 @@ def get_earnings_info(filing_path):
     except Exception:
         return None, None
 
-def calculate_earnings_metrics(csv_path, earnings_news_date):
+def calculate_earnings_metrics(csv_path, earnings_news_date, feature_cache=None):
     """Calculate returns since the earnings announcement using smart benchmarking"""
     if not earnings_news_date:
         return 0.0, 0.0
@@ -34,7 +42,7 @@ def calculate_earnings_metrics(csv_path, earnings_news_date):
         hour = int(time_part.split(":")[0])
         minute = int(time_part.split(":")[1])
         
-        df = pd.read_csv(csv_path)
+        df = load_features(csv_path, feature_cache).loc[:, ['Date', 'High', 'Close']]
         df['Date'] = pd.to_datetime(df['Date'])
         
         # Latest trading session
@@ -80,18 +88,24 @@ def main():
         return False
 
     print("Analyzing filings and calculating earnings metrics...")
-    
+    feature_cache = default_feature_cache()
+    filings_store = open_filings_store(FILINGS_STORE)
+    latest_results = filings_store.latest_results() if filings_store is not None else None
+
     for stock in analysis_data:
         symbol = stock.get("Symbol")
         filing_file = os.path.join(FILINGS_DIR, f"{symbol}_filings.json")
         ohlcv_file = os.path.join(OHLCV_DIR, f"{symbol}.csv")
         
         # 1. Get Earnings Info
-        earnings_news_date, _ = get_earnings_info(filing_file)
+        if latest_results is not None:
+            earnings_news_date = latest_results.get(symbol)
+        else:
+            earnings_news_date, _ = get_earnings_info(filing_file)
         stock["Quarterly Results Date"] = earnings_news_date.split(" ")[0] if earnings_news_date else "N/A"
         
         # 2. Calculate Metrics
-        ret, max_ret = calculate_earnings_metrics(ohlcv_file, earnings_news_date)
+        ret, max_ret = calculate_earnings_metrics(ohlcv_file, earnings_news_date, feature_cache)
         stock["Returns since Earnings(%)"] = ret
         stock["Max Returns since Earnings(%)"] = max_ret
 
@@ -1,5 +1,6 @@
 """Generate the versioned MBI/XP market-breadth artifacts."""
 
+from datetime import datetime, timezone
 import sys
 from pathlib import Path
 
@@ -10,7 +11,13 @@ if str(SRC_DIR) not in sys.path:
 
 from edl_pipeline.breadth.config import load_methodology
 from edl_pipeline.breadth.indices import generate_all_index_history
-from edl_pipeline.breadth.pipeline import generate_market_breadth
+from edl_pipeline.breadth.pipeline import (
+    generate_market_breadth,
+    generate_universe_breadth,
+    load_breadth_panel,
+)
+from edl_pipeline.breadth.universe import build_universe_snapshot
+from edl_pipeline.features import FeatureCache
 from pipeline_utils import load_json
 
 
@@ -22,7 +29,12 @@ INDICES_DIR = BASE_DIR / "indices_ohlcv_data"
 METHODOLOGY_FILE = BASE_DIR / "breadth_methodology.json"
 OUTPUT_FILE = BASE_DIR / "market_breadth_v2.json"
 SNAPSHOT_FILE = BASE_DIR / "breadth_universe_snapshot.json"
+FEATURE_CACHE_DIR = BASE_DIR / "feature_cache"
 ALL_INDICES_OUTPUT_FILE = BASE_DIR / "all_indices_history_v2.json"
+# Hundreds of universes of daily rows: written compact and gzipped, and not committed.
+UNIVERSES_OUTPUT_FILE = BASE_DIR / "market_breadth_universes_v2.json.gz"
+FUNDAMENTALS_FILE = BASE_DIR / "all_stocks_fundamental_analysis.json"
+SME_FILE = BASE_DIR / "sme_market_data.json"
 MINIMUM_HISTORY_COVERAGE = 0.90
 
 
@@ -30,6 +42,24 @@ def history_coverage(processed, available):
     return processed / available if available else 0.0
 
 
+def load_industries(path=FUNDAMENTALS_FILE):
+    if not path.exists():
+        print(f"Warning: {path.name} not found. Industry breadth unavailable.")
+        return None
+    return {
+        row["Symbol"]: row.get("Basic Industry")
+        for row in load_json(path)
+        if row.get("Symbol")
+    }
+
+
+def load_sme_symbols(path=SME_FILE):
+    if not path.exists():
+        print(f"Warning: {path.name} not found. SME/mainboard breadth unavailable.")
+        return None
+    return {row["Symbol"] for row in load_json(path) if row.get("Symbol")}
+
+
 def main():
     if not UNIVERSE_FILE.exists():
         print("Error: dhan_data_response.json is missing. Run fetch_dhan_data.py first.")
@@ -53,11 +83,15 @@ def main():
     methodology = load_methodology(METHODOLOGY_FILE)
     universe_rows = load_json(UNIVERSE_FILE)
     print(
-        "Building MBI/XP breadth with "
+        f"Building {methodology.universe_mode} MBI/XP breadth with "
         f"LTP >= {methodology.minimum_price:g} and "
         f"Mcap > {methodology.minimum_market_cap_crore:g} crore..."
     )
 
+    generated_at = datetime.now(timezone.utc).isoformat()
+    universe_snapshot = build_universe_snapshot(universe_rows, methodology, generated_at)
+    feature_cache = FeatureCache(FEATURE_CACHE_DIR, methodology)
+    panel = load_breadth_panel(universe_snapshot, OHLCV_DIR, methodology, feature_cache)
     artifact, snapshot = generate_market_breadth(
         universe_rows=universe_rows,
         ohlcv_dir=OHLCV_DIR,
@@ -65,6 +99,10 @@ def main():
         methodology=methodology,
         output_path=OUTPUT_FILE,
         snapshot_path=SNAPSHOT_FILE,
+        generated_at=generated_at,
+        feature_cache=feature_cache,
+        panel=panel,
+        snapshot=universe_snapshot,
     )
     quality = artifact["quality"]
     index_artifact = generate_all_index_history(
@@ -83,7 +121,7 @@ def main():
         f"Dates: {quality['record_count']}"
     )
 
-    equity_total = snapshot["eligible_count"]
+    equity_total = snapshot.get("history_candidate_count", snapshot["eligible_count"])
     equity_coverage = history_coverage(quality["processed_symbols"], equity_total)
     index_total = index_quality["available_indices"]
     index_coverage = history_coverage(
@@ -102,8 +140,28 @@ def main():
             f"({index_coverage:.1%}; required {MINIMUM_HISTORY_COVERAGE:.0%})."
         )
         return 1
+
+    universe_artifact = generate_universe_breadth(
+        universe_rows=universe_rows,
+        ohlcv_dir=OHLCV_DIR,
+        index_csv=INDEX_FILE,
+        methodology=methodology,
+        output_path=UNIVERSES_OUTPUT_FILE,
+        index_rows=load_json(INDEX_LIST_FILE),
+        indices_dir=INDICES_DIR,
+        industries=load_industries(),
+        sme_symbols=load_sme_symbols(),
+        generated_at=artifact["generated_at"],
+        panel=panel,
+        snapshot=snapshot,
+    )
     print(f"Saved: {OUTPUT_FILE}")
     print(f"Saved: {SNAPSHOT_FILE}")
+    print(
+        f"Universes: {universe_artifact['quality']['universe_count']} "
+        f"({len(universe_artifact['quality']['missing_index_history'])} without index history)"
+    )
+    print(f"Saved: {UNIVERSES_OUTPUT_FILE}")
     print(
         f"Indices: {index_quality['processed_indices']}/"
         f"{index_quality['available_indices']} processed"
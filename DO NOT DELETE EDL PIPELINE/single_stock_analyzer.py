@@ -1,5 +1,12 @@
 import json
 import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from edl_pipeline.fundamentals_index import lookup_fundamentals
 
 def get_float(value_str):
     try:
@@ -20,21 +27,28 @@ def get_value_from_pipe_string(pipe_string, index):
         return get_float(parts[index])
     return 0.0
 
+def load_stock_data(symbol_to_find, input_file="fundamental_data.json"):
+    """Read one record from the fundamentals index, scanning the JSON only without it."""
+    try:
+        return lookup_fundamentals(symbol_to_find)
+    except FileNotFoundError:
+        pass
+
+    with open(input_file, "r") as f:
+        data = json.load(f)
+    for item in data:
+        if symbol_to_find in (item.get("Symbol"), item.get("isin")):
+            return item
+    return None
+
 def analyze_stock(symbol_to_find):
     input_file = "fundamental_data.json"
     
     try:
-        with open(input_file, "r") as f:
-            data = json.load(f)
+        stock_data = load_stock_data(symbol_to_find, input_file)
     except FileNotFoundError:
         print(f"Error: {input_file} not found.")
         return
-
-    stock_data = None
-    for item in data:
-        if item.get("Symbol") == symbol_to_find:
-            stock_data = item
-            break
     
     if not stock_data:
         print(f"Stock '{symbol_to_find}' not found in database.")
@@ -18,12 +18,21 @@ INTERMEDIATE_FILES = [
     "lower_circuit_stocks.json",
     "incremental_price_bands.json",
     "complete_price_bands.json",
+    "per_isin_crawl_report.json",
+    "company_filings_crawl_report.json",
+    "announcements_crawl_report.json",
+    "advanced_indicators_crawl_report.json",
+    "market_news_crawl_report.json",
+    "advanced_indicator_parity.json",
+    "scanx_run_cache.json.gz",
+    "dhan_build_id.json",
     "sme_market_data.json",
     "nse_equity_list.csv",
     "all_stocks_fundamental_analysis.json",
     "sector_analytics.json",
     "market_breadth.csv",
     "etf_data_response.json",
+    "intermediate.sqlite",
 ]
 
 INTERMEDIATE_DIRS = [
@@ -46,6 +55,7 @@ OHLCV_DERIVED_FILES = frozenset(
         "market_breadth_v2.json",
         "breadth_universe_snapshot.json",
         "all_indices_history_v2.json",
+        "market_breadth_universes_v2.json",
     }
 )
 OHLCV_DERIVED_FINAL_PATHS = frozenset(
@@ -67,7 +77,23 @@ PHASE2_SCRIPTS = [
     "fetch_sme_data.py",
 ]
 
+# With EDL_UNIFIED_CRAWL=1 these per-ISIN fetchers run as one crawl.
+PER_ISIN_CRAWL_SCRIPT = "fetch_per_isin_data.py"
+PER_ISIN_SCRIPTS = (
+    "fetch_company_filings.py",
+    "fetch_new_announcements.py",
+    "fetch_advanced_indicators.py",
+    "fetch_market_news.py",
+)
+
+# With EDL_LOCAL_INDICATORS=1 the indicator payloads are computed from OHLCV
+# after Phase 2.5 instead of being fetched in Phase 2.
+REMOTE_INDICATOR_SCRIPT = "fetch_advanced_indicators.py"
+LOCAL_INDICATOR_SCRIPT = "compute_advanced_indicators.py"
+
 PHASE4_SCRIPTS = [
+    "build_fundamentals_store.py",
+    "build_feature_cache.py",
     "advanced_metrics_processor.py",
     "process_earnings_performance.py",
     "enrich_fno_data.py",
@@ -142,6 +168,12 @@ SCRIPT_OUTPUT_SPECS = {
             required_fields=("Symbol", "Name", "Basic Industry", "Sector", "Market Cap(Cr.)"),
         ),
     ],
+    "build_fundamentals_store.py": [
+        ArtifactSpec("fundamentals_store", "dir", min_count=0),
+    ],
+    "build_feature_cache.py": [
+        ArtifactSpec("feature_cache", "dir", min_count=0),
+    ],
     "advanced_metrics_processor.py": [
         ArtifactSpec("all_stocks_fundamental_analysis.json", "json", min_count=1),
     ],
@@ -179,6 +211,11 @@ SCRIPT_OUTPUT_SPECS = {
     ],
 }
 
+SCRIPT_OUTPUT_SPECS[LOCAL_INDICATOR_SCRIPT] = SCRIPT_OUTPUT_SPECS[REMOTE_INDICATOR_SCRIPT]
+SCRIPT_OUTPUT_SPECS[PER_ISIN_CRAWL_SCRIPT] = [
+    spec for script in PER_ISIN_SCRIPTS for spec in SCRIPT_OUTPUT_SPECS[script]
+]
+
 FINAL_ARTIFACT_SPECS = [
     ArtifactSpec(
         "all_stocks_fundamental_analysis.json.gz",
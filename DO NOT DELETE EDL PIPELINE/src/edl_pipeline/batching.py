@@ -0,0 +1,150 @@
+"""Multi-ISIN batching for per-ISIN ScanX endpoints, with a capability probe.
+
+The fundamental endpoint takes an ``isins`` list; the static announcement and
+filing endpoints are called one ISIN at a time.  ``probe_batch_size`` finds
+out whether an endpoint answers an ``isins`` request correctly: it fetches a
+few ISINs one by one, then asks for them inside growing batches and accepts a
+size only when every row can be attributed to an ISIN and each baseline
+ISIN gets back exactly the rows it got alone.  The largest accepted size is
+cached in ``batch_capabilities.json`` for ``CAPABILITY_TTL_DAYS``.
+
+``BatchFetcher`` then serves ``{isin: rows}`` in batches of that size.  A batch
+that fails, cannot be split back per ISIN, or may have been truncated is
+refetched one ISIN at a time, so an endpoint that never batches costs one
+probe per week and behaves exactly like the single-ISIN loop.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+import threading
+from typing import Callable, Optional
+
+from pipeline_utils import BASE_PATH, chunked, load_json, post_json, save_json
+
+BATCH_CAPABILITIES_FILE = BASE_PATH / "batch_capabilities.json"
+CAPABILITY_TTL_DAYS = 7
+PROBE_SIZES = (2, 10, 50, 100)
+PROBE_BASELINE = 3
+ISIN_FIELDS = ("isin", "ISIN", "Isin")
+
+
+@dataclass(frozen=True)
+class BatchEndpoint:
+    """How to ask one endpoint for several ISINs and for one.
+
+    ``batch_payload(isins)`` builds the multi-ISIN request body and ``single``
+    fetches one ISIN's rows the usual way.  ``row_limit(isins)`` is the most
+    rows a batch request can return; a response that reaches it may be
+    truncated and is refetched per ISIN.
+    """
+
+    name: str
+    url: str
+    batch_payload: Callable
+    single: Callable
+    row_limit: Optional[Callable] = None
+    timeout: int = 30
+
+
+def split_rows(rows, isins):
+    """Return ``{isin: rows}`` for a batch response, or None when a row cannot be attributed."""
+    wanted = set(isins)
+    split = {isin: [] for isin in isins}
+    for row in rows:
+        isin = next((row.get(field) for field in ISIN_FIELDS if isinstance(row, dict) and row.get(field)), None)
+        if isin not in wanted:
+            return None
+        split[isin].append(row)
+    return split
+
+
+def fetch_batch(endpoint, isins):
+    """Return ``{isin: rows}`` for one batch request, or None when it is unusable."""
+    try:
+        rows = post_json(endpoint.url, endpoint.batch_payload(list(isins)), timeout=endpoint.timeout).get("data")
+    except Exception:
+        return None
+    if not isinstance(rows, list):
+        return None
+    if endpoint.row_limit is not None and len(rows) >= endpoint.row_limit(isins):
+        return None
+    return split_rows(rows, isins)
+
+
+def probe_batch_size(endpoint, isins, sizes=PROBE_SIZES, baseline_count=PROBE_BASELINE):
+    """Return the largest batch size in ``sizes`` the endpoint answers correctly, else 1."""
+    baseline = {isin: endpoint.single(isin) or [] for isin in isins[:baseline_count]}
+    with_data = [isin for isin, rows in baseline.items() if rows]
+    if not with_data:
+        return 1
+    accepted = 1
+    for size in sizes:
+        if size > len(isins):
+            break
+        split = fetch_batch(endpoint, isins[:size])
+        if split is None or any(len(split[isin]) != len(baseline[isin]) for isin in with_data if isin in split):
+            break
+        accepted = size
+    return accepted
+
+
+def load_capabilities(path=BATCH_CAPABILITIES_FILE):
+    data = load_json(path, default={})
+    return data if isinstance(data, dict) else {}
+
+
+def batch_size(endpoint, sample_isins, path=BATCH_CAPABILITIES_FILE, today=None, ttl_days=CAPABILITY_TTL_DAYS):
+    """Return the cached batch size for ``endpoint``, probing when missing or stale."""
+    today = today or date.today()
+    capabilities = load_capabilities(path)
+    cached = capabilities.get(endpoint.name)
+    if cached and cached.get("url") == endpoint.url:
+        try:
+            age = (today - date.fromisoformat(cached["probed_at"])).days
+        except (KeyError, TypeError, ValueError):
+            age = None
+        if age is not None and 0 <= age < ttl_days:
+            return int(cached.get("max_batch") or 1)
+
+    size = probe_batch_size(endpoint, list(sample_isins))
+    capabilities[endpoint.name] = {"url": endpoint.url, "max_batch": size, "probed_at": today.isoformat()}
+    save_json(path, capabilities)
+    return size
+
+
+class BatchFetcher:
+    """Fetch ``{isin: rows}`` in batches, falling back to single-ISIN requests."""
+
+    def __init__(self, endpoint, size, workers=8):
+        self.endpoint = endpoint
+        self.size = max(1, int(size))
+        self.workers = workers
+        self.stats = {"batch_requests": 0, "single_requests": 0, "fallback_batches": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _singles(self, isins):
+        self._count("single_requests", len(isins))
+        return {isin: self.endpoint.single(isin) or [] for isin in isins}
+
+    def _fetch_chunk(self, isins):
+        if self.size == 1:
+            return self._singles(isins)
+        self._count("batch_requests")
+        split = fetch_batch(self.endpoint, isins)
+        if split is None:
+            self._count("fallback_batches")
+            return self._singles(isins)
+        return split
+
+    def fetch_many(self, isins):
+        results = {}
+        chunks = [chunk for _start, chunk in chunked(list(isins), self.size)]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for split in executor.map(self._fetch_chunk, chunks):
+                results.update(split)
+        return results
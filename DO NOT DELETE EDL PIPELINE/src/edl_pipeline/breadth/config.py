@@ -5,6 +5,9 @@ import json
 from pathlib import Path
 
 
+UNIVERSE_MODES = ("latest_snapshot", "point_in_time")
+
+
 @dataclass(frozen=True)
 class BreadthMethodology:
     version: str = "mbi-xp-v2.2"
@@ -32,8 +35,8 @@ class BreadthMethodology:
     rounding_digits: int = 6
 
     def validate(self):
-        if self.universe_mode != "latest_snapshot":
-            raise ValueError("Only latest_snapshot universe mode is currently supported.")
+        if self.universe_mode not in UNIVERSE_MODES:
+            raise ValueError("universe_mode must be latest_snapshot or point_in_time.")
         if self.market_cap_comparison != "strictly_greater":
             raise ValueError("Market-cap comparison must remain strictly_greater.")
         if self.default_ma_type not in {"SMA", "EMA"}:
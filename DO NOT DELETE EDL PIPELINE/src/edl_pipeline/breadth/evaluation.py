@@ -0,0 +1,159 @@
+"""Evaluate several breadth methodologies against shared prepared panels.
+
+Variants that share indicator windows share one panel, loaded once for the
+union of their history symbols.  Thresholds, universe floors and modes, the
+selected moving-average type, and XP settings are then applied as masked
+reductions and enrichment over that panel, so a variant costs a few array
+passes rather than a full history read.
+"""
+
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+
+from .indicators import indicator_windows
+from .panel import build_panel
+from .pipeline import (
+    TRADINGVIEW_TABLE_SCHEMA,
+    build_breadth_artifact,
+    load_index_closes,
+    save_json,
+)
+from .universe import build_universe_snapshot, history_symbols
+
+
+COMPARISON_FIELDS = tuple(
+    item["field"]
+    for item in TRADINGVIEW_TABLE_SCHEMA
+    if item["available"] and item["field"] != "date"
+)
+
+
+def variant_names(methodologies):
+    """Name each variant by methodology version, numbering repeated versions."""
+    versions = [methodology.version for methodology in methodologies]
+    return [
+        version if versions.count(version) == 1 else f"{version}-{position}"
+        for position, version in enumerate(versions, start=1)
+    ]
+
+
+def _safe_name(name):
+    return "".join(
+        character if character.isalnum() or character in "-_." else "_"
+        for character in name
+    )
+
+
+def _mean_absolute_difference(records, baseline_records, field):
+    baseline = {row["date"]: row.get(field) for row in baseline_records}
+    differences = [
+        abs(row[field] - baseline[row["date"]])
+        for row in records
+        if row.get(field) is not None and baseline.get(row["date"]) is not None
+    ]
+    return sum(differences) / len(differences) if differences else None
+
+
+def comparison_report(artifacts, generated_at=None):
+    """Compare every variant's published fields against the first variant."""
+    generated_at = generated_at or datetime.now(timezone.utc).isoformat()
+    names = list(artifacts)
+    baseline = artifacts[names[0]] if names else None
+    variants = []
+    for name, artifact in artifacts.items():
+        methodology = artifact["methodology"]
+        latest = artifact["records"][-1] if artifact["records"] else {}
+        variants.append({
+            "name": name,
+            "changed_settings": {
+                key: value
+                for key, value in methodology.items()
+                if baseline["methodology"].get(key) != value
+            },
+            "quality": artifact["quality"],
+            "latest": {
+                "date": latest.get("date"),
+                **{field: latest.get(field) for field in COMPARISON_FIELDS},
+            },
+            "mean_absolute_difference": {
+                field: _mean_absolute_difference(
+                    artifact["records"],
+                    baseline["records"],
+                    field,
+                )
+                for field in COMPARISON_FIELDS
+            },
+        })
+    return {
+        "generated_at": generated_at,
+        "baseline": names[0] if names else None,
+        "fields": list(COMPARISON_FIELDS),
+        "variants": variants,
+    }
+
+
+def evaluate_methodologies(
+    universe_rows,
+    ohlcv_dir,
+    index_csv,
+    methodologies,
+    output_dir=None,
+    report_path=None,
+    generated_at=None,
+    feature_cache=None,
+):
+    """Return ``({variant_name: artifact}, comparison_report)`` for every variant.
+
+    Each artifact has the shape of ``market_breadth_v2.json``.  When given,
+    ``output_dir`` receives one ``market_breadth_{variant}.json`` per variant
+    and ``report_path`` the combined comparison report.  ``feature_cache`` is
+    used only for variants whose indicator windows match it.
+    """
+    methodologies = [methodology.validate() for methodology in methodologies]
+    generated_at = generated_at or datetime.now(timezone.utc).isoformat()
+    names = variant_names(methodologies)
+    index_closes = load_index_closes(index_csv)
+
+    groups = {}
+    for name, methodology in zip(names, methodologies):
+        key = json.dumps(indicator_windows(methodology), sort_keys=True)
+        groups.setdefault(key, []).append((name, methodology))
+
+    artifacts = {}
+    for variants in groups.values():
+        snapshots = {
+            name: build_universe_snapshot(universe_rows, methodology, generated_at)
+            for name, methodology in variants
+        }
+        symbols = sorted({
+            symbol
+            for snapshot in snapshots.values()
+            for symbol in history_symbols(snapshot)
+        })
+        panel_methodology = variants[0][1]
+        cache = (
+            feature_cache
+            if feature_cache is not None
+            and feature_cache.spec["windows"] == indicator_windows(panel_methodology)
+            else None
+        )
+        panel = build_panel(symbols, ohlcv_dir, panel_methodology, cache)
+        for name, methodology in variants:
+            artifacts[name] = build_breadth_artifact(
+                snapshots[name],
+                panel,
+                methodology,
+                index_csv,
+                index_closes,
+                generated_at,
+            )
+
+    artifacts = {name: artifacts[name] for name in names}
+    if output_dir is not None:
+        for name, artifact in artifacts.items():
+            save_json(Path(output_dir) / f"market_breadth_{_safe_name(name)}.json", artifact)
+    report = comparison_report(artifacts, generated_at)
+    if report_path is not None:
+        save_json(report_path, report)
+    return artifacts, report
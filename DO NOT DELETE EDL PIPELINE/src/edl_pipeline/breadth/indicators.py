@@ -20,6 +20,16 @@ def _rsi(series, period=14):
     return result
 
 
+def indicator_windows(methodology):
+    """Return the methodology fields that shape ``prepare_history`` output."""
+    return {
+        "ma_periods": list(methodology.ma_periods),
+        "monthly_sessions": methodology.monthly_sessions,
+        "quarterly_sessions": methodology.quarterly_sessions,
+        "yearly_sessions": methodology.yearly_sessions,
+    }
+
+
 def prepare_history(frame, methodology):
     """Normalize an OHLCV frame and calculate all stock-level features."""
     missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
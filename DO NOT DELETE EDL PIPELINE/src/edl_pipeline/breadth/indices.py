@@ -31,6 +31,24 @@ def safe_index_symbol(symbol, index_id=None, disambiguate=False):
     )
 
 
+def _index_csv_path(index, indices_root, safe_symbol_counts):
+    symbol = str(index.get("Symbol") or "").strip()
+    disambiguate = safe_symbol_counts[safe_index_symbol(symbol)] > 1
+    return Path(indices_root) / f"{safe_index_symbol(symbol, index.get('IndexID'), disambiguate)}.csv"
+
+
+def index_csv_paths(index_rows, indices_dir):
+    """Map each index ID, as a string, to the CSV written by fetch_indices_ohlcv.py."""
+    safe_symbol_counts = Counter(
+        safe_index_symbol(index.get("Symbol") or "") for index in index_rows
+    )
+    return {
+        str(index.get("IndexID")): _index_csv_path(index, indices_dir, safe_symbol_counts)
+        for index in index_rows
+        if str(index.get("Symbol") or "").strip() and index.get("IndexID") is not None
+    }
+
+
 def _round_value(value, digits):
     if isinstance(value, bool) or value is None:
         return value
@@ -135,10 +153,7 @@ def generate_all_index_history(
         if not symbol:
             invalid_history.append({"symbol": None, "error": "missing symbol"})
             continue
-        safe_symbol = safe_index_symbol(symbol)
-        csv_path = indices_root / (
-            f"{safe_index_symbol(symbol, index.get('IndexID'), safe_symbol_counts[safe_symbol] > 1)}.csv"
-        )
+        csv_path = _index_csv_path(index, indices_root, safe_symbol_counts)
         if not csv_path.exists():
             missing_history.append(symbol)
             continue
@@ -1,188 +1,238 @@
-"""MBI ratios, colour scoring, and the publicly disclosed XP proxy."""
+"""MBI ratios, colour scoring, and the publicly disclosed XP proxy.
+
+Every derived field is evaluated column-wise over the whole date axis: ratios
+and percentages are array operations, rolling advance/decline sums use
+cumulative sums, and the smoothed-advances and log-XP recurrences run as
+first-order linear filters.  Missing values travel as NaN and are published
+as ``None``.
+"""
 
 import math
 
-from .aggregates import percentage, percentage_change, scaled_ratio
+import numpy as np
+
+
+FILTER_BLOCK_SIZE = 64
+
+
+def _column(records, field):
+    return np.asarray([row[field] for row in records])
+
+
+def _nullable(values):
+    return [None if value != value else value for value in values.tolist()]
+
+
+def _percentage(numerator, denominator):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, 100.0 * numerator / denominator, np.nan)
+
 
+def _percentage_change(current, previous):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        valid = ~np.isnan(current) & np.isfinite(previous) & (previous != 0)
+        return np.where(valid, 100.0 * (current / previous - 1), np.nan)
 
-def _cell(value, green_above, red_below):
-    if value is None:
-        return "neutral"
-    if value > green_above:
-        return "green"
-    if value < red_below:
-        return "red"
-    return "neutral"
 
+def _previous(values):
+    shifted = np.empty(len(values))
+    shifted[:1] = np.nan
+    shifted[1:] = values[:-1]
+    return shifted
 
-def _change_cell(value):
-    return _cell(value, 20.0, -20.0)
 
+def _rolling_sum(values, window):
+    totals = np.cumsum(values)
+    totals[window:] = totals[window:] - totals[:-window]
+    return totals
 
-def _nnh_cell(highs, lows):
-    if highs > lows:
-        return "green"
-    if highs < lows:
-        return "red"
-    return "neutral"
 
+def _linear_filter(inputs, decay, initial):
+    """Evaluate ``y[t] = decay * y[t - 1] + inputs[t]`` with ``y[-1] = initial``.
 
-def _safe_log_positive(value, methodology):
-    return math.log(max(float(value), methodology.xp_positive_epsilon))
+    The closed form is applied in short blocks so the inverse decay powers
+    stay well inside the float64 range.
+    """
+    outputs = np.empty(len(inputs))
+    state = float(initial)
+    for start in range(0, len(inputs), FILTER_BLOCK_SIZE):
+        block = inputs[start:start + FILTER_BLOCK_SIZE]
+        powers = decay ** np.arange(len(block))
+        values = powers * (decay * state + np.cumsum(block / powers))
+        outputs[start:start + len(block)] = values
+        state = values[-1]
+    return outputs
 
 
-def _safe_log_odds(percentage_value, methodology):
+def _cells(values, green_above, red_below):
+    return np.where(
+        values > green_above,
+        "green",
+        np.where(values < red_below, "red", "neutral"),
+    )
+
+
+def _change_cells(values):
+    return _cells(values, 20.0, -20.0)
+
+
+def _nnh_cells(highs, lows):
+    return np.where(highs > lows, "green", np.where(highs < lows, "red", "neutral"))
+
+
+def _safe_log_positive(values, methodology):
+    return np.log(np.maximum(values.astype(float), methodology.xp_positive_epsilon))
+
+
+def _safe_log_odds(percentages, methodology):
     epsilon = methodology.xp_percentage_epsilon
-    bounded = min(max(float(percentage_value), epsilon), 100.0 - epsilon)
-    return math.log(bounded / (100.0 - bounded))
+    bounded = np.clip(percentages, epsilon, 100.0 - epsilon)
+    return np.log(bounded / (100.0 - bounded))
 
 
 def enrich_records(records, methodology, index_closes=None):
     """Add derived ratios, states, rolling ratios, index change, and XP."""
+    if not records:
+        return []
     index_closes = index_closes or {}
     ma_prefix = methodology.default_ma_type.lower()
-    previous = None
-    previous_index_close = None
-    previous_xp = methodology.xp_initial
-    previous_z = None
-    rolling_advances = []
-    rolling_declines = []
-    output = []
-
-    for raw in records:
-        row = dict(raw)
-        universe_denominator = row["eligible_with_candle"]
-        row["up_4_pct"] = percentage(row["up_4"], universe_denominator)
-        row["down_4_pct"] = percentage(row["down_4"], universe_denominator)
-        row["up_4_5_pct"] = percentage(row["up_4_5"], universe_denominator)
-        row["down_4_5_pct"] = percentage(row["down_4_5"], universe_denominator)
-        row["net_4_pct"] = (
-            row["up_4_pct"] - row["down_4_pct"]
-            if row["up_4_pct"] is not None and row["down_4_pct"] is not None
-            else None
-        )
-        row["ratio_4"] = scaled_ratio(row["up_4"], row["down_4"])
-        row["ratio_4_5"] = scaled_ratio(row["up_4_5"], row["down_4_5"])
-
-        for period in methodology.ma_periods:
-            above = row[f"above_{ma_prefix}_{period}"]
-            not_above = max(universe_denominator - above, 0)
-            row[f"above_{period}_pct"] = percentage(above, universe_denominator)
-            row[f"ratio_{period}"] = scaled_ratio(above, not_above)
-
-        row["change_4"] = percentage_change(
-            row["ratio_4"],
-            previous["ratio_4"] if previous else None,
-        )
-        row["change_4_5"] = percentage_change(
-            row["ratio_4_5"],
-            previous["ratio_4_5"] if previous else None,
-        )
-        row["change_20"] = percentage_change(
-            row["ratio_20"],
-            previous["ratio_20"] if previous else None,
-        )
-        row["change_50"] = percentage_change(
-            row["ratio_50"],
-            previous["ratio_50"] if previous else None,
-        )
-
-        row["monthly_nnh"] = row["new_monthly_high"] - row["new_monthly_low"]
-        row["quarterly_nnh"] = row["new_quarterly_high"] - row["new_quarterly_low"]
-        row["nnh_52w"] = row["new_52w_high"] - row["new_52w_low"]
-        row["new_monthly_high_pct"] = percentage(
-            row["new_monthly_high"], universe_denominator
-        )
-        row["new_monthly_low_pct"] = percentage(
-            row["new_monthly_low"], universe_denominator
-        )
-        row["new_quarterly_high_pct"] = percentage(
-            row["new_quarterly_high"], universe_denominator
-        )
-        row["new_quarterly_low_pct"] = percentage(
-            row["new_quarterly_low"], universe_denominator
+    denominator = _column(records, "eligible_with_candle")
+    columns = {}
+
+    counts = {
+        field: _column(records, field)
+        for field in (
+            "up_4",
+            "down_4",
+            "up_4_5",
+            "down_4_5",
+            "advances",
+            "declines",
+            "new_monthly_high",
+            "new_monthly_low",
+            "new_quarterly_high",
+            "new_quarterly_low",
+            "new_52w_high",
+            "new_52w_low",
         )
-        row["new_52w_high_pct"] = percentage(
-            row["new_52w_high"], universe_denominator
-        )
-        row["new_52w_low_pct"] = percentage(
-            row["new_52w_low"], universe_denominator
-        )
-
-        rolling_advances.append(row["advances"])
-        rolling_declines.append(row["declines"])
-        for window in (5, 10):
-            advances = sum(rolling_advances[-window:])
-            declines = sum(rolling_declines[-window:])
-            row[f"advance_decline_ratio_{window}d"] = (
-                advances / declines if declines > 0 else None
-            )
-
-        index_close = index_closes.get(row["date"])
-        row["index_close"] = index_close
-        row["index_change_pct"] = (
-            percentage_change(index_close, previous_index_close)
-            if index_close is not None
-            else None
-        )
-        if index_close is not None:
-            previous_index_close = index_close
-
-        cells = {
-            "ratio_4_5": _cell(row["ratio_4_5"], 200.0, 50.0),
-            "change_4_5": _change_cell(row["change_4_5"]),
-            "ratio_20": _cell(row["ratio_20"], 75.0, 50.0),
-            "change_20": _change_cell(row["change_20"]),
-            "ratio_50": _cell(row["ratio_50"], 85.0, 60.0),
-            "change_50": _change_cell(row["change_50"]),
-            "nnh_52w": _nnh_cell(row["new_52w_high"], row["new_52w_low"]),
-        }
-        green_count = sum(value == "green" for value in cells.values())
-        red_count = sum(value == "red" for value in cells.values())
-        score = green_count - red_count
-        state = "green" if score >= 3 else "red" if score <= -3 else "neutral"
-        row["mbi_cells"] = cells
-        row["mbi_green_count"] = green_count
-        row["mbi_red_count"] = red_count
-        row["mbi_score"] = score
-        row["mbi_state"] = state
-        row["warning_day"] = red_count >= 3 and state != "red"
-
-        p10 = row["above_10_pct"]
-        p20 = row["above_20_pct"]
-        up_4_5_count = row["up_4_5"]
-        down_4_5_count = row["down_4_5"]
-        current_z = None
-        if up_4_5_count is not None:
-            current_z = (
-                float(up_4_5_count)
-                if previous_z is None
-                else 0.162 * up_4_5_count + 0.838 * previous_z
-            )
-        row["xp_advancer_count"] = up_4_5_count
-        row["xp_decliner_count"] = down_4_5_count
-        row["em"] = None
-        row["xp_smoothed_advances"] = current_z
-        if current_z is not None:
-            previous_z = current_z
-        if p10 is None or p20 is None or current_z is None or down_4_5_count is None:
-            row["xp_raw"] = None
-            row["xp"] = None
-        else:
-            log_xp = (
-                0.592 * math.log(previous_xp)
-                + 0.471 * _safe_log_positive(current_z, methodology)
-                + 0.198 * _safe_log_odds(p10, methodology)
-                + 0.334
-                - 0.067 * _safe_log_positive(down_4_5_count, methodology)
-                - 0.077 * _safe_log_odds(p20, methodology)
+    }
+
+    for field in ("up_4", "down_4", "up_4_5", "down_4_5"):
+        columns[f"{field}_pct"] = _percentage(counts[field], denominator)
+    columns["net_4_pct"] = columns["up_4_pct"] - columns["down_4_pct"]
+    columns["ratio_4"] = _percentage(counts["up_4"], counts["down_4"])
+    columns["ratio_4_5"] = _percentage(counts["up_4_5"], counts["down_4_5"])
+
+    above_pct = {}
+    for period in methodology.ma_periods:
+        above = _column(records, f"above_{ma_prefix}_{period}")
+        not_above = np.maximum(denominator - above, 0)
+        above_pct[period] = _percentage(above, denominator)
+        columns[f"above_{period}_pct"] = above_pct[period]
+        columns[f"ratio_{period}"] = _percentage(above, not_above)
+
+    for field in ("4", "4_5", "20", "50"):
+        ratio = columns[f"ratio_{field}"]
+        columns[f"change_{field}"] = _percentage_change(ratio, _previous(ratio))
+
+    columns["monthly_nnh"] = counts["new_monthly_high"] - counts["new_monthly_low"]
+    columns["quarterly_nnh"] = counts["new_quarterly_high"] - counts["new_quarterly_low"]
+    columns["nnh_52w"] = counts["new_52w_high"] - counts["new_52w_low"]
+    for field in (
+        "new_monthly_high",
+        "new_monthly_low",
+        "new_quarterly_high",
+        "new_quarterly_low",
+        "new_52w_high",
+        "new_52w_low",
+    ):
+        columns[f"{field}_pct"] = _percentage(counts[field], denominator)
+
+    for window in (5, 10):
+        advances = _rolling_sum(counts["advances"], window)
+        declines = _rolling_sum(counts["declines"], window)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            columns[f"advance_decline_ratio_{window}d"] = np.where(
+                declines > 0,
+                advances / declines,
+                np.nan,
             )
-            current_xp = math.exp(log_xp)
-            row["xp_raw"] = current_xp
-            row["xp"] = current_xp * methodology.xp_output_multiplier
-            previous_xp = current_xp
 
+    index_close = np.asarray(
+        [index_closes.get(row["date"], np.nan) for row in records],
+        dtype=float,
+    )
+    known = np.where(~np.isnan(index_close), np.arange(len(records)), -1)
+    last_known = _previous(np.maximum.accumulate(known).astype(float))
+    previous_index_close = np.full(len(records), np.nan)
+    has_previous = ~np.isnan(last_known) & (last_known >= 0)
+    previous_index_close[has_previous] = index_close[last_known[has_previous].astype(int)]
+    columns["index_close"] = index_close
+    columns["index_change_pct"] = _percentage_change(index_close, previous_index_close)
+
+    cells = {
+        "ratio_4_5": _cells(columns["ratio_4_5"], 200.0, 50.0),
+        "change_4_5": _change_cells(columns["change_4_5"]),
+        "ratio_20": _cells(columns["ratio_20"], 75.0, 50.0),
+        "change_20": _change_cells(columns["change_20"]),
+        "ratio_50": _cells(columns["ratio_50"], 85.0, 60.0),
+        "change_50": _change_cells(columns["change_50"]),
+        "nnh_52w": _nnh_cells(counts["new_52w_high"], counts["new_52w_low"]),
+    }
+    green_count = sum((values == "green").astype(int) for values in cells.values())
+    red_count = sum((values == "red").astype(int) for values in cells.values())
+    score = green_count - red_count
+    state = np.where(score >= 3, "green", np.where(score <= -3, "red", "neutral"))
+
+    up_4_5 = counts["up_4_5"].astype(float)
+    smoothed = np.empty(len(records))
+    smoothed[0] = up_4_5[0]
+    smoothed[1:] = _linear_filter(0.162 * up_4_5[1:], 0.838, up_4_5[0])
+
+    p10 = above_pct[10]
+    p20 = above_pct[20]
+    valid_xp = ~np.isnan(p10) & ~np.isnan(p20)
+    xp_inputs = (
+        0.471 * _safe_log_positive(smoothed[valid_xp], methodology)
+        + 0.198 * _safe_log_odds(p10[valid_xp], methodology)
+        + 0.334
+        - 0.067 * _safe_log_positive(counts["down_4_5"][valid_xp], methodology)
+        - 0.077 * _safe_log_odds(p20[valid_xp], methodology)
+    )
+    xp_raw = np.full(len(records), np.nan)
+    xp_raw[valid_xp] = np.exp(
+        _linear_filter(xp_inputs, 0.592, math.log(methodology.xp_initial))
+    )
+
+    xp_raw = _nullable(xp_raw)
+    warning_day = (red_count >= 3) & (state != "red")
+    published = {name: _nullable(values) for name, values in columns.items()}
+    published["index_close"] = [index_closes.get(row["date"]) for row in records]
+    published["mbi_cells"] = [
+        dict(zip(cells, values))
+        for values in zip(*(values.tolist() for values in cells.values()))
+    ]
+    published.update({
+        "mbi_green_count": green_count.tolist(),
+        "mbi_red_count": red_count.tolist(),
+        "mbi_score": score.tolist(),
+        "mbi_state": state.tolist(),
+        "warning_day": warning_day.tolist(),
+        "xp_advancer_count": [row["up_4_5"] for row in records],
+        "xp_decliner_count": [row["down_4_5"] for row in records],
+        "em": [None] * len(records),
+        "xp_smoothed_advances": smoothed.tolist(),
+        "xp_raw": xp_raw,
+        "xp": [
+            value * methodology.xp_output_multiplier if value is not None else None
+            for value in xp_raw
+        ],
+    })
+
+    names = list(published)
+    output = []
+    for raw, values in zip(records, zip(*published.values())):
+        row = dict(raw)
+        row.update(zip(names, values))
         output.append(row)
-        previous = row
-
     return output
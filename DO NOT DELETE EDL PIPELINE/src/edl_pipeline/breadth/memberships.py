@@ -0,0 +1,103 @@
+"""Universe definitions as a boolean membership mask over panel symbols."""
+
+import numpy as np
+
+from .universe import safe_float
+
+
+MARKET_UNIVERSE_KEY = "all"
+# SEBI's categorization ranks listed companies by full market capitalization.
+MARKET_CAP_BUCKETS = (
+    ("large", "Large cap (rank 1-100)", 1, 100),
+    ("mid", "Mid cap (rank 101-250)", 101, 250),
+    ("small", "Small cap (rank 251+)", 251, None),
+)
+
+
+def rows_by_symbol(rows):
+    """Deduplicate raw universe rows with the snapshot's larger-market-cap rule."""
+    selected = {}
+    for row in rows:
+        symbol = str(row.get("Sym") or row.get("Symbol") or "").strip()
+        if not symbol:
+            continue
+        previous = selected.get(symbol)
+        if previous is None:
+            selected[symbol] = row
+            continue
+        previous_cap = safe_float(previous.get("Mcap", previous.get("Market Cap(Cr.)")))
+        current_cap = safe_float(row.get("Mcap", row.get("Market Cap(Cr.)")))
+        if current_cap is not None and (previous_cap is None or current_cap > previous_cap):
+            selected[symbol] = row
+    return selected
+
+
+def market_cap_ranks(rows):
+    """Rank every symbol with a market cap, largest first and ties by symbol."""
+    capped = []
+    for symbol, row in rows_by_symbol(rows).items():
+        market_cap = safe_float(row.get("Mcap", row.get("Market Cap(Cr.)")))
+        if market_cap is not None:
+            capped.append((-market_cap, symbol))
+    return {symbol: rank for rank, (_cap, symbol) in enumerate(sorted(capped), start=1)}
+
+
+def _index_entries(row):
+    entries = row.get("idxlist") or []
+    if not isinstance(entries, list):
+        return []
+    return [
+        (entry.get("Indexid"), entry.get("Name"))
+        for entry in entries
+        if isinstance(entry, dict) and entry.get("Indexid") is not None
+    ]
+
+
+def build_memberships(universe_rows, symbols, industries=None, sme_symbols=None):
+    """Return universe definitions and their ``(universes, symbols)`` mask.
+
+    Universes are the whole eligible market, each index in the ``idxlist``
+    memberships, each sector, each industry when ``industries`` maps symbols
+    to industries, SME versus mainboard when ``sme_symbols`` is known, and
+    market-cap rank buckets.  Only ``symbols`` ever appear in a universe.
+    """
+    rows = rows_by_symbol(universe_rows)
+    ranks = market_cap_ranks(universe_rows)
+    positions = {symbol: position for position, symbol in enumerate(symbols)}
+    definitions = {}
+    members = {}
+
+    def add(key, kind, name, symbol, **extra):
+        if key not in definitions:
+            definitions[key] = {"key": key, "kind": kind, "name": name, **extra}
+            members[key] = []
+        members[key].append(positions[symbol])
+
+    for symbol in symbols:
+        row = rows.get(symbol, {})
+        add(MARKET_UNIVERSE_KEY, "market", "All eligible", symbol)
+        for index_id, name in _index_entries(row):
+            add(f"index:{index_id}", "index", name or str(index_id), symbol, index_id=index_id)
+        sector = row.get("Sector")
+        if sector and sector != "N/A":
+            add(f"sector:{sector}", "sector", sector, symbol)
+        industry = (industries or {}).get(symbol)
+        if industry and industry != "N/A":
+            add(f"industry:{industry}", "industry", industry, symbol)
+        if sme_symbols is not None:
+            board = "SME" if symbol in sme_symbols else "MAINBOARD"
+            add(f"board:{board}", "board", board, symbol)
+        rank = ranks.get(symbol)
+        for bucket, name, first, last in MARKET_CAP_BUCKETS:
+            if rank is not None and rank >= first and (last is None or rank <= last):
+                add(f"market_cap:{bucket}", "market_cap", name, symbol)
+
+    kinds = ("market", "index", "sector", "industry", "board", "market_cap")
+    ordered = sorted(
+        definitions.values(),
+        key=lambda item: (kinds.index(item["kind"]), str(item["name"]), item["key"]),
+    )
+    mask = np.zeros((len(ordered), len(symbols)), dtype=bool)
+    for row, definition in enumerate(ordered):
+        mask[row, members[definition["key"]]] = True
+    return ordered, mask
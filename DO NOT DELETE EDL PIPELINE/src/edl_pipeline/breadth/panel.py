@@ -0,0 +1,280 @@
+"""Date-by-symbol breadth panel and masked cross-sectional reductions.
+
+Each symbol's prepared history is reduced once to compact per-date columns:
+returns stay as floats so thresholds can change, while moving-average,
+extrema, and volume comparisons are stored as small integer codes.  Counts for
+any number of universes are then one matrix product per field against a
+universe-by-symbol membership mask.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ohlcv_utils import symbol_csv_path
+
+from .indicators import prepare_history
+
+
+NO_VALUE = 0
+ABOVE = 1
+BELOW = 2
+EQUAL = 3
+
+EXTREMA_VALID = 1
+EXTREMA_HIGH = 2
+EXTREMA_LOW = 4
+
+MA_TYPES = ("SMA", "EMA")
+EXTREMA_LABELS = (
+    ("Monthly", "monthly_extrema", "new_monthly_high", "new_monthly_low"),
+    ("Quarterly", "quarterly_extrema", "new_quarterly_high", "new_quarterly_low"),
+    ("Yearly", "yearly_extrema", "new_52w_high", "new_52w_low"),
+)
+RETURN_RULES = (
+    (
+        "Return_21",
+        "valid_return_21",
+        (("up_25_month", 25, "gte"), ("down_25_month", -25, "lte"),
+         ("up_50_month", 50, "gte"), ("down_50_month", -50, "lte")),
+    ),
+    ("Return_34", "valid_return_34", (("up_13_34d", 13, "gte"), ("down_13_34d", -13, "lte"))),
+    ("Return_63", "valid_return_63", (("up_25_quarter", 25, "gte"), ("down_25_quarter", -25, "lte"))),
+)
+FLOAT_COLUMNS = ("Close", "Daily_Return", "Return_21", "Return_34", "Return_63")
+
+
+class BreadthPanel:
+    """Aligned per-date columns for a fixed symbol axis.
+
+    ``columns`` maps a column name to a ``(dates, symbols)`` array.  Float
+    columns hold NaN where a symbol has no value; code columns hold
+    ``NO_VALUE``.  A symbol has a candle on a date exactly when its close is
+    present.
+    """
+
+    def __init__(self, dates, symbols, columns, missing_history=(), invalid_history=()):
+        self.dates = np.asarray(dates, dtype=str)
+        self.symbols = tuple(symbols)
+        self.columns = columns
+        self.missing_history = list(missing_history)
+        self.invalid_history = list(invalid_history)
+
+    def candles(self):
+        return ~np.isnan(self.columns["Close"])
+
+
+def point_in_time_eligibility(panel, market_caps, methodology):
+    """Return a boolean ``(dates, symbols)`` mask of historically eligible symbols.
+
+    A symbol's cap on a date is its latest cap scaled by that day's close over
+    its latest close; both the cap floor and the price floor use that date's
+    values.
+    """
+    close = panel.columns["Close"]
+    candles = panel.candles()
+    if not candles.size:
+        return candles
+    last_rows = len(panel.dates) - 1 - np.argmax(candles[::-1], axis=0)
+    latest_close = close[last_rows, np.arange(len(panel.symbols))]
+    caps = np.asarray(
+        [market_caps.get(symbol, np.nan) for symbol in panel.symbols],
+        dtype=float,
+    )
+    with np.errstate(invalid="ignore"):
+        scaled_caps = caps * close / latest_close
+        eligible = (
+            candles
+            & (scaled_caps > methodology.minimum_market_cap_crore)
+            & (close >= methodology.minimum_price)
+        )
+    return eligible
+
+
+def _position_codes(close, average):
+    return np.select(
+        [np.isnan(average), close > average, close < average],
+        [NO_VALUE, ABOVE, BELOW],
+        EQUAL,
+    ).astype(np.int8)
+
+
+def symbol_columns(prepared, methodology):
+    """Reduce one prepared history to the panel's per-date columns."""
+    close = prepared["Close"].to_numpy(dtype=float)
+    columns = {name: prepared[name].to_numpy(dtype=float) for name in FLOAT_COLUMNS}
+
+    for ma_type in MA_TYPES:
+        for period in methodology.ma_periods:
+            average = prepared[f"{ma_type}_{period}"].to_numpy(dtype=float)
+            columns[f"{ma_type}_{period}"] = _position_codes(close, average)
+
+    for label, _valid, _high, _low in EXTREMA_LABELS:
+        valid = (
+            prepared[f"{label}_Reference_High"].notna()
+            & prepared[f"{label}_Reference_Low"].notna()
+        ).to_numpy()
+        high = prepared[f"New_{label}_High"].to_numpy(dtype=bool)
+        low = prepared[f"New_{label}_Low"].to_numpy(dtype=bool)
+        columns[f"{label}_Extrema"] = (
+            valid * EXTREMA_VALID
+            + (valid & high) * EXTREMA_HIGH
+            + (valid & low) * EXTREMA_LOW
+        ).astype(np.int8)
+
+    volume = prepared["Volume"].to_numpy(dtype=float)
+    average_volume = prepared["Volume_SMA_20"].to_numpy(dtype=float)
+    columns["Volume_20"] = np.select(
+        [np.isnan(volume) | np.isnan(average_volume), volume > average_volume],
+        [NO_VALUE, ABOVE],
+        BELOW,
+    ).astype(np.int8)
+    return prepared["Date"].to_numpy(dtype=str), columns
+
+
+def column_names(methodology):
+    """Return every panel column name for ``methodology``."""
+    names = list(FLOAT_COLUMNS)
+    names.extend(
+        f"{ma_type}_{period}" for ma_type in MA_TYPES for period in methodology.ma_periods
+    )
+    names.extend(f"{label}_Extrema" for label, *_fields in EXTREMA_LABELS)
+    names.append("Volume_20")
+    return names
+
+
+def assemble_panel(histories, methodology, missing_history=(), invalid_history=()):
+    """Align ``{symbol: (dates, columns)}`` on the union of their dates."""
+    symbols = list(histories)
+    names = column_names(methodology)
+    if histories:
+        dates = np.unique(np.concatenate([history[0] for history in histories.values()]))
+    else:
+        dates = np.asarray([], dtype=str)
+
+    columns = {}
+    for name in names:
+        if name in FLOAT_COLUMNS:
+            columns[name] = np.full((len(dates), len(symbols)), np.nan)
+        else:
+            columns[name] = np.full((len(dates), len(symbols)), NO_VALUE, dtype=np.int8)
+    for position, symbol in enumerate(symbols):
+        symbol_dates, values = histories[symbol]
+        rows = np.searchsorted(dates, symbol_dates)
+        for name in names:
+            columns[name][rows, position] = values[name]
+    return BreadthPanel(dates, symbols, columns, missing_history, invalid_history)
+
+
+def build_panel(symbols, ohlcv_dir, methodology, feature_cache=None):
+    """Read each symbol's history once and return the aligned panel.
+
+    Symbols without a CSV are reported in ``missing_history``; unreadable or
+    empty histories in ``invalid_history``.  Neither appears on the symbol axis.
+    """
+    ohlcv_root = Path(ohlcv_dir)
+    histories = {}
+    missing_history = []
+    invalid_history = []
+
+    for symbol in symbols:
+        csv_path = symbol_csv_path(ohlcv_root, symbol)
+        if not csv_path.exists():
+            missing_history.append(symbol)
+            continue
+        try:
+            if feature_cache is not None:
+                prepared = feature_cache.load(csv_path)
+            else:
+                prepared = prepare_history(pd.read_csv(csv_path), methodology)
+        except Exception as error:
+            invalid_history.append({"symbol": symbol, "error": str(error)})
+            continue
+        if prepared.empty:
+            invalid_history.append({"symbol": symbol, "error": "empty normalized history"})
+            continue
+        histories[symbol] = symbol_columns(prepared, methodology)
+
+    return assemble_panel(histories, methodology, missing_history, invalid_history)
+
+
+def _count_indicators(panel, methodology):
+    """Yield ``(field, indicator)`` pairs in breadth record field order."""
+    columns = panel.columns
+    returns = columns["Daily_Return"]
+    threshold = methodology.advance_threshold
+    extreme = methodology.extreme_advance_threshold
+
+    yield "eligible_with_candle", panel.candles()
+    yield "valid_return", ~np.isnan(returns)
+    yield "advances", returns > 0
+    yield "declines", returns < 0
+    yield "unchanged", returns == 0
+    yield "up_4", returns >= threshold
+    yield "down_4", returns < -threshold
+    yield "up_4_5", returns >= extreme
+    yield "down_4_5", returns < -extreme
+
+    for label, valid_name, high_field, low_field in EXTREMA_LABELS:
+        codes = columns[f"{label}_Extrema"]
+        yield f"valid_{valid_name}", (codes & EXTREMA_VALID).astype(bool)
+        yield high_field, (codes & EXTREMA_HIGH).astype(bool)
+        yield low_field, (codes & EXTREMA_LOW).astype(bool)
+
+    volume = columns["Volume_20"]
+    yield "valid_volume_20", volume != NO_VALUE
+    yield "volume_above_20", volume == ABOVE
+    yield "volume_below_or_equal_20", volume == BELOW
+
+    for column, valid_field, rules in RETURN_RULES:
+        values = columns[column]
+        yield valid_field, ~np.isnan(values)
+        for field, limit, operator in rules:
+            yield field, values >= limit if operator == "gte" else values <= limit
+
+    for ma_type in MA_TYPES:
+        prefix = ma_type.lower()
+        for period in methodology.ma_periods:
+            codes = columns[f"{ma_type}_{period}"]
+            yield f"valid_{prefix}_{period}", codes != NO_VALUE
+            yield f"above_{prefix}_{period}", codes == ABOVE
+            yield f"below_{prefix}_{period}", codes == BELOW
+            yield f"equal_{prefix}_{period}", codes == EQUAL
+
+
+def count_panel(panel, methodology, memberships=None, eligibility=None):
+    """Return ``{field: (dates, universes)}`` integer counts.
+
+    ``memberships`` is a boolean ``(universes, symbols)`` mask and defaults to
+    a single universe holding every symbol.  ``eligibility`` optionally gates
+    each ``(date, symbol)`` cell before counting, as a boolean array.
+    """
+    if memberships is None:
+        memberships = np.ones((1, len(panel.symbols)), dtype=bool)
+    weights = np.asarray(memberships, dtype=np.float32).T
+    counts = {}
+    for field, indicator in _count_indicators(panel, methodology):
+        if eligibility is not None:
+            indicator = indicator & eligibility
+        counts[field] = np.rint(indicator.astype(np.float32) @ weights).astype(np.int64)
+    return counts
+
+
+def panel_records(panel, counts, universe=0):
+    """Return one universe's counts as dated records, skipping dates without candles."""
+    active = counts["eligible_with_candle"][:, universe] > 0
+    fields = list(counts)
+    values = [counts[field][active, universe].tolist() for field in fields]
+    return [
+        {"date": date, **dict(zip(fields, row))}
+        for date, row in zip(panel.dates[active].tolist(), zip(*values))
+    ]
+
+
+def aggregate_panel(panel, methodology, memberships=None, eligibility=None):
+    """Return breadth records for every universe in ``memberships``."""
+    counts = count_panel(panel, methodology, memberships, eligibility)
+    universes = next(iter(counts.values())).shape[1]
+    return [panel_records(panel, counts, universe) for universe in range(universes)]
+
@@ -1,19 +1,22 @@
 """End-to-end breadth artifact generation."""
 
 from datetime import datetime, timezone
+import gzip
 import json
 import math
 import numbers
 from pathlib import Path
 from tempfile import NamedTemporaryFile
 
+import numpy as np
 import pandas as pd
 
-from .aggregates import BreadthAccumulator
-from .indicators import prepare_history
+from .indicators import indicator_windows
+from .indices import index_csv_paths
 from .mbi import enrich_records
-from .universe import build_universe_snapshot
-from ohlcv_utils import symbol_csv_path
+from .memberships import build_memberships
+from .panel import aggregate_panel, build_panel, point_in_time_eligibility
+from .universe import build_universe_snapshot, history_symbols, snapshot_market_caps
 
 
 TRADINGVIEW_TABLE_SCHEMA = [
@@ -43,19 +46,26 @@ TRADINGVIEW_TABLE_SCHEMA = [
 ]
 
 
-def _save_json(path, data):
-    """Write JSON atomically without coupling the calculation package to HTTP helpers."""
+def save_json(path, data):
+    """Write JSON atomically without coupling the calculation package to HTTP helpers.
+
+    A ``.gz`` path is written as compact, gzip-compressed JSON.
+    """
     resolved = Path(path)
     resolved.parent.mkdir(parents=True, exist_ok=True)
     with NamedTemporaryFile(
-        "w",
-        encoding="utf-8",
+        "wb",
         delete=False,
         dir=resolved.parent,
         prefix=f".{resolved.name}.",
         suffix=".tmp",
     ) as handle:
-        json.dump(data, handle, indent=2, ensure_ascii=False, allow_nan=False)
+        if resolved.suffix == ".gz":
+            text = json.dumps(data, separators=(",", ":"), ensure_ascii=False, allow_nan=False)
+            with gzip.GzipFile(fileobj=handle, mode="wb", compresslevel=6, mtime=0) as compressed:
+                compressed.write(text.encode("utf-8"))
+        else:
+            handle.write(json.dumps(data, indent=2, ensure_ascii=False, allow_nan=False).encode("utf-8"))
         temporary = Path(handle.name)
     try:
         temporary.replace(resolved)
@@ -96,6 +106,85 @@ def _round_value(value, digits):
     return value
 
 
+def _publish_records(records, methodology):
+    if methodology.output_sessions:
+        records = records[-methodology.output_sessions:]
+    return [
+        {key: _round_value(value, methodology.rounding_digits) for key, value in row.items()}
+        for row in records
+    ]
+
+
+def _check_feature_cache(feature_cache, methodology):
+    if feature_cache is not None and feature_cache.spec["windows"] != indicator_windows(methodology):
+        raise ValueError("Feature cache windows do not match the breadth methodology.")
+
+
+def load_breadth_panel(snapshot, ohlcv_dir, methodology, feature_cache=None):
+    """Load every history symbol in ``snapshot`` into one breadth panel."""
+    _check_feature_cache(feature_cache, methodology)
+    return build_panel(history_symbols(snapshot), ohlcv_dir, methodology, feature_cache)
+
+
+def _eligibility(snapshot, panel, methodology):
+    if methodology.universe_mode != "point_in_time":
+        return None
+    return point_in_time_eligibility(panel, snapshot_market_caps(snapshot), methodology)
+
+
+def _history_mask(snapshot, panel):
+    symbols = set(history_symbols(snapshot))
+    return np.asarray([symbol in symbols for symbol in panel.symbols], dtype=bool)
+
+
+def _history_quality(snapshot, panel):
+    """Report history coverage for ``snapshot``, which may use part of ``panel``."""
+    symbols = set(history_symbols(snapshot))
+    missing_history = [symbol for symbol in panel.missing_history if symbol in symbols]
+    invalid_history = [item for item in panel.invalid_history if item["symbol"] in symbols]
+    return {
+        "universe_mode": snapshot["universe_mode"],
+        "eligible_symbols": snapshot["eligible_count"],
+        "history_symbols": len(symbols),
+        "processed_symbols": int(_history_mask(snapshot, panel).sum()),
+        "missing_history_count": len(missing_history),
+        "missing_history_symbols": missing_history,
+        "invalid_history_count": len(invalid_history),
+        "invalid_history": invalid_history,
+    }
+
+
+def build_breadth_artifact(snapshot, panel, methodology, index_csv, index_closes, generated_at):
+    """Count, enrich and package one methodology's series from a loaded panel."""
+    eligibility = _eligibility(snapshot, panel, methodology)
+    records = enrich_records(
+        aggregate_panel(panel, methodology, [_history_mask(snapshot, panel)], eligibility)[0],
+        methodology,
+        index_closes,
+    )
+    rounded_records = _publish_records(records, methodology)
+    return {
+        "generated_at": generated_at,
+        "methodology": methodology.to_dict(),
+        "table_schema": TRADINGVIEW_TABLE_SCHEMA,
+        "table_notes": {
+            "selected_ma_type": methodology.default_ma_type,
+            "default_index_symbol": "NIFTY",
+            "all_index_history_artifact": "all_indices_history_v2.json.gz",
+        },
+        "source": {
+            "universe": "Dhan ScanX customscan/fetchdt snapshot",
+            "equity_history": "Dhan openweb-ticks getDataH normalized OHLCV cache",
+            "index_history": str(index_csv),
+        },
+        "quality": {
+            **_history_quality(snapshot, panel),
+            "record_count": len(rounded_records),
+        },
+        "records": rounded_records,
+    }
+
+
 def generate_market_breadth(
     universe_rows,
     ohlcv_dir,
@@ -104,72 +193,126 @@ def generate_market_breadth(
     output_path,
     snapshot_path,
     generated_at=None,
+    feature_cache=None,
+    panel=None,
+    snapshot=None,
 ):
-    """Generate the versioned breadth series and its exact universe snapshot."""
+    """Generate the versioned breadth series and its exact universe snapshot.
+
+    ``feature_cache`` may supply precomputed per-symbol features; it must have
+    been built with the same indicator windows as ``methodology``.  A ``panel``
+    already loaded with at least the snapshot's history symbols is reused
+    instead of reading history, and a ``snapshot`` already built from
+    ``universe_rows`` is saved as is.
+    """
     methodology.validate()
+    _check_feature_cache(feature_cache, methodology)
     generated_at = generated_at or datetime.now(timezone.utc).isoformat()
-    snapshot = build_universe_snapshot(universe_rows, methodology, generated_at)
-    _save_json(snapshot_path, snapshot)
-
-    accumulator = BreadthAccumulator(methodology)
-    missing_history = []
-    invalid_history = []
-    processed_symbols = []
-    ohlcv_root = Path(ohlcv_dir)
-
-    for stock in snapshot["eligible"]:
-        symbol = stock["symbol"]
-        csv_path = symbol_csv_path(ohlcv_root, symbol)
-        if not csv_path.exists():
-            missing_history.append(symbol)
-            continue
-        try:
-            prepared = prepare_history(pd.read_csv(csv_path), methodology)
-        except Exception as error:
-            invalid_history.append({"symbol": symbol, "error": str(error)})
-            continue
-        if prepared.empty:
-            invalid_history.append({"symbol": symbol, "error": "empty normalized history"})
-            continue
-        accumulator.update(prepared)
-        processed_symbols.append(symbol)
+    if snapshot is None:
+        snapshot = build_universe_snapshot(universe_rows, methodology, generated_at)
+    save_json(snapshot_path, snapshot)
 
-    records = enrich_records(
-        accumulator.records(),
+    if panel is None:
+        panel = load_breadth_panel(snapshot, ohlcv_dir, methodology, feature_cache)
+    artifact = build_breadth_artifact(
+        snapshot,
+        panel,
         methodology,
+        index_csv,
         load_index_closes(index_csv),
+        generated_at,
     )
-    if methodology.output_sessions:
-        records = records[-methodology.output_sessions:]
-    rounded_records = [
-        {key: _round_value(value, methodology.rounding_digits) for key, value in row.items()}
-        for row in records
-    ]
+    save_json(output_path, artifact)
+    return artifact, snapshot
+
+
+def generate_universe_breadth(
+    universe_rows,
+    ohlcv_dir,
+    index_csv,
+    methodology,
+    output_path,
+    index_rows=(),
+    indices_dir=None,
+    industries=None,
+    sme_symbols=None,
+    generated_at=None,
+    feature_cache=None,
+    panel=None,
+    snapshot=None,
+):
+    """Generate breadth for every index, sector, industry, board and cap bucket.
+
+    All universes share one panel and are counted together as masked
+    reductions.  Index universes are benchmarked against their own history
+    from ``index_rows``/``indices_dir``; every other universe uses
+    ``index_csv``.  A ``snapshot`` from ``generate_market_breadth`` is reused
+    instead of rebuilding it.  Name ``output_path`` ``*.json.gz``: several
+    hundred universes of daily rows are too large for indented JSON.
+    """
+    methodology.validate()
+    _check_feature_cache(feature_cache, methodology)
+    generated_at = generated_at or datetime.now(timezone.utc).isoformat()
+    if snapshot is None:
+        snapshot = build_universe_snapshot(universe_rows, methodology, generated_at)
+    if panel is None:
+        panel = load_breadth_panel(snapshot, ohlcv_dir, methodology, feature_cache)
+
+    definitions, mask = build_memberships(
+        universe_rows,
+        panel.symbols,
+        industries=industries,
+        sme_symbols=sme_symbols,
+    )
+    mask = mask & _history_mask(snapshot, panel)
+    populated = mask.any(axis=1)
+    definitions = [item for item, keep in zip(definitions, populated) if keep]
+    mask = mask[populated]
+    index_paths = index_csv_paths(index_rows, indices_dir) if indices_dir else {}
+    default_closes = load_index_closes(index_csv)
+    eligibility = _eligibility(snapshot, panel, methodology)
+    counted = aggregate_panel(panel, methodology, mask, eligibility)
+
+    universes = []
+    missing_index_history = []
+    for definition, members, records in zip(definitions, mask, counted):
+        index_history = index_csv
+        index_closes = default_closes
+        if definition["kind"] == "index":
+            index_history = index_paths.get(str(definition["index_id"]))
+            try:
+                index_closes = load_index_closes(index_history) if index_history else {}
+            except (FileNotFoundError, ValueError):
+                index_closes = {}
+            if not index_closes:
+                index_history = None
+                missing_index_history.append(definition["key"])
+        universes.append({
+            **definition,
+            "member_count": int(members.sum()),
+            "index_history": str(index_history) if index_history else None,
+            "records": _publish_records(
+                enrich_records(records, methodology, index_closes),
+                methodology,
+            ),
+        })
 
     artifact = {
         "generated_at": generated_at,
         "methodology": methodology.to_dict(),
         "table_schema": TRADINGVIEW_TABLE_SCHEMA,
-        "table_notes": {
-            "selected_ma_type": methodology.default_ma_type,
-            "default_index_symbol": "NIFTY",
-            "all_index_history_artifact": "all_indices_history_v2.json.gz",
-        },
         "source": {
             "universe": "Dhan ScanX customscan/fetchdt snapshot",
+            "memberships": "fetchdt idxlist, Sector, industry and SME listings, market-cap rank",
             "equity_history": "Dhan openweb-ticks getDataH normalized OHLCV cache",
-            "index_history": str(index_csv),
+            "default_index_history": str(index_csv),
         },
         "quality": {
-            "eligible_symbols": snapshot["eligible_count"],
-            "processed_symbols": len(processed_symbols),
-            "missing_history_count": len(missing_history),
-            "missing_history_symbols": missing_history,
-            "invalid_history_count": len(invalid_history),
-            "invalid_history": invalid_history,
-            "record_count": len(rounded_records),
+            **_history_quality(snapshot, panel),
+            "universe_count": len(universes),
+            "missing_index_history": missing_index_history,
         },
-        "records": rounded_records,
+        "universes": universes,
     }
-    _save_json(output_path, artifact)
-    return artifact, snapshot
+    save_json(output_path, artifact)
+    return artifact
@@ -1,9 +1,12 @@
-"""Build and audit the latest-snapshot breadth universe."""
+"""Build and audit the breadth universe snapshot."""
 
 from datetime import datetime, timezone
 import math
 
 
+THRESHOLD_REASONS = frozenset({"price_below_minimum", "market_cap_not_strictly_greater"})
+
+
 def safe_float(value):
     try:
         number = float(value)
@@ -77,9 +80,10 @@ def build_universe_snapshot(rows, methodology, generated_at=None):
     eligible = [item for item in audited if item["eligible"]]
     excluded = [item for item in audited if not item["eligible"]]
 
-    return {
+    snapshot = {
         "generated_at": generated_at,
         "methodology_version": methodology.version,
+        "universe_mode": methodology.universe_mode,
         "filters": {
             "latest_price_greater_than_or_equal_to": methodology.minimum_price,
             "market_cap_crore_strictly_greater_than": methodology.minimum_market_cap_crore,
@@ -92,3 +96,30 @@ def build_universe_snapshot(rows, methodology, generated_at=None):
         "eligible": eligible,
         "excluded": excluded,
     }
+    if methodology.universe_mode == "point_in_time":
+        # Today's price and cap filters are re-applied per date, so every
+        # identifiable stock with a market cap is a history candidate.
+        candidates = [
+            item["symbol"]
+            for item in audited
+            if set(item["exclusion_reasons"]) <= THRESHOLD_REASONS
+        ]
+        snapshot["history_candidate_count"] = len(candidates)
+        snapshot["history_candidates"] = candidates
+    return snapshot
+
+
+def history_symbols(snapshot):
+    """Return the symbols whose OHLCV history feeds the breadth counts."""
+    if "history_candidates" in snapshot:
+        return list(snapshot["history_candidates"])
+    return [stock["symbol"] for stock in snapshot["eligible"]]
+
+
+def snapshot_market_caps(snapshot):
+    """Map every audited symbol to its latest market cap in crore."""
+    return {
+        stock["symbol"]: stock["market_cap_crore"]
+        for stock in (*snapshot["eligible"], *snapshot["excluded"])
+        if stock["market_cap_crore"] is not None
+    }
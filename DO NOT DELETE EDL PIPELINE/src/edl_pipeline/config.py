@@ -20,11 +20,30 @@ def env_bool(name, default):
     return default
 
 
+def env_int(name, default, minimum=None):
+    """Read an integer env var while preserving the supplied default."""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+
+    try:
+        parsed = int(value.strip())
+    except ValueError:
+        parsed = None
+    if parsed is None or (minimum is not None and parsed < minimum):
+        print(f"  WARNING: Ignoring invalid {name}={value!r}; using {default}.")
+        return default
+    return parsed
+
+
 @dataclass(frozen=True)
 class PipelineConfig:
     fetch_ohlcv: bool = True
     fetch_optional: bool = False
     cleanup_intermediate: bool = True
+    unified_crawl: bool = False
+    local_indicators: bool = False
+    http_cache: bool = False
 
     @classmethod
     def from_env(cls):
@@ -32,4 +51,7 @@ class PipelineConfig:
             fetch_ohlcv=env_bool("EDL_FETCH_OHLCV", True),
             fetch_optional=env_bool("EDL_FETCH_OPTIONAL", False),
             cleanup_intermediate=env_bool("EDL_CLEANUP_INTERMEDIATE", True),
+            unified_crawl=env_bool("EDL_UNIFIED_CRAWL", False),
+            local_indicators=env_bool("EDL_LOCAL_INDICATORS", False),
+            http_cache=env_bool("EDL_HTTP_CACHE", False),
         )
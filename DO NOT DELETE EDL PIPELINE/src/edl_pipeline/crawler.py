@@ -0,0 +1,249 @@
+"""One scheduler for every per-ISIN endpoint.
+
+Each per-ISIN fetcher registers an ``Endpoint``: a function that fetches one
+master-map item, a per-endpoint concurrency cap, and a ``finish`` hook that
+writes the endpoint's usual output from the collected results.  ``Crawler``
+runs every endpoint's tasks on one worker pool, interleaving them in item
+priority order, so the slowest endpoint no longer runs alone at the end of
+its own pass.  All workers share ``pipeline_utils.http_session``'s connection
+pool and an optional global rate limit; outcomes are counted per endpoint.
+"""
+
+from collections import Counter, deque
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Callable, Optional
+
+
+# Statuses that leave an ISIN's data current; throttled ("rate_limit"),
+# failed ("http_<code>") and errored fetches do not count as coverage.
+COVERED_STATUSES = ("success", "unchanged", "empty", "skipped")
+
+
+def default_status(result):
+    """Status strings pass through; other results count as success when truthy."""
+    if isinstance(result, str):
+        return result
+    return "success" if result else "empty"
+
+
+@dataclass
+class Endpoint:
+    name: str
+    fetch: Callable
+    finish: Optional[Callable] = None
+    max_concurrency: int = 16
+    status: Callable = default_status
+
+
+@dataclass
+class CrawlReport:
+    results: dict
+    statuses: dict
+    totals: dict
+    cancelled: bool = False
+    elapsed: float = 0.0
+    timings: dict = field(default_factory=dict)
+    outcomes: dict = field(default_factory=dict)
+    timed_out: bool = False
+
+    def covered_isins(self, name, covered=COVERED_STATUSES):
+        """Return ISINs ``name`` finished with one of the ``covered`` statuses."""
+        return {item.get("ISIN") for item, status in self.outcomes.get(name, []) if status in covered}
+
+    def summary(self):
+        return {
+            name: {
+                "total": self.totals[name],
+                "done": sum(self.statuses[name].values()),
+                "statuses": dict(self.statuses[name]),
+                "busy_seconds": round(self.timings.get(name, 0.0), 3),
+            }
+            for name in self.totals
+        }
+
+
+class RateLimiter:
+    """Token bucket shared by all workers; ``rate`` is tasks per second."""
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1.0, rate))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self, cancelled=None):
+        """Wait for a token; return False if ``cancelled`` is set while waiting."""
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if cancelled is not None and cancelled.wait(wait):
+                return False
+            if cancelled is None:
+                self.sleep(wait)
+
+
+class Crawler:
+    """Run every endpoint's per-item tasks on one shared, priority-ordered pool."""
+
+    def __init__(self, endpoints, workers=64, rate=None, progress_every=500, log=print):
+        self.endpoints = list(endpoints)
+        self.workers = max(1, workers)
+        self.limiter = RateLimiter(rate) if rate else None
+        self.progress_every = progress_every
+        self.log = log
+        self.cancelled = threading.Event()
+        self._condition = threading.Condition()
+        self._queues = []
+        self._in_flight = []
+        self._statuses = {}
+        self._totals = {}
+        self._completed = 0
+
+    def cancel(self):
+        """Stop handing out tasks; running tasks finish and ``run`` returns."""
+        self.cancelled.set()
+        with self._condition:
+            self._condition.notify_all()
+
+    def progress(self):
+        """Return ``{endpoint: {"done", "total", "statuses"}}`` for the current run."""
+        with self._condition:
+            return {
+                name: {
+                    "done": sum(statuses.values()),
+                    "total": self._totals[name],
+                    "statuses": dict(statuses),
+                }
+                for name, statuses in self._statuses.items()
+            }
+
+    def _next_task(self):
+        """Pop the highest-priority task whose endpoint is below its concurrency cap."""
+        with self._condition:
+            while not self.cancelled.is_set():
+                best = None
+                for index, queue in enumerate(self._queues):
+                    if queue and self._in_flight[index] < self.endpoints[index].max_concurrency:
+                        if best is None or queue[0][0] < self._queues[best][0][0]:
+                            best = index
+                if best is not None:
+                    self._in_flight[best] += 1
+                    rank, item = self._queues[best].popleft()
+                    return best, rank, item
+                if not any(self._queues):
+                    return None
+                self._condition.wait()
+            return None
+
+    def _log_progress(self):
+        parts = []
+        for name, statuses in self._statuses.items():
+            done = sum(statuses.values())
+            parts.append(f"{name} {done}/{self._totals[name]} (ok {statuses.get('success', 0)})")
+        total = sum(self._totals.values())
+        self.log(f"[{self._completed}/{total}] " + " | ".join(parts))
+
+    def _work(self, results, timings, outcomes):
+        while True:
+            task = self._next_task()
+            if task is None:
+                return
+            index, rank, item = task
+            endpoint = self.endpoints[index]
+            if self.limiter is not None and not self.limiter.acquire(self.cancelled):
+                with self._condition:
+                    self._queues[index].appendleft((rank, item))
+                    self._in_flight[index] -= 1
+                    self._condition.notify_all()
+                return
+            started = time.monotonic()
+            try:
+                result = endpoint.fetch(item)
+                status = endpoint.status(result)
+            except Exception:
+                result, status = None, "error"
+            elapsed = time.monotonic() - started
+            with self._condition:
+                self._in_flight[index] -= 1
+                results[endpoint.name].append((item, result))
+                outcomes[endpoint.name].append((item, status))
+                timings[endpoint.name] += elapsed
+                self._statuses[endpoint.name][status] += 1
+                self._completed += 1
+                if self.progress_every and self._completed % self.progress_every == 0:
+                    self._log_progress()
+                self._condition.notify_all()
+
+    def run(self, items, priority=None, budget=None):
+        """Fetch every item from every endpoint and call each ``finish`` hook.
+
+        ``priority`` maps an item to a sort key (lower runs first); the default
+        keeps input order.  Items are interleaved across endpoints by that
+        order.  ``budget`` is a time limit in seconds: once it passes, no new
+        tasks start and the run stops after in-flight requests return.
+        ``finish`` hooks run with whatever was collected, including after
+        ``cancel`` or an exhausted budget.
+        """
+        items = list(items)
+        order = sorted(range(len(items)), key=lambda index: priority(items[index])) if priority else range(len(items))
+        ranked = [(rank, items[index]) for rank, index in enumerate(order)]
+        self.cancelled.clear()
+        self._queues = [deque(ranked) for _ in self.endpoints]
+        self._in_flight = [0 for _ in self.endpoints]
+        self._statuses = {endpoint.name: Counter() for endpoint in self.endpoints}
+        self._totals = {endpoint.name: len(ranked) for endpoint in self.endpoints}
+        self._completed = 0
+        results = {endpoint.name: [] for endpoint in self.endpoints}
+        timings = {endpoint.name: 0.0 for endpoint in self.endpoints}
+        outcomes = {endpoint.name: [] for endpoint in self.endpoints}
+
+        start = time.monotonic()
+        deadline = start + budget if budget else None
+        timed_out = False
+        threads = [
+            threading.Thread(target=self._work, args=(results, timings, outcomes), daemon=True)
+            for _ in range(min(self.workers, sum(len(queue) for queue in self._queues)))
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+                    if deadline is not None and not self.cancelled.is_set() and time.monotonic() >= deadline:
+                        self.log(f"Time budget of {budget:g}s reached: finishing in-flight requests...")
+                        timed_out = True
+                        self.cancel()
+        except KeyboardInterrupt:
+            self.log("Cancelling crawl: waiting for in-flight requests...")
+            self.cancel()
+            for thread in threads:
+                thread.join()
+        if self.progress_every and self._completed % self.progress_every:
+            self._log_progress()
+
+        for endpoint in self.endpoints:
+            if endpoint.finish is not None:
+                endpoint.finish(results[endpoint.name])
+
+        return CrawlReport(
+            results=results,
+            statuses={name: Counter(statuses) for name, statuses in self._statuses.items()},
+            totals=dict(self._totals),
+            cancelled=self.cancelled.is_set(),
+            elapsed=time.monotonic() - start,
+            timings=timings,
+            outcomes=outcomes,
+            timed_out=timed_out,
+        )
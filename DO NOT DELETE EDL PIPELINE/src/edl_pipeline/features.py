@@ -0,0 +1,210 @@
+"""Compute-once per-symbol OHLCV features shared by every OHLCV consumer.
+
+The cache stores one compressed ``.npz`` file per symbol, keyed by the SHA-256
+of the source CSV and by the indicator windows that shaped it.  All features
+are causal, so consumers may drop trailing rows (for example a copied weekend
+snapshot) or select dates without recomputing anything.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+import numpy as np
+import pandas as pd
+
+from pipeline_utils import BASE_PATH
+
+from .breadth.config import BreadthMethodology, load_methodology
+from .breadth.indicators import indicator_windows, prepare_history
+from .config import env_int
+from .reporting import print_symbol_errors
+
+FEATURE_CACHE_VERSION = 2
+FEATURE_CACHE_DIR = BASE_PATH / "feature_cache"
+OHLCV_DIR = BASE_PATH / "ohlcv_data"
+METHODOLOGY_FILE = BASE_PATH / "breadth_methodology.json"
+META_KEY = "__meta__"
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def feature_spec(methodology):
+    """Return everything besides the OHLCV content that changes cached values."""
+    return {"version": FEATURE_CACHE_VERSION, "windows": indicator_windows(methodology)}
+
+
+def build_features(frame, methodology=None):
+    """Normalize OHLCV and compute the superset of per-symbol features."""
+    methodology = methodology or BreadthMethodology()
+    df = prepare_history(frame, methodology)
+    if df.empty:
+        return df
+
+    df["True_Range"] = pd.concat([
+        df["High"] - df["Low"],
+        (df["High"] - df["Prev_Close"]).abs(),
+        (df["Low"] - df["Prev_Close"]).abs(),
+    ], axis=1).max(axis=1)
+    df["ATR_14"] = df["True_Range"].ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    df["Daily_Range_Pct"] = ((df["High"] - df["Low"]) / df["Low"]) * 100
+    df["EMA_Volume_200"] = df["Volume"].ewm(span=200, adjust=False).mean()
+    df["High_252"] = df["High"].rolling(252, min_periods=252).max()
+    df["Low_252"] = df["Low"].rolling(252, min_periods=252).min()
+    df["MACD"] = (
+        df["Close"].ewm(span=12, adjust=False, min_periods=12).mean()
+        - df["Close"].ewm(span=26, adjust=False, min_periods=26).mean()
+    )
+    df["MACD_Signal"] = df["MACD"].ewm(span=9, adjust=False, min_periods=9).mean()
+    return df
+
+
+class FeatureCache:
+    """Per-symbol feature frames keyed by the content hash of each OHLCV CSV."""
+
+    def __init__(self, cache_dir=FEATURE_CACHE_DIR, methodology=None):
+        self.cache_dir = Path(cache_dir)
+        self.methodology = methodology or BreadthMethodology()
+        self.spec = feature_spec(self.methodology)
+
+    def cache_path(self, csv_path):
+        return self.cache_dir / f"{Path(csv_path).stem}.npz"
+
+    def _read(self, csv_path, digest):
+        path = self.cache_path(csv_path)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                meta = json.loads(str(archive[META_KEY]))
+                if meta.get("source_sha256") != digest or meta.get("spec") != self.spec:
+                    return None
+                return pd.DataFrame({column: archive[column] for column in meta["columns"]})
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write(self, csv_path, digest, features):
+        path = self.cache_path(csv_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "source_sha256": digest,
+            "spec": self.spec,
+            "columns": list(features.columns),
+        }
+        arrays = {column: features[column].to_numpy() for column in features.columns}
+        arrays["Date"] = features["Date"].to_numpy(dtype=str)
+        with NamedTemporaryFile(
+            delete=False,
+            dir=path.parent,
+            prefix=f".{path.name}.",
+            suffix=".tmp",
+        ) as handle:
+            np.savez_compressed(handle, **{META_KEY: np.array(json.dumps(meta))}, **arrays)
+            temporary = Path(handle.name)
+        try:
+            temporary.replace(path)
+        except Exception:
+            temporary.unlink(missing_ok=True)
+            raise
+
+    def _load(self, csv_path):
+        raw = Path(csv_path).read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        cached = self._read(csv_path, digest)
+        if cached is not None:
+            return cached, True
+        features = build_features(pd.read_csv(io.BytesIO(raw)), self.methodology)
+        self._write(csv_path, digest, features)
+        return features, False
+
+    def load(self, csv_path):
+        """Return features for one CSV, rebuilding them when its content changed."""
+        return self._load(csv_path)[0]
+
+    def ensure(self, csv_path):
+        """Make sure features for one CSV are cached and report whether they were."""
+        return "cached" if self._load(csv_path)[1] else "built"
+
+
+def load_features(csv_path, feature_cache=None):
+    """Load features for one OHLCV CSV, through the cache when one is given."""
+    if feature_cache is not None:
+        return feature_cache.load(csv_path)
+    return build_features(pd.read_csv(csv_path))
+
+
+def complete_ohlcv_features(features, feature_cache=None):
+    """Return features computed over rows with every OHLCV field present.
+
+    Cached features keep any row with a close, as breadth does.  When some of
+    those rows lack another field, the features are rebuilt from the complete
+    rows alone so rolling values never include the dropped rows.
+    """
+    complete = features[OHLCV_COLUMNS].notna().all(axis=1)
+    if complete.all():
+        return features
+    methodology = feature_cache.methodology if feature_cache is not None else None
+    return build_features(features.loc[complete, ["Date", *OHLCV_COLUMNS]], methodology)
+
+
+def default_feature_cache():
+    """Return the cache configured with the published breadth methodology."""
+    methodology = load_methodology(METHODOLOGY_FILE) if METHODOLOGY_FILE.exists() else None
+    return FeatureCache(FEATURE_CACHE_DIR, methodology)
+
+
+def _ensure_many(feature_cache, csv_paths):
+    statuses = {}
+    for csv_path in csv_paths:
+        try:
+            statuses[Path(csv_path).stem] = feature_cache.ensure(csv_path)
+        except Exception as error:
+            statuses[Path(csv_path).stem] = f"error: {type(error).__name__}: {error}"
+    return statuses
+
+
+def build_feature_cache(ohlcv_dir=OHLCV_DIR, feature_cache=None, workers=None, chunk_size=64):
+    """Build missing or stale cache entries and prune entries without a CSV."""
+    feature_cache = feature_cache or default_feature_cache()
+    csv_paths = sorted(Path(ohlcv_dir).glob("*.csv"))
+    chunks = [csv_paths[i:i + chunk_size] for i in range(0, len(csv_paths), chunk_size)]
+    workers = workers or env_int("EDL_FEATURE_WORKERS", os.cpu_count() or 1, minimum=1)
+
+    statuses = {}
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            statuses.update(_ensure_many(feature_cache, chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(_ensure_many, [feature_cache] * len(chunks), chunks):
+                statuses.update(result)
+
+    symbols = {path.stem for path in csv_paths}
+    pruned = 0
+    if feature_cache.cache_dir.exists():
+        for path in feature_cache.cache_dir.glob("*.npz"):
+            if path.stem not in symbols:
+                path.unlink()
+                pruned += 1
+    return statuses, pruned
+
+
+def main():
+    if not OHLCV_DIR.exists():
+        print("Error: ohlcv_data is missing. Run fetch_all_ohlcv.py first.")
+        return False
+
+    statuses, pruned = build_feature_cache()
+    built = sum(1 for status in statuses.values() if status == "built")
+    cached = sum(1 for status in statuses.values() if status == "cached")
+    errors = {
+        symbol: status.removeprefix("error: ")
+        for symbol, status in statuses.items()
+        if status.startswith("error")
+    }
+    print(f"Feature cache: {built} built | {cached} unchanged | {len(errors)} failed | {pruned} pruned")
+    print_symbol_errors(errors)
+    return True
@@ -0,0 +1,75 @@
+"""Trace which ScanX dashboard fields the pipeline actually reads.
+
+``fetch_dhan_data.py`` writes the dashboard rows to ``dhan_data_response.json``
+and every other stage reads them from there.  The consumers are the modules
+that name that file, plus ``ROW_HELPER_MODULES`` they hand the rows to.  A
+field counts as used when one of those modules spells its name as a string
+literal (``row.get("Mcap")``, ``tech["Sym"]``, a field tuple, ...), which
+over-approximates usage but never misses a plain lookup.
+
+``field_usage`` compares that set with ``DASHBOARD_CATALOGUE``, everything the
+endpoint can serve, and with ``DASHBOARD_QUERY.fields``, the projection that is
+actually requested.  ``newly_used`` lists fields a consumer reads that the
+projection does not request; add them to ``DASHBOARD_USED_FIELDS``.
+"""
+
+import ast
+from collections import Counter
+from pathlib import Path
+
+from .scanx_planner import DASHBOARD_CATALOGUE, DASHBOARD_QUERY
+
+PIPELINE_ROOT = Path(__file__).resolve().parents[2]
+DASHBOARD_FILE = "dhan_data_response.json"
+# Modules that receive dashboard rows from a consumer without naming the file.
+ROW_HELPER_MODULES = ("src/edl_pipeline/breadth/universe.py",)
+# Modules that declare field lists rather than read rows.
+DECLARATION_MODULES = ("src/edl_pipeline/scanx_planner.py", "src/edl_pipeline/field_usage.py")
+
+
+def source_files(root=PIPELINE_ROOT):
+    root = Path(root)
+    return sorted((*root.glob("*.py"), *(root / "src").rglob("*.py")))
+
+
+def string_literals(source):
+    return {node.value for node in ast.walk(ast.parse(source)) if isinstance(node, ast.Constant) and isinstance(node.value, str)}
+
+
+def consumer_modules(root=PIPELINE_ROOT):
+    """Return ``{relative_path: string_literals}`` for every dashboard-row consumer."""
+    root = Path(root)
+    consumers = {}
+    for path in source_files(root):
+        relative = path.relative_to(root).as_posix()
+        if relative in DECLARATION_MODULES:
+            continue
+        source = path.read_text(encoding="utf-8")
+        if DASHBOARD_FILE in source or relative in ROW_HELPER_MODULES:
+            consumers[relative] = string_literals(source)
+    return consumers
+
+
+def used_fields(consumers, catalogue=DASHBOARD_CATALOGUE):
+    """Return ``{field: [modules]}`` for catalogue fields named by a consumer."""
+    usage = {}
+    for field in catalogue:
+        modules = sorted(module for module, literals in consumers.items() if field in literals)
+        if modules:
+            usage[field] = modules
+    return usage
+
+
+def field_usage(root=PIPELINE_ROOT, catalogue=DASHBOARD_CATALOGUE, requested=DASHBOARD_QUERY.fields):
+    consumers = consumer_modules(root)
+    usage = used_fields(consumers, catalogue)
+    return {
+        "consumers": sorted(consumers),
+        "used": usage,
+        "unused": [field for field in catalogue if field not in usage],
+        "newly_used": [field for field in usage if field not in requested],
+        "requested_unused": [field for field in dict.fromkeys(requested) if field not in usage],
+        "duplicate_requests": sorted(field for field, count in Counter(requested).items() if count > 1),
+        "catalogue_size": len(catalogue),
+        "requested_size": len(requested),
+    }
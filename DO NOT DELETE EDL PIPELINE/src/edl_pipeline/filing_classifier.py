@@ -0,0 +1,97 @@
+"""Single-pass keyword classification of company filings.
+
+Every keyword the flags depend on is compiled into one regular expression
+whose alternatives sit inside a zero-width lookahead, so one scan of a
+filing's text reports each keyword occurrence, overlapping ones included.
+The matched keywords map to categories, and the categories decide the flags.
+
+Filings never change once published, so ``FilingClassifier`` memoizes flags by
+filing key and ``FilingsStore`` keeps them with each stored filing.
+"""
+
+import re
+
+# Bump when keywords or flag rules change so stored flags are recomputed.
+CLASSIFIER_VERSION = 1
+FLAGS = ("insider", "results", "board_meeting", "dividend", "pledge")
+RESULTS_DESCRIPTOR = "Financial Results"
+KEYWORD_CATEGORIES = {
+    "regulation 7(2)": "insider_trade",
+    "reg 7(2)": "insider_trade",
+    "inter-se transfer": "insider_trade",
+    "form c": "insider_trade",
+    "continual disclosure": "insider_trade",
+    "insider trading": "insider_mention",
+    "sebi (pit)": "insider_mention",
+    "sebi pit": "insider_mention",
+    "trading window": "window_closure",
+    "closure": "window_closure",
+    "board meeting": "board_meeting",
+    "meeting of the board": "board_meeting",
+    "meeting of board": "board_meeting",
+    "dividend": "dividend",
+    "pledge": "pledge",
+    "encumbrance": "pledge",
+    "encumbered": "pledge",
+    "invocation": "pledge",
+}
+KEYWORD_PATTERN = re.compile(
+    "(?=(" + "|".join(re.escape(keyword) for keyword in sorted(KEYWORD_CATEGORIES, key=len, reverse=True)) + "))"
+)
+
+
+def filing_text(item):
+    fields = ("descriptor", "caption", "cat", "news_body")
+    return " ".join((item.get(field) or "").lower() for field in fields)
+
+
+def filing_categories(item):
+    """Return the keyword categories present in a filing's text."""
+    return {KEYWORD_CATEGORIES[match.group(1)] for match in KEYWORD_PATTERN.finditer(filing_text(item))}
+
+
+def classify_filing(item):
+    """Return ``{flag: bool}`` for every name in ``FLAGS``."""
+    categories = filing_categories(item)
+    return {
+        "insider": "insider_trade" in categories
+        or ("insider_mention" in categories and "window_closure" not in categories),
+        "results": item.get("descriptor") == RESULTS_DESCRIPTOR,
+        "board_meeting": "board_meeting" in categories,
+        "dividend": "dividend" in categories,
+        "pledge": "pledge" in categories,
+    }
+
+
+def filing_key(item):
+    """Return the identity ``dedupe_filings`` uses for one filing."""
+    return item.get("news_id") or f"{item.get('news_date')}_{item.get('caption') or item.get('descriptor') or 'Unknown'}"
+
+
+class FilingClassifier:
+    """``classify_filing`` memoized by ``news_id``.
+
+    ``known`` seeds the memo with flags classified earlier.  Filings without a
+    ``news_id`` are classified every time.
+    """
+
+    def __init__(self, known=None):
+        self.flags = dict(known or {})
+        self.classified = 0
+
+    def __call__(self, item):
+        news_id = str(item.get("news_id") or "")
+        flags = self.flags.get(news_id) if news_id else None
+        if flags is None:
+            flags = classify_filing(item)
+            self.classified += 1
+            if news_id:
+                self.flags[news_id] = flags
+        return flags
+
+
+_DEFAULT_CLASSIFIER = FilingClassifier()
+
+
+def is_insider_trade_filing(item):
+    return _DEFAULT_CLASSIFIER(item)["insider"]
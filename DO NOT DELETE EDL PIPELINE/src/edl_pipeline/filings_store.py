@@ -0,0 +1,221 @@
+"""Consolidated, date-indexed store of company filings.
+
+``fetch_company_filings.py`` writes one ``{SYMBOL}_filings.json`` per stock and
+also upserts the same deduplicated list here.  Each filing is stored once with
+its calendar day parsed, its rank in the symbol's newest-first list, and the
+``filing_classifier`` flags (insider trade, results, board meeting, dividend,
+pledge), so event enrichment and earnings metrics answer their questions with
+indexed queries instead of reopening every per-symbol file.
+
+A symbol's rows are replaced by each fetch: a full fetch stores the newest
+pages the endpoints return, and an incremental fetch merges new filings into
+the stored ones, keeping ``fetch_company_filings.MAX_STORED_FILINGS``.  A
+``SCHEMA_VERSION`` change drops the tables together with the sync cursors,
+so the next run refetches every symbol in full; a classifier change only
+recomputes the flags from the stored JSON.
+"""
+
+from contextlib import closing
+from datetime import datetime
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+from pipeline_utils import BASE_PATH
+
+from .filing_classifier import CLASSIFIER_VERSION, FLAGS, FilingClassifier, classify_filing, filing_key
+
+FILINGS_STORE_FILE = BASE_PATH / "filings_store.sqlite"
+# Stored in PRAGMA user_version.  A schema change rebuilds the tables; a
+# classifier change only recomputes the flag columns from the stored filings.
+SCHEMA_VERSION = 2
+STORE_VERSION = SCHEMA_VERSION * 1000 + CLASSIFIER_VERSION
+COLUMNS = ("symbol", "key", "news_id", "isin", "rank", "news_date", "day", *FLAGS, "data")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS filings (
+    symbol TEXT NOT NULL,
+    key TEXT NOT NULL,
+    news_id TEXT,
+    isin TEXT,
+    rank INTEGER NOT NULL,
+    news_date TEXT,
+    day TEXT,
+    {" ".join(f"{flag} INTEGER NOT NULL," for flag in FLAGS)}
+    data TEXT NOT NULL,
+    PRIMARY KEY (symbol, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS filings_rank ON filings (rank, symbol);
+CREATE INDEX IF NOT EXISTS filings_insider ON filings (insider, day);
+CREATE INDEX IF NOT EXISTS filings_results ON filings (results, symbol, news_date);
+CREATE INDEX IF NOT EXISTS filings_news_id ON filings (news_id);
+CREATE TABLE IF NOT EXISTS cursors (
+    isin TEXT PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    news_id TEXT,
+    news_date TEXT
+);
+"""
+
+_WRITE_LOCK = threading.Lock()
+
+
+def filing_day(item):
+    """Return the filing's ``YYYY-MM-DD`` day, or None when it does not parse."""
+    date_text = (item.get("news_date") or "").split(" ")[0]
+    try:
+        return datetime.strptime(date_text, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+class FilingsStore:
+    """All symbols' filings in one SQLite file, indexed by day and flags."""
+
+    def __init__(self, path=FILINGS_STORE_FILE):
+        self.path = Path(path)
+        self.classified = 0
+
+    def exists(self):
+        return self.path.exists()
+
+    def connect(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=60)
+        stored_version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if stored_version != STORE_VERSION:
+            with connection:
+                if stored_version // 1000 != SCHEMA_VERSION:
+                    # Cursors point into the dropped filings; without them the next run refetches in full.
+                    connection.execute("DROP TABLE IF EXISTS filings")
+                    connection.execute("DROP TABLE IF EXISTS cursors")
+                else:
+                    self.reclassify(connection)
+                connection.execute(f"PRAGMA user_version = {STORE_VERSION}")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def reclassify(self, connection):
+        """Recompute every stored filing's flags in place with the current classifier."""
+        updates = []
+        for symbol, key, data in connection.execute("SELECT symbol, key, data FROM filings").fetchall():
+            flags = classify_filing(json.loads(data))
+            updates.append((*(int(flags[flag]) for flag in FLAGS), symbol, key))
+        connection.executemany(
+            f"UPDATE filings SET {', '.join(f'{flag} = ?' for flag in FLAGS)} WHERE symbol = ? AND key = ?",
+            updates,
+        )
+        self.classified += len(updates)
+
+    def known_flags(self, connection, symbol):
+        """Return ``{news_id: flags}`` already stored for ``symbol``."""
+        return {
+            news_id: dict(zip(FLAGS, (bool(value) for value in values)))
+            for news_id, *values in connection.execute(
+                f"SELECT news_id, {', '.join(FLAGS)} FROM filings WHERE symbol = ? AND news_id IS NOT NULL",
+                (symbol,),
+            )
+        }
+
+    def replace_symbol(self, symbol, filings, isin=None):
+        """Replace ``symbol``'s filings with ``filings`` (newest first).
+
+        Flags stored for a ``news_id`` are reused, so only new filings are
+        classified.  Returns the number of filings stored.
+        """
+        with _WRITE_LOCK, closing(self.connect()) as connection, connection:
+            classifier = FilingClassifier(self.known_flags(connection, symbol))
+            rows = []
+            seen = set()
+            for item in filings:
+                key = filing_key(item)
+                if key in seen:
+                    continue
+                seen.add(key)
+                flags = classifier(item)
+                rows.append(
+                    (
+                        symbol,
+                        key,
+                        str(item["news_id"]) if item.get("news_id") else None,
+                        isin,
+                        len(rows),
+                        item.get("news_date"),
+                        filing_day(item),
+                        *(int(flags[flag]) for flag in FLAGS),
+                        json.dumps(item),
+                    )
+                )
+            connection.execute("DELETE FROM filings WHERE symbol = ?", (symbol,))
+            connection.executemany(
+                f"INSERT INTO filings ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})",
+                rows,
+            )
+            if isin and rows:
+                newest = max(rows, key=lambda row: row[5] or "")
+                connection.execute(
+                    "INSERT OR REPLACE INTO cursors VALUES (?, ?, ?, ?)",
+                    (isin, symbol, newest[2], newest[5]),
+                )
+        self.classified = classifier.classified
+        return len(rows)
+
+    def _query(self, sql, params=()):
+        if not self.exists():
+            return []
+        with closing(self.connect()) as connection:
+            return connection.execute(sql, params).fetchall()
+
+    def cursor(self, isin):
+        """Return the newest ``{"news_id", "news_date"}`` stored for ``isin``, or None."""
+        rows = self._query("SELECT news_id, news_date FROM cursors WHERE isin = ?", (isin,))
+        return {"news_id": rows[0][0], "news_date": rows[0][1]} if rows else None
+
+    def known_keys(self, symbol):
+        return {key for (key,) in self._query("SELECT key FROM filings WHERE symbol = ?", (symbol,))}
+
+    def has_filings(self):
+        return bool(self._query("SELECT 1 FROM filings LIMIT 1"))
+
+    def filings(self, symbol):
+        return [
+            json.loads(data)
+            for (data,) in self._query("SELECT data FROM filings WHERE symbol = ? ORDER BY rank", (symbol,))
+        ]
+
+    def newest(self, limit=5):
+        """Return ``{symbol: filings}`` with each symbol's ``limit`` newest filings."""
+        newest = {}
+        for symbol, data in self._query(
+            "SELECT symbol, data FROM filings WHERE rank < ? ORDER BY symbol, rank", (limit,)
+        ):
+            newest.setdefault(symbol, []).append(json.loads(data))
+        return newest
+
+    def insider_symbols(self, since):
+        """Return symbols with an insider-trade filing on or after day ``since``."""
+        return {
+            symbol
+            for (symbol,) in self._query(
+                "SELECT DISTINCT symbol FROM filings WHERE insider = 1 AND day >= ?", (since,)
+            )
+        }
+
+    def latest_results(self, since=None):
+        """Return ``{symbol: news_date}`` of each symbol's newest results filing.
+
+        ``since`` limits the scan to filings on or after that day.
+        """
+        sql = "SELECT symbol, MAX(news_date) FROM filings WHERE results = 1"
+        params = ()
+        if since is not None:
+            sql += " AND day >= ?"
+            params = (since,)
+        return dict(self._query(f"{sql} GROUP BY symbol", params))
+
+
+def open_filings_store(path=FILINGS_STORE_FILE):
+    """Return the store when it already holds filings, else None."""
+    store = FilingsStore(path)
+    return store if store.exists() and store.has_filings() else None
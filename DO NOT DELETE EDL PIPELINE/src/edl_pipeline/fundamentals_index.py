@@ -0,0 +1,66 @@
+"""Keyed random-access copy of ``fundamental_data.json``.
+
+The consolidated fundamentals file is one large JSON array, so reading a
+single stock from it means parsing every record.  ``fetch_fundamental_data.py``
+also writes each record into a small SQLite file keyed by ISIN with a symbol
+index; single-stock tools read one compressed row from it instead.
+"""
+
+import json
+import sqlite3
+import zlib
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+from pipeline_utils import BASE_PATH
+
+FUNDAMENTALS_INDEX_FILE = BASE_PATH / "fundamentals_index.sqlite"
+
+
+def write_fundamentals_index(rows, path=FUNDAMENTALS_INDEX_FILE):
+    """Replace the index with ``rows`` and return the number of records written."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with NamedTemporaryFile(delete=False, dir=path.parent, prefix=f".{path.name}.", suffix=".tmp") as handle:
+        temporary = Path(handle.name)
+    try:
+        connection = sqlite3.connect(temporary)
+        try:
+            connection.execute("CREATE TABLE records (isin TEXT PRIMARY KEY, symbol TEXT, data BLOB NOT NULL)")
+            connection.executemany(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?)",
+                (
+                    (row["isin"], row.get("Symbol"), zlib.compress(json.dumps(row).encode("utf-8"), 6))
+                    for row in rows
+                    if row.get("isin")
+                ),
+            )
+            connection.execute("CREATE INDEX records_symbol ON records (symbol)")
+            connection.commit()
+            count = connection.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+        finally:
+            connection.close()
+        temporary.replace(path)
+    except Exception:
+        temporary.unlink(missing_ok=True)
+        raise
+    return count
+
+
+def lookup_fundamentals(key, path=FUNDAMENTALS_INDEX_FILE):
+    """Return the record whose symbol or ISIN is ``key``, or None.
+
+    Raises ``FileNotFoundError`` when the index has not been built.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(path)
+    connection = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True)
+    try:
+        row = connection.execute(
+            "SELECT data FROM records WHERE symbol = ? UNION ALL SELECT data FROM records WHERE isin = ? LIMIT 1",
+            (key, key),
+        ).fetchone()
+    finally:
+        connection.close()
+    return json.loads(zlib.decompress(row[0])) if row else None
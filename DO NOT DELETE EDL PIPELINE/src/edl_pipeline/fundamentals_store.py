@@ -0,0 +1,316 @@
+"""Persistent columnar history of the pipe-delimited Dhan fundamentals.
+
+``fundamental_data.json`` carries each ISIN's recent quarters and years as
+``|``-delimited strings aligned with a ``YEAR`` label string.  The store keeps
+every period it has ever seen: one compressed ``.npz`` table per section with
+one row per ``(isin, period)`` and one float column per field, sorted by ISIN
+and period.  Each update upserts the periods in the current fetch, so history
+accumulates as the upstream window moves forward.
+
+Cross-sectional screens read a section once and work on ``(isins, periods)``
+matrices instead of re-parsing the JSON.
+"""
+
+from datetime import datetime
+import hashlib
+import json
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+import numpy as np
+import pandas as pd
+
+from pipeline_utils import BASE_PATH
+
+FUNDAMENTALS_STORE_VERSION = 1
+FUNDAMENTALS_STORE_DIR = BASE_PATH / "fundamentals_store"
+FUNDAMENTAL_FILE = BASE_PATH / "fundamental_data.json"
+META_KEY = "__meta__"
+PERIOD_LABEL_KEY = "YEAR"
+
+# Store section -> (response group, months between consecutive periods).
+SECTIONS = {
+    "quarterly": ("incomeStat_cq", 3),
+    "annual": ("incomeStat_cy", 12),
+    "shareholding": ("sHp", 3),
+    "balance_sheet": ("bs_c", None),
+}
+KEY_COLUMNS = ("isin", "period", "label")
+PERIOD_FORMATS = (
+    "%b %Y",
+    "%b-%Y",
+    "%b %y",
+    "%b-%y",
+    "%B %Y",
+    "%Y-%m",
+    "%Y%m",
+    "%m-%Y",
+    "%m/%Y",
+    "%Y-%m-%d",
+    "%d-%m-%Y",
+)
+
+
+def parse_period(label):
+    """Return ``year * 12 + month - 1`` for a period label, or None."""
+    text = str(label or "").strip().replace("'", " ")
+    for period_format in PERIOD_FORMATS:
+        try:
+            parsed = datetime.strptime(text, period_format)
+        except ValueError:
+            continue
+        return parsed.year * 12 + parsed.month - 1
+    return None
+
+
+def period_name(period):
+    """Format a ``parse_period`` value as ``YYYY-MM``."""
+    year, month = divmod(int(period), 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
+
+
+def section_frame(rows, group):
+    """Flatten one response group of every row into ``(isin, period)`` records.
+
+    Returns the frame and the number of ISINs skipped because their period
+    labels could not be parsed.
+    """
+    records = []
+    unparsed = 0
+    for row in rows:
+        isin = row.get("isin") or row.get("ISIN")
+        source = row.get(group)
+        if not isin or not isinstance(source, dict) or not source.get(PERIOD_LABEL_KEY):
+            continue
+        labels = str(source[PERIOD_LABEL_KEY]).split("|")
+        periods = [parse_period(label) for label in labels]
+        if any(period is None for period in periods):
+            unparsed += 1
+            continue
+        values = {
+            field: str(pipe_string).split("|")
+            for field, pipe_string in source.items()
+            if field != PERIOD_LABEL_KEY and isinstance(pipe_string, (str, int, float))
+        }
+        for offset, (label, period) in enumerate(zip(labels, periods)):
+            record = {"isin": isin, "period": period, "label": label.strip()}
+            for field, parts in values.items():
+                record[field] = _number(parts[offset]) if offset < len(parts) else np.nan
+            records.append(record)
+    frame = pd.DataFrame.from_records(records)
+    if frame.empty:
+        frame = pd.DataFrame(columns=list(KEY_COLUMNS))
+    return frame, unparsed
+
+
+class FundamentalsStore:
+    """Per-section ``(isin, period)`` tables with an ISIN-to-symbol map."""
+
+    def __init__(self, store_dir=FUNDAMENTALS_STORE_DIR):
+        self.store_dir = Path(store_dir)
+        self._frames = {}
+        self._meta = None
+
+    def section_path(self, section):
+        return self.store_dir / f"{section}.npz"
+
+    @property
+    def meta_path(self):
+        return self.store_dir / "meta.json"
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            try:
+                self._meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._meta = {}
+            if self._meta.get("version") != FUNDAMENTALS_STORE_VERSION:
+                self._meta = {"version": FUNDAMENTALS_STORE_VERSION, "symbols": {}}
+        return self._meta
+
+    @property
+    def symbols(self):
+        return self.meta["symbols"]
+
+    def load(self, section):
+        """Return a section's table, empty when it has never been written."""
+        if section not in self._frames:
+            path = self.section_path(section)
+            frame = pd.DataFrame(columns=list(KEY_COLUMNS))
+            if path.exists() and self.meta.get("sections", {}).get(section):
+                with np.load(path, allow_pickle=False) as archive:
+                    columns = json.loads(str(archive[META_KEY]))["columns"]
+                    frame = pd.DataFrame({column: archive[column] for column in columns})
+            self._frames[section] = frame
+        return self._frames[section]
+
+    def _write(self, section, frame):
+        path = self.section_path(section)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            column: frame[column].to_numpy(dtype=str if column in ("isin", "label") else None)
+            for column in frame.columns
+        }
+        arrays["period"] = frame["period"].to_numpy(dtype=np.int64)
+        meta = {"columns": list(frame.columns)}
+        with NamedTemporaryFile(
+            delete=False,
+            dir=path.parent,
+            prefix=f".{path.name}.",
+            suffix=".tmp",
+        ) as handle:
+            np.savez_compressed(handle, **{META_KEY: np.array(json.dumps(meta))}, **arrays)
+            temporary = Path(handle.name)
+        try:
+            temporary.replace(path)
+        except Exception:
+            temporary.unlink(missing_ok=True)
+            raise
+
+    def _write_meta(self):
+        self.meta_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.meta_path.with_name(f".{self.meta_path.name}.tmp")
+        temporary.write_text(json.dumps(self.meta, indent=2, sort_keys=True), encoding="utf-8")
+        temporary.replace(self.meta_path)
+
+    def update(self, rows, source_sha256=None):
+        """Upsert every period in ``rows`` and return per-section change counts.
+
+        Values from ``rows`` replace stored values for the same ISIN and
+        period; periods that have left the upstream window are kept.
+        """
+        summary = {}
+        sections = self.meta.setdefault("sections", {})
+        for section, (group, _step) in SECTIONS.items():
+            fresh, unparsed = section_frame(rows, group)
+            stored = self.load(section)
+            before = len(stored)
+            known = set(zip(stored["isin"], stored["period"])) if before else set()
+            added = sum(
+                (isin, period) not in known
+                for isin, period in zip(fresh["isin"], fresh["period"])
+            )
+            merged = pd.concat([stored, fresh], ignore_index=True, sort=False)
+            merged = merged.drop_duplicates(["isin", "period"], keep="last")
+            merged = merged.sort_values(["isin", "period"], kind="stable").reset_index(drop=True)
+            merged["period"] = merged["period"].astype(np.int64)
+            fields = [column for column in merged.columns if column not in KEY_COLUMNS]
+            merged[fields] = merged[fields].astype(float)
+            merged = merged[[*KEY_COLUMNS, *sorted(fields)]]
+            self._write(section, merged)
+            self._frames[section] = merged
+            sections[section] = {"rows": len(merged), "isins": int(merged["isin"].nunique())}
+            summary[section] = {
+                "rows": len(merged),
+                "new_periods": added,
+                "unparsed_isins": unparsed,
+                "previous_rows": before,
+            }
+
+        for row in rows:
+            isin = row.get("isin") or row.get("ISIN")
+            if isin and row.get("Symbol"):
+                self.symbols[isin] = row["Symbol"]
+        self.meta["source_sha256"] = source_sha256
+        self._write_meta()
+        return summary
+
+    def latest(self, section, field, count):
+        """Return each ISIN's ``count`` most recent periods, newest first.
+
+        The result is ``(isins, periods, values)`` where ``periods`` holds
+        ``year * 12 + month - 1`` (``-1`` when absent) and ``values`` holds
+        floats (NaN when absent), both shaped ``(isins, count)``.
+        """
+        frame = self.load(section)
+        if frame.empty or field not in frame.columns:
+            empty = np.empty((0, count))
+            return np.asarray([], dtype=str), empty.astype(np.int64) - 1, empty
+        isin_values = frame["isin"].to_numpy(dtype=str)
+        isins, starts, sizes = np.unique(isin_values, return_index=True, return_counts=True)
+        ends = starts + sizes
+        periods = np.full((len(isins), count), -1, dtype=np.int64)
+        values = np.full((len(isins), count), np.nan)
+        source_periods = frame["period"].to_numpy(dtype=np.int64)
+        source_values = frame[field].to_numpy(dtype=float)
+        for offset in range(count):
+            present = sizes > offset
+            rows = ends[present] - 1 - offset
+            periods[present, offset] = source_periods[rows]
+            values[present, offset] = source_values[rows]
+        return isins, periods, values
+
+
+def growth_matrix(section, periods, values, lag):
+    """Return percentage change against the value ``lag`` periods earlier.
+
+    Cells whose comparison period is missing, not exactly ``lag`` steps back,
+    or zero are NaN.
+    """
+    step = SECTIONS[section][1]
+    current = values[:, :-lag]
+    previous = values[:, lag:]
+    aligned = (periods[:, :-lag] >= 0) & (periods[:, lag:] >= 0)
+    if step is not None:
+        aligned &= periods[:, :-lag] - periods[:, lag:] == step * lag
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = (current - previous) / np.abs(previous) * 100
+    return np.where(aligned & (previous != 0), growth, np.nan)
+
+
+def accelerating(store, field="EPS", count=3, section="quarterly", lag=4):
+    """Return ISINs whose year-over-year growth rose in each of the last ``count`` periods.
+
+    With the quarterly defaults, three consecutive quarters of EPS
+    acceleration means each of the latest three quarters grew faster versus
+    the same quarter a year earlier than the quarter before it did.
+    """
+    isins, periods, values = store.latest(section, field, count + 1 + lag)
+    growth = growth_matrix(section, periods, values, lag)
+    with np.errstate(invalid="ignore"):
+        rising = growth[:, :count] > growth[:, 1:count + 1]
+    selected = np.flatnonzero(rising.all(axis=1))
+    return [
+        {
+            "isin": str(isins[row]),
+            "symbol": store.symbols.get(str(isins[row])),
+            "latest_period": period_name(periods[row, 0]),
+            "growth": [round(value, 2) for value in growth[row, :count + 1].tolist()],
+        }
+        for row in selected.tolist()
+    ]
+
+
+def update_fundamentals_store(source=FUNDAMENTAL_FILE, store=None):
+    """Fold ``fundamental_data.json`` into the store unless it is unchanged."""
+    store = store or FundamentalsStore()
+    raw = Path(source).read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    if store.meta.get("source_sha256") == digest:
+        return None
+    return store.update(json.loads(raw), digest)
+
+
+def main():
+    if not FUNDAMENTAL_FILE.exists():
+        print(f"Error: {FUNDAMENTAL_FILE.name} is missing. Run fetch_fundamental_data.py first.")
+        return False
+
+    summary = update_fundamentals_store()
+    if summary is None:
+        print("Fundamentals store: source unchanged")
+        return True
+    for section, counts in summary.items():
+        print(
+            f"Fundamentals store {section}: {counts['rows']} rows | "
+            f"{counts['new_periods']} new periods | {counts['unparsed_isins']} unparsed ISINs"
+        )
+    return True
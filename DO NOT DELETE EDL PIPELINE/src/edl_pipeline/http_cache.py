@@ -0,0 +1,269 @@
+"""On-disk response cache for slow-changing GET sources.
+
+Dhan Next.js data, NSE archive CSVs, ``EQUITY_L.csv`` and the Gviz
+surveillance sheets change at most a few times a day, yet every run and rerun
+downloaded them again.  With ``EDL_HTTP_CACHE=1``, ``cached_get`` serves them
+from ``http_cache/`` while the matching ``CachePolicy`` TTL holds.  Once it
+expires the stored ``ETag``/``Last-Modified`` go out as a conditional request,
+so an unchanged source costs a ``304`` instead of a download.  When the
+source cannot be reached, an expired entry is still served for up to the
+policy's ``max_stale_seconds``.  Policies name exact pages, so intraday Dhan
+pages such as the circuit lists always go to the network.
+
+Each entry is a ``<key>.body`` file plus a ``<key>.json`` header, so scripts
+running in parallel never share an index.  Reads refresh the body's mtime and
+``evict`` drops least recently used entries once the cache exceeds
+``EDL_HTTP_CACHE_MB``.  Every process records its hit/miss counters under
+``http_cache/stats/`` at exit, and the runner sums the run's counters into
+``pipeline_report.json``.  URLs without a policy bypass the cache.
+"""
+
+import atexit
+from dataclasses import dataclass
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from pipeline_utils import BASE_PATH, atomic_replace_bytes, atomic_replace_text, http_session
+
+from .config import env_bool, env_int
+
+HTTP_CACHE_DIR = BASE_PATH / "http_cache"
+MAX_CACHE_MB = 256
+STAT_KEYS = ("hits", "misses", "revalidated", "stale", "bytes_from_cache", "bytes_downloaded")
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """How long responses for URLs matching ``pattern`` stay fresh.
+
+    ``max_stale_seconds`` is how long past the TTL an entry may stand in for
+    an unreachable source.  ``negative_ttl_seconds`` caches 404s, for dated
+    files that are not published yet; 0 never caches them.
+    """
+
+    name: str
+    pattern: str
+    ttl_seconds: int
+    max_stale_seconds: int = 0
+    negative_ttl_seconds: int = 0
+
+    def matches(self, url):
+        return re.fullmatch(self.pattern, url) is not None
+
+
+# Only the slow-changing F&O reference pages; other Next.js data is intraday.
+DHAN_REFERENCE_PAGES = r"(?:nse-fno-lot-size|fno-expiry-calendar)"
+CACHE_POLICIES = (
+    CachePolicy("dhan_next_data", rf"https://dhan\.co/_next/data/[^/]+/{DHAN_REFERENCE_PAGES}\.json", 6 * 3600, 24 * 3600),
+    CachePolicy("dhan_pages", rf"https://dhan\.co/{DHAN_REFERENCE_PAGES}/", 3600, 24 * 3600),
+    CachePolicy(
+        "nse_archives", r"https://nsearchives\.nseindia\.com/content/equities/[^/?]+\.csv", 12 * 3600, 24 * 3600, 1800
+    ),
+    CachePolicy("gviz_sheets", r"https://docs\.google\.com/spreadsheets/.*", 3600, 6 * 3600),
+)
+
+
+class CachedResponse:
+    """The parts of ``requests.Response`` the fetchers use."""
+
+    def __init__(self, url, status_code, content, headers, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+class ResponseCache:
+    def __init__(self, directory=HTTP_CACHE_DIR, policies=CACHE_POLICIES, max_bytes=MAX_CACHE_MB * 1024 * 1024,
+                 session=None, clock=time.time):
+        self.directory = Path(directory)
+        self.policies = tuple(policies)
+        self.max_bytes = max_bytes
+        self.session = session
+        self.clock = clock
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def policy_for(self, url):
+        return next((policy for policy in self.policies if policy.matches(url)), None)
+
+    def _count(self, policy_name, key, amount=1):
+        with self._lock:
+            counters = self.stats.setdefault(policy_name, dict.fromkeys(STAT_KEYS, 0))
+            counters[key] += amount
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            content = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None, None
+        if meta.get("url") != url or meta.get("size") != len(content):
+            return None, None
+        return meta, content
+
+    def _store(self, url, status_code, content, headers):
+        meta_path, body_path = self._paths(url)
+        atomic_replace_bytes(body_path, content)
+        meta = {
+            "url": url,
+            "status_code": status_code,
+            "stored_at": self.clock(),
+            "size": len(content),
+            "headers": {name: headers[name] for name in ("ETag", "Last-Modified", "Content-Type") if headers.get(name)},
+        }
+        atomic_replace_text(meta_path, json.dumps(meta))
+        return meta
+
+    def _touch(self, url):
+        try:
+            os.utime(self._paths(url)[1])
+        except OSError:
+            pass
+
+    def _fresh(self, policy, meta):
+        ttl = policy.ttl_seconds if meta["status_code"] == 200 else policy.negative_ttl_seconds
+        return self.clock() - meta["stored_at"] < ttl
+
+    def get(self, url, headers=None, timeout=15):
+        """GET ``url`` through the cache and return a ``CachedResponse``."""
+        session = self.session or http_session()
+        policy = self.policy_for(url)
+        if policy is None:
+            response = session.get(url, headers=headers, timeout=timeout)
+            return CachedResponse(url, response.status_code, response.content, response.headers)
+
+        meta, content = self._load(url)
+        if meta is not None and self._fresh(policy, meta):
+            self._count(policy.name, "hits")
+            self._count(policy.name, "bytes_from_cache", len(content))
+            self._touch(url)
+            return CachedResponse(url, meta["status_code"], content, meta["headers"], from_cache=True)
+
+        request_headers = dict(headers or {})
+        if meta is not None and meta["status_code"] == 200:
+            if meta["headers"].get("ETag"):
+                request_headers["If-None-Match"] = meta["headers"]["ETag"]
+            if meta["headers"].get("Last-Modified"):
+                request_headers["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+        try:
+            response = session.get(url, headers=request_headers, timeout=timeout)
+        except requests.RequestException:
+            if (
+                meta is None
+                or meta["status_code"] != 200
+                or self.clock() - meta["stored_at"] >= policy.ttl_seconds + policy.max_stale_seconds
+            ):
+                raise
+            self._count(policy.name, "stale")
+            self._count(policy.name, "bytes_from_cache", len(content))
+            return CachedResponse(url, 200, content, meta["headers"], from_cache=True)
+
+        if response.status_code == 304 and meta is not None:
+            self._count(policy.name, "revalidated")
+            self._count(policy.name, "bytes_from_cache", len(content))
+            merged = CaseInsensitiveDict(meta["headers"])
+            merged.update(response.headers)
+            meta = self._store(url, 200, content, merged)
+            return CachedResponse(url, 200, content, meta["headers"], from_cache=True)
+
+        self._count(policy.name, "misses")
+        self._count(policy.name, "bytes_downloaded", len(response.content))
+        if response.status_code == 200 or (response.status_code == 404 and policy.negative_ttl_seconds):
+            self._store(url, response.status_code, response.content, response.headers)
+            self.evict()
+        return CachedResponse(url, response.status_code, response.content, response.headers)
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits ``max_bytes``."""
+        entries = []
+        for body_path in self.directory.glob("*.body"):
+            try:
+                stat = body_path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, body_path))
+        total = sum(size for _mtime, size, _path in entries)
+        removed = 0
+        for _mtime, size, body_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            body_path.with_suffix(".json").unlink(missing_ok=True)
+            body_path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def save_stats(self, run_id):
+        if not self.stats:
+            return
+        path = self.directory / "stats" / f"{run_id}-{os.getpid()}.json"
+        atomic_replace_text(path, json.dumps(self.stats))
+
+
+def cache_enabled():
+    return env_bool("EDL_HTTP_CACHE", False)
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def default_cache():
+    """Return the process-wide cache, recording its stats for the run at exit."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = ResponseCache(max_bytes=env_int("EDL_HTTP_CACHE_MB", MAX_CACHE_MB, minimum=1) * 1024 * 1024)
+            run_id = os.getenv("EDL_RUN_ID")
+            if run_id:
+                atexit.register(_CACHE.save_stats, run_id)
+        return _CACHE
+
+
+def cached_get(url, headers=None, timeout=15):
+    """GET through the response cache when ``EDL_HTTP_CACHE`` is on, else directly."""
+    if cache_enabled():
+        return default_cache().get(url, headers=headers, timeout=timeout)
+    return requests.get(url, headers=headers, timeout=timeout)
+
+
+def run_cache_stats(run_id, directory=HTTP_CACHE_DIR):
+    """Sum and remove the per-process stats recorded for ``run_id``."""
+    totals = {}
+    for path in sorted((Path(directory) / "stats").glob(f"{run_id}-*.json")):
+        try:
+            stats = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        for policy_name, counters in stats.items():
+            policy_totals = totals.setdefault(policy_name, dict.fromkeys(STAT_KEYS, 0))
+            for key in STAT_KEYS:
+                policy_totals[key] += counters.get(key, 0)
+        path.unlink(missing_ok=True)
+    return totals
@@ -1,5 +1,17 @@
 """Shared HTTP helper facade for source modules."""
 
-from pipeline_utils import fetch_scanx_data, get_headers, post_json
+from pipeline_utils import fetch_scanx_data, get_headers, http_session, post_json
 
-__all__ = ["fetch_scanx_data", "get_headers", "post_json"]
+from .batching import BatchEndpoint, BatchFetcher, batch_size
+from .http_cache import cached_get
+
+__all__ = [
+    "BatchEndpoint",
+    "BatchFetcher",
+    "batch_size",
+    "cached_get",
+    "fetch_scanx_data",
+    "get_headers",
+    "http_session",
+    "post_json",
+]
@@ -0,0 +1,289 @@
+"""Optional SQLite mirror of the pipeline's JSON intermediates.
+
+With ``EDL_INTERMEDIATE_DB=1`` every intermediate written through
+``pipeline_utils.save_json`` is also loaded into ``intermediate.sqlite``.  The
+JSON files are still written, so scripts that read them keep working; package
+transforms read them back with ``load_intermediate`` when the database is
+present.  Writes go through one process-wide store holding one connection.
+
+Each JSON document becomes one ``documents`` row and one ``records`` row per
+list item, with typed ``symbol``/``isin``/``date`` key columns extracted from
+the item and indexed for lookup.  Per-symbol directory files such as
+``market_news/ABC_news.json`` take their symbol from the file name.
+``company_filings/`` is not mirrored: its readers use ``filings_store.sqlite``.
+"""
+
+import hashlib
+from itertools import groupby
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from pipeline_utils import BASE_PATH, atomic_replace_text, load_json, resolve_path
+
+from .artifacts import INTERMEDIATE_DIRS, INTERMEDIATE_FILES
+from .config import env_bool
+
+INTERMEDIATE_DB_FILE = BASE_PATH / "intermediate.sqlite"
+SYMBOL_FIELDS = ("Symbol", "symbol", "Sym", "sym")
+ISIN_FIELDS = ("ISIN", "isin")
+DATE_FIELDS = ("Date", "ExDate", "news_date", "date", "PublishDate")
+# Dict documents whose rows live under one of these keys, e.g. ``{"code": 0, "data": [...]}``.
+RECORD_KEYS = ("data", "News")
+# Per-symbol directories with a dedicated store of their own.
+UNMIRRORED_DIRS = ("company_filings",)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    name TEXT PRIMARY KEY,
+    record_key TEXT,
+    symbol TEXT,
+    payload TEXT,
+    sha256 TEXT NOT NULL,
+    row_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    document TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    symbol TEXT,
+    isin TEXT,
+    date TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (document, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS records_symbol ON records (symbol, document);
+CREATE INDEX IF NOT EXISTS records_isin ON records (isin);
+CREATE INDEX IF NOT EXISTS records_date ON records (date, document);
+"""
+
+_WRITE_LOCK = threading.Lock()
+_STORE = None
+
+
+def intermediate_db_enabled():
+    return env_bool("EDL_INTERMEDIATE_DB", False)
+
+
+def intermediate_name(path):
+    """Return the store name for an intermediate path, or None for other files."""
+    try:
+        relative = resolve_path(path).resolve().relative_to(BASE_PATH)
+    except ValueError:
+        return None
+    name = relative.as_posix()
+    if name in INTERMEDIATE_FILES:
+        return name
+    if len(relative.parts) > 1 and relative.parts[0] in INTERMEDIATE_DIRS and relative.parts[0] not in UNMIRRORED_DIRS:
+        return name
+    return None
+
+
+def _first(item, fields):
+    for field in fields:
+        value = item.get(field)
+        if value not in (None, ""):
+            return str(value)
+    return None
+
+
+def _split_document(name, data):
+    """Return ``(record_key, document_symbol, payload, rows)`` for a JSON document."""
+    symbol = None
+    if "/" in name:
+        symbol = Path(name).stem.rsplit("_", 1)[0]
+    if isinstance(data, list):
+        return None, symbol, None, data
+    if isinstance(data, dict):
+        symbol = _first(data, SYMBOL_FIELDS) or symbol
+        for key in RECORD_KEYS:
+            if isinstance(data.get(key), list):
+                rest = {field: value for field, value in data.items() if field != key}
+                return key, symbol, json.dumps(rest), data[key]
+    return None, symbol, json.dumps(data), []
+
+
+class IntermediateStore:
+    """Documents and indexed rows in one SQLite file."""
+
+    def __init__(self, path=INTERMEDIATE_DB_FILE):
+        self.path = Path(path)
+        self._connection = None
+
+    def exists(self):
+        return self.path.exists()
+
+    def connect(self):
+        """Return the store's connection, opened and migrated on first use."""
+        with _WRITE_LOCK:
+            if self._connection is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+                connection.executescript(SCHEMA)
+                self._connection = connection
+            return self._connection
+
+    def close(self):
+        with _WRITE_LOCK:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def put_many(self, documents):
+        """Replace each ``(name, data)`` document in one transaction; return rows written.
+
+        Documents whose serialized content is unchanged are left in place.
+        """
+        written = 0
+        connection = self.connect()
+        with _WRITE_LOCK, connection:
+            for name, data in documents:
+                text = json.dumps(data, sort_keys=True)
+                digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+                stored = connection.execute("SELECT sha256 FROM documents WHERE name = ?", (name,)).fetchone()
+                if stored and stored[0] == digest:
+                    continue
+                record_key, symbol, payload, rows = _split_document(name, data)
+                connection.execute("DELETE FROM records WHERE document = ?", (name,))
+                connection.executemany(
+                    "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        (
+                            name,
+                            position,
+                            _first(row, SYMBOL_FIELDS) or symbol,
+                            _first(row, ISIN_FIELDS),
+                            (_first(row, DATE_FIELDS) or "")[:10] or None,
+                            json.dumps(row),
+                        )
+                        if isinstance(row, dict)
+                        else (name, position, symbol, None, None, json.dumps(row))
+                        for position, row in enumerate(rows)
+                    ),
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?)",
+                    (name, record_key, symbol, payload, digest, len(rows)),
+                )
+                written += len(rows)
+        return written
+
+    def put(self, name, data):
+        return self.put_many([(name, data)])
+
+    def names(self, prefix=""):
+        if not self.exists():
+            return []
+        return [
+            row[0]
+            for row in self.connect().execute(
+                "SELECT name FROM documents WHERE substr(name, 1, ?) = ? ORDER BY name",
+                (len(prefix), prefix),
+            )
+        ]
+
+    def has(self, name):
+        return name in self.names(name)
+
+    def rows(self, document=None, prefix=None, symbol=None, isin=None, since=None, until=None):
+        """Yield stored rows matching every supplied filter, in document order.
+
+        ``since``/``until`` bound the extracted ``YYYY-MM-DD`` date inclusively.
+        """
+        clauses, params = [], []
+        for column, value in (("document", document), ("symbol", symbol), ("isin", isin)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if prefix is not None:
+            clauses.append("substr(document, 1, ?) = ?")
+            params.extend((len(prefix), prefix))
+        if since is not None:
+            clauses.append("date >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("date <= ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        if not self.exists():
+            return
+        cursor = self.connect().execute(
+            f"SELECT document, symbol, data FROM records {where} ORDER BY document, position",
+            params,
+        )
+        for _document, _symbol, data in cursor:
+            yield json.loads(data)
+
+    def grouped_rows(self, prefix):
+        """Yield ``(document symbol, rows)`` for every document under ``prefix``."""
+        if not self.exists():
+            return
+        cursor = self.connect().execute(
+            "SELECT d.name, d.symbol, r.data FROM documents d "
+            "LEFT JOIN records r ON r.document = d.name "
+            "WHERE substr(d.name, 1, ?) = ? ORDER BY d.name, r.position",
+            (len(prefix), prefix),
+        )
+        for (_name, symbol), group in groupby(cursor, key=lambda row: row[:2]):
+            yield symbol, [json.loads(data) for _name, _symbol, data in group if data is not None]
+
+    def document(self, name, default=None):
+        """Rebuild the JSON document stored under ``name``."""
+        if not self.exists():
+            return default
+        stored = self.connect().execute(
+            "SELECT record_key, payload FROM documents WHERE name = ?", (name,)
+        ).fetchone()
+        if stored is None:
+            return default
+        record_key, payload = stored
+        rows = list(self.rows(document=name))
+        if payload is None:
+            return rows
+        data = json.loads(payload)
+        if record_key is not None:
+            data[record_key] = rows
+        return data
+
+    def export_json(self, name, path=None):
+        """Write a stored document back out as JSON (defaults to its own path)."""
+        atomic_replace_text(path or name, json.dumps(self.document(name), indent=4))
+
+
+def default_store():
+    """Return the process-wide store, so every mirrored write shares one connection."""
+    global _STORE
+    with _WRITE_LOCK:
+        if _STORE is None:
+            _STORE = IntermediateStore()
+        return _STORE
+
+
+def mirror_json(path, data, store=None):
+    """Load an intermediate into the store; other paths are ignored."""
+    name = intermediate_name(path)
+    if name is None:
+        return 0
+    return (store or default_store()).put(name, data)
+
+
+def open_intermediate_store(path=INTERMEDIATE_DB_FILE):
+    """Return the store when enabled and already populated, else None."""
+    if not intermediate_db_enabled() or not Path(path).exists():
+        return None
+    store = default_store()
+    return store if store.path == Path(path) else IntermediateStore(path)
+
+
+def load_intermediate(path, store=None):
+    """Read an intermediate from ``store`` when it holds a copy, else from its JSON file.
+
+    Raises ``FileNotFoundError`` like ``load_json`` when neither has it.
+    """
+    if store is not None:
+        name = Path(os.path.relpath(path, store.path.parent)).as_posix()
+        data = store.document(name)
+        if data is not None:
+            return data
+    return load_json(path)
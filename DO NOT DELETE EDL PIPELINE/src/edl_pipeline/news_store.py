@@ -0,0 +1,120 @@
+"""Rolling per-ISIN market news log with sync cursors.
+
+``fetch_market_news.py`` in incremental mode asks the live-news endpoint only
+for items newer than each ISIN's cursor, appends them here, and rebuilds
+``{SYMBOL}_news.json`` from the log.  Items are deduplicated by publish time
+and title, and items older than the retention window are pruned on write.
+
+Pruning happens per ISIN when that ISIN syncs, so a stock that leaves the
+master map keeps its last log until the file is removed.  There is no schema
+version: deleting ``news_store.sqlite`` is the rebuild, and the next
+incremental run starts every ISIN from a zero cursor.
+"""
+
+from contextlib import closing
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from pipeline_utils import BASE_PATH
+
+NEWS_STORE_FILE = BASE_PATH / "news_store.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS news (
+    isin TEXT NOT NULL,
+    key TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    publish_date INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (isin, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS news_publish_date ON news (publish_date);
+CREATE TABLE IF NOT EXISTS cursors (
+    isin TEXT PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    publish_date INTEGER NOT NULL
+);
+"""
+
+_WRITE_LOCK = threading.Lock()
+
+
+def publish_timestamp(item):
+    try:
+        return int(item.get("PublishDate") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def news_key(item):
+    return f"{publish_timestamp(item)}_{item.get('Title') or ''}"
+
+
+def retention_cutoff(retention_days, newest, now=None):
+    """Return the oldest publish timestamp kept, in the same unit as ``newest``.
+
+    The endpoint's timestamps are epoch milliseconds; seconds are handled too.
+    """
+    now = time.time() if now is None else now
+    cutoff = now - retention_days * 86400
+    return int(cutoff * 1000) if newest > 10**11 else int(cutoff)
+
+
+class NewsStore:
+    """News items and newest-seen cursors keyed by ISIN."""
+
+    def __init__(self, path=NEWS_STORE_FILE):
+        self.path = Path(path)
+
+    def connect(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=60)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def cursor(self, isin):
+        """Return the newest publish timestamp synced for ``isin``, or None."""
+        if not self.path.exists():
+            return None
+        with closing(self.connect()) as connection:
+            row = connection.execute("SELECT publish_date FROM cursors WHERE isin = ?", (isin,)).fetchone()
+        return row[0] if row else None
+
+    def news(self, isin):
+        """Return the stored log for ``isin``, newest first."""
+        if not self.path.exists():
+            return []
+        with closing(self.connect()) as connection:
+            return [
+                json.loads(data)
+                for (data,) in connection.execute(
+                    "SELECT data FROM news WHERE isin = ? ORDER BY publish_date DESC, key", (isin,)
+                )
+            ]
+
+    def append(self, isin, symbol, items, retention_days, now=None):
+        """Add unseen ``items`` and prune expired ones; return how many were new."""
+        with _WRITE_LOCK, closing(self.connect()) as connection, connection:
+            known = {key for (key,) in connection.execute("SELECT key FROM news WHERE isin = ?", (isin,))}
+            rows = {}
+            for item in items:
+                key = news_key(item)
+                if key not in known:
+                    rows[key] = (isin, key, symbol, publish_timestamp(item), json.dumps(item))
+            connection.executemany("INSERT INTO news VALUES (?, ?, ?, ?, ?)", rows.values())
+            newest = max([publish_timestamp(item) for item in items] + [self._newest(connection, isin)])
+            if newest:
+                connection.execute(
+                    "DELETE FROM news WHERE isin = ? AND publish_date < ?",
+                    (isin, retention_cutoff(retention_days, newest, now)),
+                )
+                connection.execute("INSERT OR REPLACE INTO cursors VALUES (?, ?, ?)", (isin, symbol, newest))
+        return len(rows)
+
+    @staticmethod
+    def _newest(connection, isin):
+        row = connection.execute("SELECT publish_date FROM cursors WHERE isin = ?", (isin,)).fetchone()
+        return row[0] if row else 0
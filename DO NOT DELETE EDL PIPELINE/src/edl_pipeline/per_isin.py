@@ -0,0 +1,65 @@
+"""Market-cap ordered, time-budgeted runs of per-ISIN endpoints.
+
+``fetch_per_isin_data.py`` crawls every per-ISIN endpoint at once, and each
+standalone fetcher crawls its own endpoint; both go through ``crawl_items`` so
+``EDL_CRAWL_RATE`` and ``EDL_CRAWL_BUDGET_SECONDS`` apply to whichever path
+the runner takes.  Each call writes a report with per-endpoint status counts
+and market-cap bucket coverage.
+"""
+
+from pipeline_utils import save_json
+
+from .config import env_int
+from .crawler import Crawler
+from .priority import coverage_by_bucket, load_market_cap_ranks, priority_key
+
+# Optional global request rate (requests/second); 0 leaves it unthrottled.
+CRAWL_RATE = 0
+# Optional time budget per crawl (seconds); 0 runs to completion.
+# Work is ordered by market cap, so a cut-short crawl loses small caps first.
+CRAWL_BUDGET_SECONDS = 0
+
+
+def crawl_items(endpoints, items, workers, report_file, progress_every=500):
+    """Crawl ``items`` in market-cap order, print coverage, and write ``report_file``.
+
+    Returns the ``CrawlReport``; its ``finish`` hooks have already run.
+    """
+    crawler = Crawler(
+        endpoints,
+        workers=workers,
+        rate=env_int("EDL_CRAWL_RATE", CRAWL_RATE, minimum=0),
+        progress_every=progress_every,
+    )
+    ranks = load_market_cap_ranks()
+    budget = env_int("EDL_CRAWL_BUDGET_SECONDS", CRAWL_BUDGET_SECONDS, minimum=0)
+    report = crawler.run(items, priority=priority_key(ranks), budget=budget)
+
+    stopped = " (time budget reached)" if report.timed_out else " (cancelled)" if report.cancelled else ""
+    print(f"\nCrawl finished in {report.elapsed:.1f}s{stopped}")
+    summary = report.summary()
+    for name, endpoint_summary in summary.items():
+        statuses = ", ".join(f"{status} {count}" for status, count in sorted(endpoint_summary["statuses"].items()))
+        print(f"  {name}: {endpoint_summary['done']}/{endpoint_summary['total']} ({statuses})")
+        endpoint_summary["coverage"] = coverage_by_bucket(items, report.covered_isins(name), ranks)
+        if report.cancelled:
+            for bucket, coverage in endpoint_summary["coverage"].items():
+                if coverage["total"]:
+                    print(f"    {bucket}: {coverage['covered']}/{coverage['total']} ({coverage['pct']}%)")
+
+    save_json(
+        report_file,
+        {
+            "elapsed_seconds": round(report.elapsed, 1),
+            "budget_seconds": budget or None,
+            "timed_out": report.timed_out,
+            "cancelled": report.cancelled,
+            "endpoints": summary,
+        },
+    )
+    return report
+
+
+def crawl_succeeded(report):
+    """A crawl cut short by its budget still counts; a cancelled one does not."""
+    return report.timed_out or not report.cancelled
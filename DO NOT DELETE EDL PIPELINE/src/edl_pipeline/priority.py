@@ -0,0 +1,79 @@
+"""Market-cap ordering and coverage buckets for per-symbol fetches.
+
+``dhan_data_response.json`` already carries every stock's market cap and
+traded value, so per-ISIN fetchers can work from the largest, most liquid
+names down.  When a stage stops early (time budget, throttling, Ctrl-C) the
+missing data then sits in the tail of the universe, and ``coverage_by_bucket``
+reports how complete each market-cap band is.
+"""
+
+from pipeline_utils import load_json
+
+from .breadth.universe import safe_float
+
+DHAN_DATA_FILE = "dhan_data_response.json"
+# Upper rank bound of each bucket; the last bucket takes everything else.
+MARKET_CAP_BUCKETS = (
+    ("top_100", 100),
+    ("101_250", 250),
+    ("251_500", 500),
+    ("501_1000", 1000),
+    ("rest", None),
+)
+
+
+def liquidity_key(row):
+    """Sort key for one dhan row: market cap, then traded value, both descending."""
+    market_cap = safe_float(row.get("Mcap")) or 0.0
+    traded_value = (safe_float(row.get("Volume") or row.get("volume")) or 0.0) * (safe_float(row.get("Ltp")) or 0.0)
+    return (-market_cap, -traded_value)
+
+
+def market_cap_ranks(rows):
+    """Return ``{isin: rank}`` with rank 1 for the largest, most liquid stock."""
+    ranked = sorted((row for row in rows if row.get("Isin")), key=liquidity_key)
+    ranks = {}
+    for row in ranked:
+        ranks.setdefault(row["Isin"], len(ranks) + 1)
+    return ranks
+
+
+def load_market_cap_ranks(path=DHAN_DATA_FILE):
+    """Read ranks from ``dhan_data_response.json``; empty when it is missing."""
+    rows = load_json(path, default=[]) or []
+    return market_cap_ranks(rows if isinstance(rows, list) else [])
+
+
+def priority_key(ranks):
+    """Return a sort key that puts ranked ISINs first, then the rest by symbol."""
+    unranked = len(ranks) + 1
+
+    def key(item):
+        return (ranks.get(item.get("ISIN"), unranked), item.get("Symbol") or "")
+
+    return key
+
+
+def sort_by_market_cap(items, ranks=None):
+    ranks = load_market_cap_ranks() if ranks is None else ranks
+    return sorted(items, key=priority_key(ranks))
+
+
+def market_cap_bucket(rank):
+    for name, limit in MARKET_CAP_BUCKETS:
+        if rank is not None and limit is not None and rank <= limit:
+            return name
+    return MARKET_CAP_BUCKETS[-1][0]
+
+
+def coverage_by_bucket(items, covered_isins, ranks):
+    """Return ``{bucket: {"total", "covered", "pct"}}`` in bucket order."""
+    coverage = {name: {"total": 0, "covered": 0} for name, _limit in MARKET_CAP_BUCKETS}
+    for item in items:
+        bucket = coverage[market_cap_bucket(ranks.get(item.get("ISIN")))]
+        bucket["total"] += 1
+        if item.get("ISIN") in covered_isins:
+            bucket["covered"] += 1
+    for bucket in coverage.values():
+        bucket["pct"] = round(100.0 * bucket["covered"] / bucket["total"], 1) if bucket["total"] else None
+    return coverage
@@ -13,3 +13,11 @@ class PipelineWarning:
 def format_warning(warning):
     suffix = f" ({warning.detail})" if warning.detail else ""
     return f"{warning.stage}: {warning.message}{suffix}"
+
+
+def print_symbol_errors(errors, limit=20):
+    """Print per-symbol failures, capped so one bad run cannot flood the log."""
+    for symbol, error in sorted(errors.items())[:limit]:
+        print(f"  {symbol}: {error}")
+    if len(errors) > limit:
+        print(f"  ... and {len(errors) - limit} more")
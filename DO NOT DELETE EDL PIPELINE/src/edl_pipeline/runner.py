@@ -12,22 +12,27 @@ import subprocess
 import sys
 import time
 
-from pipeline_utils import BASE_DIR, compress_file, save_json
+from pipeline_utils import BASE_DIR, atomic_replace_bytes, compress_file, save_json
 
 from .artifacts import (
     FILES_TO_COMPRESS,
     FINAL_ARTIFACT_SPECS,
     INTERMEDIATE_DIRS,
     INTERMEDIATE_FILES,
+    LOCAL_INDICATOR_SCRIPT,
     OHLCV_DERIVED_FILES,
     OHLCV_DERIVED_FINAL_PATHS,
     OHLCV_DERIVED_SCRIPT,
     OPTIONAL_SCRIPTS,
+    PER_ISIN_CRAWL_SCRIPT,
+    PER_ISIN_SCRIPTS,
     PHASE2_SCRIPTS,
     PHASE4_SCRIPTS,
+    REMOTE_INDICATOR_SCRIPT,
     SCRIPT_OUTPUT_SPECS,
 )
 from .config import PipelineConfig
+from .http_cache import default_cache, run_cache_stats
 from .validators import validate_many
 
 
@@ -124,18 +129,46 @@ def compress_output(include_ohlcv_derived=True):
     return total_raw, total_gz
 
 
-def download_nse_listing_dates():
+NSE_LISTING_URL = "https://nsearchives.nseindia.com/content/equities/EQUITY_L.csv"
+
+
+def download_nse_listing_dates_cached(csv_path):
+    """Fetch EQUITY_L.csv through the process-wide HTTP response cache and record its stats.
+
+    Stats are saved now, not only at exit, so the run summary includes them.
+    """
+    cache = default_cache()
+    try:
+        response = cache.get(
+            NSE_LISTING_URL,
+            headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"},
+            timeout=30,
+        )
+    finally:
+        cache.save_stats(os.environ.get("EDL_RUN_ID", "adhoc"))
+    if response.status_code == 200 and response.content:
+        atomic_replace_bytes(csv_path, response.content)
+        source = "cache" if response.from_cache else "download"
+        print(f"  OK NSE Listing Dates ready ({source}).")
+        return True
+    print(f"  WARNING: NSE CSV download failed (HTTP {response.status_code}, non-critical).")
+    return False
+
+
+def download_nse_listing_dates(use_cache=False):
     """Download NSE listing dates used by the base analyzer."""
     print("  Downloading NSE Listing Dates...")
     csv_path = os.path.join(BASE_DIR, "nse_equity_list.csv")
     try:
+        if use_cache:
+            return download_nse_listing_dates_cached(csv_path)
         result = subprocess.run(
             [
                 "curl",
                 "-s",
                 "-o",
                 csv_path,
-                "https://nsearchives.nseindia.com/content/equities/EQUITY_L.csv",
+                NSE_LISTING_URL,
                 "--http1.1",
                 "--header",
                 "User-Agent: Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
@@ -184,6 +217,9 @@ def config_to_dict(config):
         "fetch_ohlcv": config.fetch_ohlcv,
         "fetch_optional": config.fetch_optional,
         "cleanup_intermediate": config.cleanup_intermediate,
+        "unified_crawl": config.unified_crawl,
+        "local_indicators": config.local_indicators,
+        "http_cache": config.http_cache,
     }
 
 
@@ -198,6 +234,7 @@ def build_pipeline_report(results, total_time, raw_size, gz_size, final_checks,
         "exit_code": exit_code,
         "scripts": {script: result.to_dict() for script, result in results.items()},
         "final_artifacts": [check.to_dict() for check in final_checks],
+        "http_cache": run_cache_stats(os.environ.get("EDL_RUN_ID", "")) if config.http_cache else {},
     }
 
 
@@ -266,6 +303,10 @@ def main(config=None):
     """Run the full pipeline and return a process exit code."""
     config = config or PipelineConfig.from_env()
     overall_start = time.time()
+    # Scripts sharing one fetchdt superset (edl_pipeline.scanx_planner) key its cache by run.
+    os.environ["EDL_RUN_ID"] = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    if config.http_cache:
+        os.environ["EDL_HTTP_CACHE"] = "1"
 
     print("=" * 60)
     print("  EDL PIPELINE - FULL DATA REFRESH")
@@ -296,11 +337,20 @@ def main(config=None):
         )
         return 1
 
-    download_nse_listing_dates()
+    download_nse_listing_dates(use_cache=config.http_cache)
 
     print("\nPHASE 2: Data Enrichment (Fetching)")
     print("-" * 40)
+    # Local indicators need the OHLCV refresh; without it the endpoint is still used.
+    local_indicators = config.local_indicators and config.fetch_ohlcv
+    skipped = set(PER_ISIN_SCRIPTS) if config.unified_crawl else set()
+    if local_indicators:
+        skipped.add(REMOTE_INDICATOR_SCRIPT)
+    if config.unified_crawl:
+        results[PER_ISIN_CRAWL_SCRIPT] = run_script(PER_ISIN_CRAWL_SCRIPT, "Phase 2")
     for script in PHASE2_SCRIPTS:
+        if script in skipped:
+            continue
         results[script] = run_script(script, "Phase 2")
 
     if config.fetch_ohlcv:
@@ -312,6 +362,8 @@ def main(config=None):
         results["fetch_indices_ohlcv.py"] = run_script(
             "fetch_indices_ohlcv.py", "Phase 2.5", required=True
         )
+    if local_indicators:
+        results[LOCAL_INDICATOR_SCRIPT] = run_script(LOCAL_INDICATOR_SCRIPT, "Phase 2.5")
 
     print("\nPHASE 3: Base Analysis (Building Master JSON)")
     print("-" * 40)
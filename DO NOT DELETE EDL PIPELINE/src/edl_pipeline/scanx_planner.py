@@ -0,0 +1,242 @@
+"""One ScanX ``customscan/fetchdt`` request per run for every compatible consumer.
+
+Several scripts query the same NSE universe with different field lists,
+filters, sort orders and row counts.  Each consumer declares its query here
+as a ``ScanxQuery``.  During a pipeline run (``EDL_RUN_ID`` set by the runner)
+the first consumer fetches one superset request covering every compatible
+query registered for the run: the filters they all share go to the server,
+and the union of their fields is requested together with the fields needed
+to apply each consumer's other filters and sort locally.  The rows are cached
+for the run in ``scanx_run_cache.json.gz``, and every consumer gets its own
+filtered, sorted, truncated and projected view.
+
+A query is compatible when its server-side filters include ``BASE_FILTERS``
+and every other filter is on a returned field.  Filter values compare as
+numbers when both sides parse, so a flag returned as ``1.0`` or ``True``
+still matches ``"1"``.  Incompatible queries, queries marked
+``shared=False``, runs without a run id, a superset response that may have
+hit the endpoint's row cap, and an empty view of a non-empty superset all
+fall back to the consumer's own request.
+"""
+
+from dataclasses import dataclass, replace
+import gzip
+import hashlib
+import json
+import os
+
+from pipeline_utils import BASE_PATH, atomic_replace_bytes, fetch_scanx_data
+
+from .breadth.universe import safe_float
+
+RUN_CACHE_FILE = BASE_PATH / "scanx_run_cache.json.gz"
+RUN_CACHE_VERSION = 1
+BASE_FILTERS = (("Exch", "NSE"),)
+# The endpoint returns at most this many rows; a superset that reaches it may be truncated.
+MAX_ROWS = 5000
+
+
+@dataclass(frozen=True)
+class ScanxQuery:
+    name: str
+    fields: tuple
+    filters: tuple = ()
+    sort: str = "Mcap"
+    sorder: str = "desc"
+    count: int = MAX_ROWS
+    # False keeps the query out of the superset and always sends it live.
+    shared: bool = True
+
+    def payload(self):
+        return {
+            "data": {
+                "sort": self.sort,
+                "sorder": self.sorder,
+                "count": self.count,
+                "fields": list(self.fields),
+                "params": [{"field": field, "op": "", "val": value} for field, value in self.filters],
+                "pgno": 0,
+            }
+        }
+
+
+# Every field the dashboard scan has been asked for; field_usage.py checks reads against it.
+DASHBOARD_CATALOGUE = tuple(dict.fromkeys((
+    "Isin", "DispSym", "Mcap", "Pe", "DivYeild", "Revenue", "Year1RevenueGrowth", "NetProfitMargin",
+    "YoYLastQtrlyProfitGrowth", "EBIDTAMargin", "volume", "PricePerchng1year", "PricePerchng3year",
+    "PricePerchng5year", "Ind_Pe", "Pb", "DivYeild", "Eps", "DaySMA10CurrentCandle", "DaySMA20CurrentCandle",
+    "DaySMA50CurrentCandle", "DaySMA200CurrentCandle",
+    "DayRSI14CurrentCandle", "ROCE", "Ltp", "Roe", "RtAwayFrom5YearHigh", "RtAwayFrom1MonthHigh",
+    "High5yr", "High3Yr", "High1Yr", "High1Wk", "Sym", "PricePerchng1mon", "PricePerchng1week",
+    "PricePerchng3mon", "YearlyEarningPerShare", "OCFGrowthOnYr", "Year1CAGREPSGrowth", "NetChangeInCash",
+    "FreeCashFlow", "PricePerchng2week", "DayBbUpper_Sub_BbLower", "DayATR14CurrentCandleMul_2",
+    "Min5HighCurrentCandle", "Min15HighCurrentCandle", "Min5EMA50CurrentCandle", "Min15EMA50CurrentCandle",
+    "Min15SMA100CurrentCandle", "Open", "High", "Low", "Volume", "BcClose", "Rmp", "PledgeBenefit",
+    "PricePerchng6mon", "Sector", "TotalShares", "ShareCapital", "Exch", "Inst", "Seg", "idxlist", "Sid", "FnoFlag",
+    "PPerchange",
+)))
+# The projection actually requested: the catalogue fields some consumer reads.
+DASHBOARD_USED_FIELDS = (
+    "Isin", "DispSym", "Mcap", "volume", "PricePerchng1year", "DaySMA10CurrentCandle", "DaySMA20CurrentCandle",
+    "DaySMA50CurrentCandle", "DaySMA200CurrentCandle", "DayRSI14CurrentCandle", "ROCE", "Ltp", "High1Yr", "Sym",
+    "PricePerchng1mon", "PricePerchng1week", "PricePerchng3mon", "Open", "High", "Low", "Volume",
+    "PricePerchng6mon", "Sector", "TotalShares", "ShareCapital", "Exch", "Inst", "Seg", "idxlist", "Sid", "FnoFlag",
+    "PPerchange",
+)
+DASHBOARD_QUERY = ScanxQuery("dhan_data", fields=DASHBOARD_USED_FIELDS, filters=(("OgInst", "ES"), ("Exch", "NSE")))
+DASHBOARD_FULL_QUERY = replace(DASHBOARD_QUERY, fields=DASHBOARD_CATALOGUE)
+# Today's candle must be current, not the copy fetched at the start of the run.
+LIVE_SNAPSHOT_QUERY = ScanxQuery(
+    "live_snapshots",
+    fields=("Sym", "Open", "High", "Low", "Ltp", "Volume"),
+    filters=(("Exch", "NSE"),),
+    sort="Volume",
+    shared=False,
+)
+# F&O contracts only trade on NSE, so the Exch filter does not change the rows.
+FNO_QUERY = ScanxQuery(
+    "fno_stocks",
+    fields=(
+        "Isin", "DispSym", "Mcap", "Pe", "DivYeild", "Revenue", "Year1RevenueGrowth", "NetProfitMargin",
+        "YoYLastQtrlyProfitGrowth", "EBIDTAMargin", "volume", "PricePerchng1year", "PricePerchng3year",
+        "PricePerchng5year", "Ind_Pe", "Pb", "DivYeild", "Eps", "DaySMA50CurrentCandle", "DaySMA200CurrentCandle",
+        "DayRSI14CurrentCandle", "ROCE", "Ltp", "Roe", "RtAwayFrom5YearHigh", "RtAwayFrom1MonthHigh",
+        "High5yr", "High3Yr", "High1Yr", "High1Wk", "Sym", "PricePerchng1mon", "PricePerchng1week",
+        "PricePerchng3mon", "YearlyEarningPerShare", "OCFGrowthOnYr", "Year1CAGREPSGrowth", "NetChangeInCash",
+        "FreeCashFlow", "PricePerchng2week", "DayBbUpper_Sub_BbLower", "DayATR14CurrentCandleMul_2",
+        "Min5HighCurrentCandle", "Min15HighCurrentCandle", "Min5EMA50CurrentCandle", "Min15EMA50CurrentCandle",
+        "Min15SMA100CurrentCandle", "Open", "BcClose", "Rmp", "PledgeBenefit",
+    ),
+    filters=(("FnoFlag", "1"), ("OgInst", "ES"), ("Exch", "NSE")),
+    count=500,
+)
+MBI_UNIVERSE_QUERY = ScanxQuery(
+    "mbi_universe",
+    fields=("Sym", "DispSym", "Sid", "Mcap", "Ltp", "Exch", "OgInst"),
+    filters=(("OgInst", "ES"), ("Exch", "NSE")),
+)
+# Only queries a runner invocation issues; fetch_fno_data.py and
+# calibrate_mbi_reference.py run standalone, so adding them would only widen
+# the dashboard request with fields nothing in the run reads.
+CONSUMER_QUERIES = (DASHBOARD_QUERY,)
+
+
+def residual_filters(query, base=BASE_FILTERS):
+    return tuple(item for item in query.filters if item not in base)
+
+
+def compatible(query, base=BASE_FILTERS):
+    return query.shared and all(item in query.filters for item in base)
+
+
+def filter_matches(actual, expected):
+    actual_number = safe_float(actual)
+    expected_number = safe_float(expected)
+    if actual_number is not None and expected_number is not None:
+        return actual_number == expected_number
+    return str(actual) == str(expected)
+
+
+def shared_filters(queries, base=BASE_FILTERS):
+    """Return the filters every compatible query applies, which stay server-side."""
+    members = [query for query in queries if compatible(query, base)]
+    if not members:
+        return base
+    return tuple(item for item in members[0].filters if all(item in query.filters for query in members[1:]))
+
+
+def superset_query(queries, base=BASE_FILTERS):
+    """Return the one request that covers every compatible query in ``queries``."""
+    filters = shared_filters(queries, base)
+    fields = {}
+    for query in queries:
+        if not compatible(query, base):
+            continue
+        for field in (*query.fields, *(name for name, _value in residual_filters(query, filters)), query.sort):
+            fields.setdefault(field, None)
+    return ScanxQuery("universe", tuple(fields), filters)
+
+
+def project(rows, query, base=BASE_FILTERS):
+    """Return ``query``'s view of superset rows: filtered, sorted, truncated, projected."""
+    filters = residual_filters(query, base)
+    selected = [row for row in rows if all(filter_matches(row.get(field), value) for field, value in filters)]
+    descending = query.sorder == "desc"
+    selected.sort(
+        key=lambda row: (
+            safe_float(row.get(query.sort)) is None,
+            -(safe_float(row.get(query.sort)) or 0.0) if descending else safe_float(row.get(query.sort)) or 0.0,
+        )
+    )
+    fields = dict.fromkeys(query.fields)
+    return [{field: row[field] for field in fields if field in row} for row in selected[: query.count]]
+
+
+class ScanxPlanner:
+    """Serve consumer queries from one cached superset request per run."""
+
+    def __init__(self, queries=CONSUMER_QUERIES, cache_path=RUN_CACHE_FILE, run_id=None, fetch=fetch_scanx_data):
+        self.queries = tuple(queries)
+        self.cache_path = cache_path
+        self.run_id = os.getenv("EDL_RUN_ID") if run_id is None else run_id
+        self.fetch = fetch
+
+    def _load(self, signature):
+        try:
+            with gzip.open(self.cache_path, "rt", encoding="utf-8") as handle:
+                cached = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if (
+            cached.get("version") != RUN_CACHE_VERSION
+            or cached.get("run_id") != self.run_id
+            or cached.get("signature") != signature
+        ):
+            return None
+        return cached
+
+    def _save(self, signature, rows, truncated):
+        payload = {
+            "version": RUN_CACHE_VERSION,
+            "run_id": self.run_id,
+            "signature": signature,
+            "truncated": truncated,
+            "rows": [] if truncated else rows,
+        }
+        atomic_replace_bytes(self.cache_path, gzip.compress(json.dumps(payload).encode("utf-8"), compresslevel=6))
+
+    def superset(self, extra=None):
+        queries = self.queries if extra is None or extra in self.queries else (*self.queries, extra)
+        return superset_query(queries), len(queries)
+
+    def universe(self, timeout=30, extra=None):
+        """Return the run's superset rows, or None when they cannot serve consumers."""
+        superset, consumers = self.superset(extra)
+        payload = superset.payload()
+        signature = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+        cached = self._load(signature)
+        if cached is not None:
+            return None if cached.get("truncated") else cached["rows"]
+
+        rows = self.fetch(payload, timeout=timeout)
+        if not rows:
+            return None
+        truncated = len(rows) >= MAX_ROWS
+        self._save(signature, rows, truncated)
+        print(f"  fetchdt: fetched {len(rows)}-row superset for {consumers} consumers ({len(superset.fields)} fields)")
+        return None if truncated else rows
+
+    def rows(self, query, timeout=30):
+        if self.run_id and compatible(query):
+            universe = self.universe(timeout=timeout, extra=query)
+            if universe is not None:
+                selected = project(universe, query, self.superset(query)[0].filters)
+                # An empty view of a non-empty superset more likely means a local mismatch than no rows.
+                if selected or not universe:
+                    return selected
+        return self.fetch(query.payload(), timeout=timeout)
+
+
+def scanx_rows(query, timeout=30):
+    """Return ``query``'s rows, through the run's shared superset when possible."""
+    return ScanxPlanner().rows(query, timeout=timeout)
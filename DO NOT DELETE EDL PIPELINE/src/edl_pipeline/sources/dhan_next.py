@@ -1,5 +1,19 @@
 """Dhan Next.js public data source facade."""
 
-from dhan_next_utils import find_nested_list, get_build_id, get_embedded_next_data, get_next_data
+from dhan_next_utils import (
+    find_nested_list,
+    get_build_id,
+    get_embedded_next_data,
+    get_next_data,
+    invalidate_build_id,
+    resolve_build_id,
+)
 
-__all__ = ["find_nested_list", "get_build_id", "get_embedded_next_data", "get_next_data"]
+__all__ = [
+    "find_nested_list",
+    "get_build_id",
+    "get_embedded_next_data",
+    "get_next_data",
+    "invalidate_build_id",
+    "resolve_build_id",
+]
@@ -0,0 +1,217 @@
+"""Local replacement for the ``staticscanx/indicator`` endpoint.
+
+``bulk_market_analyzer.py`` only reads four things from
+``advanced_indicator_data.json``: the 20/50/200 SMA and EMA values, the RSI
+and MACD actions, and the classic pivot point.  All of them follow from daily
+OHLCV, so this stage takes each symbol's latest row from the shared feature
+cache, computes pivots and signals for every symbol at once on one frame, and
+writes the same payload shape the fetcher produced.
+
+Pivots use the latest completed session's high, low and close, i.e. the
+levels for the next session.  ``parity_report`` compares local payloads with
+live endpoint responses for a sample of symbols.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .features import OHLCV_DIR, default_feature_cache
+
+AVERAGE_PERIODS = (20, 50, 200)
+RSI_OVERBOUGHT = 70
+RSI_OVERSOLD = 30
+# Relative difference (%) within which a local value counts as matching the endpoint.
+PARITY_TOLERANCE_PCT = 0.5
+LATEST_COLUMNS = (
+    "Date", "High", "Low", "Close", "RSI_14", "MACD", "MACD_Signal",
+    *(f"{kind}_{period}" for kind in ("SMA", "EMA") for period in AVERAGE_PERIODS),
+)
+
+
+def latest_rows(csv_paths, feature_cache=None):
+    """Return one row per symbol with its newest cached features, plus errors."""
+    feature_cache = feature_cache or default_feature_cache()
+    rows, errors = {}, {}
+    for csv_path in csv_paths:
+        symbol = Path(csv_path).stem
+        try:
+            features = feature_cache.load(csv_path)
+        except Exception as error:
+            errors[symbol] = f"{type(error).__name__}: {error}"
+            continue
+        if not features.empty:
+            rows[symbol] = features.iloc[-1][list(LATEST_COLUMNS)]
+    return pd.DataFrame.from_dict(rows, orient="index", columns=list(LATEST_COLUMNS)), errors
+
+
+def pivot_levels(latest):
+    """Classic, Fibonacci, Camarilla and Woodie levels for every row of ``latest``."""
+    high, low, close = latest["High"], latest["Low"], latest["Close"]
+    span = high - low
+    pp = (high + low + close) / 3
+    woodie = (high + low + 2 * close) / 4
+    return {
+        "Classic": {
+            "PP": pp, "R1": 2 * pp - low, "R2": pp + span, "R3": high + 2 * (pp - low),
+            "S1": 2 * pp - high, "S2": pp - span, "S3": low - 2 * (high - pp),
+        },
+        "Fibonacci": {
+            "PP": pp, "R1": pp + 0.382 * span, "R2": pp + 0.618 * span, "R3": pp + span,
+            "S1": pp - 0.382 * span, "S2": pp - 0.618 * span, "S3": pp - span,
+        },
+        "Camarilla": {
+            "PP": pp,
+            **{f"R{level}": close + span * 1.1 / divisor for level, divisor in ((1, 12), (2, 6), (3, 4), (4, 2))},
+            **{f"S{level}": close - span * 1.1 / divisor for level, divisor in ((1, 12), (2, 6), (3, 4), (4, 2))},
+        },
+        "Woodie": {
+            "PP": woodie, "R1": 2 * woodie - low, "R2": woodie + span,
+            "S1": 2 * woodie - high, "S2": woodie - span,
+        },
+    }
+
+
+def rsi_action(rsi):
+    return np.select(
+        [rsi >= RSI_OVERBOUGHT, rsi <= RSI_OVERSOLD, rsi > 50, rsi < 50],
+        ["Overbought", "Oversold", "Bullish", "Bearish"],
+        "Neutral",
+    )
+
+
+def macd_action(macd, signal):
+    return np.select([macd > signal, macd < signal], ["Bullish", "Bearish"], "Neutral")
+
+
+def _rounded(value):
+    return None if pd.isna(value) else round(float(value), 2)
+
+
+def indicator_payloads(latest):
+    """Build ``advanced_indicator_data.json`` records from ``latest_rows`` output."""
+    if latest.empty:
+        return []
+    latest = latest.apply(pd.to_numeric, errors="coerce").assign(Date=latest["Date"])
+    pivots = pivot_levels(latest)
+    rsi_actions = rsi_action(latest["RSI_14"])
+    macd_actions = macd_action(latest["MACD"], latest["MACD_Signal"])
+    averages = {
+        kind: {
+            period: (
+                latest[f"{kind}_{period}"],
+                np.where(latest["Close"] > latest[f"{kind}_{period}"], "Bullish", "Bearish"),
+            )
+            for period in AVERAGE_PERIODS
+        }
+        for kind in ("SMA", "EMA")
+    }
+
+    payloads = []
+    for position, symbol in enumerate(latest.index):
+        record = {"Symbol": symbol, "Date": latest["Date"].iloc[position]}
+        for kind, periods in averages.items():
+            record[kind] = [
+                {"Indicator": f"{period}-{kind}", "Value": _rounded(values.iloc[position]), "Action": actions[position]}
+                for period, (values, actions) in periods.items()
+                if not pd.isna(values.iloc[position])
+            ]
+        record["TechnicalIndicators"] = []
+        if not pd.isna(latest["RSI_14"].iloc[position]):
+            record["TechnicalIndicators"].append(
+                {"Indicator": "RSI(14)", "Value": _rounded(latest["RSI_14"].iloc[position]), "Action": rsi_actions[position]}
+            )
+        if not pd.isna(latest["MACD_Signal"].iloc[position]):
+            record["TechnicalIndicators"].append(
+                {"Indicator": "MACD(12,26,9)", "Value": _rounded(latest["MACD"].iloc[position]), "Action": macd_actions[position]}
+            )
+        record["Pivots"] = [
+            {
+                family: {level: _rounded(values.iloc[position]) for level, values in levels.items()}
+                for family, levels in pivots.items()
+            }
+        ]
+        payloads.append(record)
+    return payloads
+
+
+def _value(items, name):
+    for item in items or []:
+        if item.get("Indicator") == name:
+            try:
+                return float(item.get("Value"))
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def _action(items, marker):
+    for item in items or []:
+        if marker in item.get("Indicator", ""):
+            return item.get("Action")
+    return None
+
+
+def _pivot(record):
+    pivots = record.get("Pivots") or [{}]
+    try:
+        return float(pivots[0].get("Classic", {}).get("PP"))
+    except (TypeError, ValueError):
+        return None
+
+
+def parity_report(local, remote, tolerance_pct=PARITY_TOLERANCE_PCT):
+    """Compare local and endpoint payloads keyed by symbol.
+
+    Numeric fields report how many symbols agree within ``tolerance_pct`` and
+    the median/max relative difference; RSI/MACD report action agreement.
+    """
+    numeric = {
+        **{
+            f"{period}-{kind}": (lambda record, name=f"{period}-{kind}", kind=kind: _value(record.get(kind), name))
+            for kind in ("SMA", "EMA")
+            for period in AVERAGE_PERIODS
+        },
+        "Classic PP": _pivot,
+    }
+    differences = {name: [] for name in numeric}
+    actions = {"RSI": [0, 0], "MACD": [0, 0]}
+    symbols = sorted(set(local) & set(remote))
+    for symbol in symbols:
+        for name, read in numeric.items():
+            ours, theirs = read(local[symbol]), read(remote[symbol])
+            if ours is not None and theirs:
+                differences[name].append(abs(ours - theirs) / abs(theirs) * 100)
+        for marker, counts in actions.items():
+            theirs = _action(remote[symbol].get("TechnicalIndicators"), marker)
+            if theirs is not None:
+                counts[0] += _action(local[symbol].get("TechnicalIndicators"), marker) == theirs
+                counts[1] += 1
+
+    return {
+        "symbols_compared": len(symbols),
+        "tolerance_pct": tolerance_pct,
+        "fields": {
+            name: {
+                "compared": len(values),
+                "within_tolerance": sum(value <= tolerance_pct for value in values),
+                "median_diff_pct": round(float(np.median(values)), 4) if values else None,
+                "max_diff_pct": round(max(values), 4) if values else None,
+            }
+            for name, values in differences.items()
+        },
+        "actions": {
+            marker: {"compared": total, "matching": matching}
+            for marker, (matching, total) in actions.items()
+        },
+    }
+
+
+def compute_indicators(ohlcv_dir=OHLCV_DIR, symbols=None, feature_cache=None):
+    """Return ``(payloads, errors)`` for every OHLCV CSV, optionally limited to ``symbols``."""
+    csv_paths = sorted(Path(ohlcv_dir).glob("*.csv"))
+    if symbols is not None:
+        csv_paths = [path for path in csv_paths if path.stem in symbols]
+    latest, errors = latest_rows(csv_paths, feature_cache)
+    return indicator_payloads(latest), errors
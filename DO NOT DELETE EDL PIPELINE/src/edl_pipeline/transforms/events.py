@@ -6,6 +6,10 @@ from datetime import datetime, timedelta
 
 from pipeline_utils import BASE_DIR, load_json, save_json
 
+from ..filing_classifier import is_insider_trade_filing
+from ..filings_store import open_filings_store
+from ..intermediate_store import load_intermediate, open_intermediate_store
+
 
 def add_unique_event(event_map, symbol, event):
     if not symbol:
@@ -103,26 +107,6 @@ def collect_deal_events(deals, today=None):
     return event_map
 
 
-def is_insider_trade_filing(item):
-    desc = (item.get("descriptor") or "").lower()
-    caption = (item.get("caption") or "").lower()
-    category = (item.get("cat") or "").lower()
-    body = (item.get("news_body") or "").lower()
-    full_text = f"{desc} {caption} {category} {body}"
-    trade_keywords = [
-        "regulation 7(2)",
-        "reg 7(2)",
-        "inter-se transfer",
-        "form c",
-        "continual disclosure",
-    ]
-    if any(keyword in full_text for keyword in trade_keywords):
-        return True
-    if "insider trading" in full_text or "sebi (pit)" in full_text or "sebi pit" in full_text:
-        return "trading window" not in full_text and "closure" not in full_text
-    return False
-
-
 def top_regulatory_headlines(items):
     headlines = []
     for item in items[:5]:
@@ -137,19 +121,27 @@ def top_regulatory_headlines(items):
     return headlines
 
 
-def collect_filing_events_and_headlines(filing_files, today=None):
-    event_map = {}
-    news_map = {}
-    today = today or datetime.now()
-    recent_limit = today - timedelta(days=15)
-
+def filing_documents(filing_files):
+    """Yield ``(symbol, filings)`` from per-symbol ``*_filings.json`` files."""
     for filing_file in filing_files:
         symbol = os.path.basename(filing_file).replace("_filings.json", "")
         try:
-            items = load_json(filing_file).get("data", [])
+            yield symbol, load_json(filing_file).get("data", [])
         except Exception:
             continue
 
+
+def collect_filing_events_and_headlines(filing_files, today=None):
+    return collect_filing_events(filing_documents(filing_files), today)
+
+
+def collect_filing_events(documents, today=None):
+    event_map = {}
+    news_map = {}
+    today = today or datetime.now()
+    recent_limit = today - timedelta(days=15)
+
+    for symbol, items in documents:
         if not items:
             continue
 
@@ -171,6 +163,24 @@ def collect_filing_events_and_headlines(filing_files, today=None):
     return event_map, news_map
 
 
+def first_day_on_or_after(moment):
+    """Return the first ``YYYY-MM-DD`` whose midnight is not before ``moment``."""
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if day < moment:
+        day += timedelta(days=1)
+    return day.strftime("%Y-%m-%d")
+
+
+def collect_stored_filing_events(filings_store, today=None):
+    """Same result as ``collect_filing_events`` from indexed store queries."""
+    today = today or datetime.now()
+    news_map = {symbol: top_regulatory_headlines(items) for symbol, items in filings_store.newest(5).items()}
+    event_map = {}
+    for symbol in sorted(filings_store.insider_symbols(first_day_on_or_after(today - timedelta(days=15)))):
+        add_unique_event(event_map, symbol, "🔑: Insider Trading")
+    return event_map, news_map
+
+
 def merge_announcement_events_and_headlines(announcements, event_map, news_map, today=None):
     today = today or datetime.now()
     marker_limit = today - timedelta(days=7)
@@ -199,16 +209,23 @@ def merge_announcement_events_and_headlines(announcements, event_map, news_map,
             news_map[symbol] = news_map[symbol][:5]
 
 
-def collect_market_news(news_files):
-    news_feed_map = {}
+def news_documents(news_files):
+    """Yield ``(symbol, news)`` from per-symbol ``*_news.json`` files."""
     for news_file in news_files:
         try:
             data = load_json(news_file)
         except Exception:
             continue
+        yield data.get("Symbol"), data.get("News", [])
+
+
+def collect_market_news(news_files):
+    return collect_news_feed(news_documents(news_files))
 
-        symbol = data.get("Symbol")
-        news_list = data.get("News", [])
+
+def collect_news_feed(documents):
+    news_feed_map = {}
+    for symbol, news_list in documents:
         if not symbol or not news_list:
             continue
 
@@ -242,8 +259,20 @@ def apply_events_to_master(master_data, event_map, news_map, news_feed_map):
     return master_data
 
 
-def optional_json(path, default):
-    return load_json(path) if os.path.exists(path) else default
+def optional_json(path, default, store=None):
+    """Read an optional intermediate, preferring its copy in the intermediate store."""
+    try:
+        return load_intermediate(path, store)
+    except FileNotFoundError:
+        return default
+
+
+def directory_documents(store, dirname, directory, pattern, read_files):
+    """Return per-symbol documents from the store when it has them, else from files."""
+    if store is not None and store.names(f"{dirname}/"):
+        return store.grouped_rows(f"{dirname}/")
+    files = glob.glob(os.path.join(directory, pattern)) if os.path.exists(directory) else []
+    return read_files(files)
 
 
 def map_refined_events(base_dir=BASE_DIR):
@@ -260,34 +289,43 @@ def map_refined_events(base_dir=BASE_DIR):
         print(f"Error: {master_file} not found.")
         return False
 
+    store = open_intermediate_store(os.path.join(base_dir, "intermediate.sqlite"))
+    if store is not None:
+        print("Reading intermediates from intermediate.sqlite...")
     print("Loading master data...")
-    master_data = load_json(master_file)
+    master_data = load_intermediate(master_file, store)
 
     print("Processing Surveillance (★: LTASM, ★: STASM)...")
-    surveillance_events = collect_surveillance_events(optional_json(asm_file, []))
+    surveillance_events = collect_surveillance_events(optional_json(asm_file, [], store))
 
     print("Processing Corporate Actions (⏰, 💸, ✂️, 🎁, 📈)...")
-    action_events = collect_upcoming_action_events(optional_json(upcoming_file, []))
+    action_events = collect_upcoming_action_events(optional_json(upcoming_file, [], store))
 
     print("Processing Circuit Revisions (#: -ve/ +ve Circuit Limit Revision)...")
-    circuit_events = collect_circuit_revision_events(optional_json(circuit_revision_file, []))
+    circuit_events = collect_circuit_revision_events(optional_json(circuit_revision_file, [], store))
 
     print("Processing Deals (📦: Block Deal)...")
-    deal_events = collect_deal_events(optional_json(deals_file, []))
+    deal_events = collect_deal_events(optional_json(deals_file, [], store))
 
     print("Processing Insider Trades & Recent Headlines...")
-    filing_files = glob.glob(os.path.join(filings_dir, "*_filings.json")) if os.path.exists(filings_dir) else []
-    filing_events, news_map = collect_filing_events_and_headlines(filing_files)
+    filings_store = open_filings_store(os.path.join(base_dir, "filings_store.sqlite"))
+    if filings_store is not None:
+        filing_events, news_map = collect_stored_filing_events(filings_store)
+    else:
+        filing_files = glob.glob(os.path.join(filings_dir, "*_filings.json")) if os.path.exists(filings_dir) else []
+        filing_events, news_map = collect_filing_events_and_headlines(filing_files)
 
     event_map = merge_event_maps(surveillance_events, action_events, circuit_events, deal_events, filing_events)
 
     print("Processing Recent Results & Live Headlines (📊)...")
-    if os.path.exists(announcement_file):
-        merge_announcement_events_and_headlines(load_json(announcement_file), event_map, news_map)
+    announcements = optional_json(announcement_file, None, store)
+    if announcements is not None:
+        merge_announcement_events_and_headlines(announcements, event_map, news_map)
 
     print("Processing Market News Feed (Sentiment Analysis)...")
-    news_files = glob.glob(os.path.join(market_news_dir, "*_news.json")) if os.path.exists(market_news_dir) else []
-    news_feed_map = collect_market_news(news_files)
+    news_feed_map = collect_news_feed(
+        directory_documents(store, "market_news", market_news_dir, "*_news.json", news_documents)
+    )
 
     print(f"Applying markers, headlines, and news to {len(master_data)} stocks...")
     save_json(master_file, apply_events_to_master(master_data, event_map, news_map, news_feed_map), ensure_ascii=False)
@@ -1,10 +1,20 @@
-"""Build the base stock analysis artifact from Dhan fundamental and scan data."""
+"""Build the base stock analysis artifact from Dhan fundamental and scan data.
+
+Pipe-delimited fundamental histories are parsed once per field into
+``(stocks, periods)`` matrices, and the growth, valuation, and ownership
+fields are computed as columns over the whole universe before per-stock
+records are assembled.
+"""
 
 import csv
 import os
 import sys
 
-from pipeline_utils import BASE_DIR, load_json, save_json
+import numpy as np
+
+from pipeline_utils import BASE_DIR, save_json
+
+from ..intermediate_store import load_intermediate, open_intermediate_store
 
 
 FUNDAMENTAL_FILE = os.path.join(BASE_DIR, "fundamental_data.json")
@@ -19,6 +29,20 @@ REQUESTED_INDEX_IDS = {
     25, 27, 28, 447, 35, 41, 46, 44, 16, 43, 42, 45, 39, 466, 34, 32,
     15, 33, 31, 30, 29,
 }
+QUARTERLY_METRICS = (
+    ("Net Profit", "NET_PROFIT"),
+    ("EPS", "EPS"),
+    ("Sales", "SALES"),
+    ("OPM", "OPM"),
+)
+QUARTER_LABELS = (
+    "Latest Quarter",
+    "Previous Quarter",
+    "2 Quarters Back",
+    "3 Quarters Back",
+    "Last Year Quarter",
+)
+SALES_CAGR_YEARS = 5
 
 
 def get_float(value_str):
@@ -75,10 +99,10 @@ def load_listing_dates(path=LISTING_DATES_FILE):
     return listing_date_map
 
 
-def map_scan_rows_by_symbol(path, symbol_key, label, missing_warning):
+def map_scan_rows_by_symbol(path, symbol_key, label, missing_warning, store=None):
     mapped = {}
     try:
-        for item in load_json(path):
+        for item in load_intermediate(path, store):
             symbol = item.get(symbol_key)
             if symbol:
                 mapped[symbol] = item
@@ -88,83 +112,183 @@ def map_scan_rows_by_symbol(path, symbol_key, label, missing_warning):
     return mapped
 
 
-def load_sme_map(path=SME_DATA_FILE):
+def load_sme_map(path=SME_DATA_FILE, store=None):
     try:
-        rows = load_json(path)
+        rows = load_intermediate(path, store)
     except FileNotFoundError:
         print(f"Warning: {path} not found. SME classification unavailable.")
         return None
     return {row.get("Symbol"): row for row in rows if row.get("Symbol")}
 
 
-def quarterly_metric_fields(prefix, source, pipe_name):
-    latest = get_value_from_pipe_string(source.get(pipe_name), 0)
-    previous = get_value_from_pipe_string(source.get(pipe_name), 1)
-    two_back = get_value_from_pipe_string(source.get(pipe_name), 2)
-    three_back = get_value_from_pipe_string(source.get(pipe_name), 3)
-    last_year = get_value_from_pipe_string(source.get(pipe_name), 4)
-    return {
-        f"{prefix} Latest Quarter": latest,
-        f"{prefix} Previous Quarter": previous,
-        f"{prefix} 2 Quarters Back": two_back,
-        f"{prefix} 3 Quarters Back": three_back,
-        f"{prefix} Last Year Quarter": last_year,
-        f"QoQ % {prefix} Latest": round(calculate_change(latest, previous), 2),
-        f"YoY % {prefix} Latest": round(calculate_change(latest, last_year), 2),
-    }
+def pipe_matrix(sources, field, width):
+    """Parse ``field`` from every source into a ``(sources, width)`` float matrix.
+
+    Each pipe string is split once; missing or unparsable periods are 0.0, as
+    in ``get_value_from_pipe_string``.
+    """
+    padding = [0.0] * width
+    rows = []
+    for source in sources:
+        pipe_string = source.get(field)
+        if not pipe_string:
+            rows.append(padding)
+            continue
+        parts = pipe_string.split("|", width)[:width]
+        try:
+            values = list(map(float, parts))
+        except ValueError:
+            values = [get_float(part) for part in parts]
+        rows.append(values + padding[len(values):])
+    return np.array(rows, dtype=float).reshape(len(sources), width)
+
+
+def _scalars(sources, field):
+    return np.array([get_float(source.get(field)) for source in sources])
+
+
+def _rounded(values, digits=2):
+    return [round(value, digits) for value in values.tolist()]
+
+
+def _change(current, previous):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(previous == 0, 0.0, ((current - previous) / np.abs(previous)) * 100)
+
+
+def _cagr(current, previous, years):
+    growth = np.zeros(len(current))
+    valid = ~((current <= 0) | (previous <= 0))
+    # Python's float power keeps results identical to ``calculate_cagr``.
+    for row in np.flatnonzero(valid).tolist():
+        growth[row] = calculate_cagr(float(current[row]), float(previous[row]), years)
+    return growth
+
+
+def market_inputs(item, tech):
+    """Return ``(market_cap_cr, ltp, total_shares)`` for one stock."""
+    cv = item.get("CV", {})
+    market_cap_cr = get_float(tech.get("Mcap") or cv.get("MARKET_CAP"))
+    ltp = get_float(tech.get("Ltp", 0))
+    total_shares = get_optional_float(tech.get("TotalShares")) or 0.0
+    return market_cap_cr, ltp, total_shares
 
 
-def valuation_fields(cv, ttm_cy, roce_roe, bs_c, eps_latest, yoy_eps):
-    roe = get_float(roce_roe.get("ROE"))
-    roce = get_float(roce_roe.get("ROCE"))
-    pe = get_float(cv.get("STOCK_PE"))
+def quarterly_metric_columns(prefix, quarters):
+    """Return the quarter values, QoQ, and YoY columns for one metric."""
+    columns = {
+        f"{prefix} {label}": quarters[:, offset].tolist()
+        for offset, label in enumerate(QUARTER_LABELS)
+    }
+    columns[f"QoQ % {prefix} Latest"] = _rounded(_change(quarters[:, 0], quarters[:, 1]))
+    columns[f"YoY % {prefix} Latest"] = _rounded(_change(quarters[:, 0], quarters[:, 4]))
+    return columns
+
 
-    non_current_liab = get_value_from_pipe_string(bs_c.get("NON_CURRENT_LIABILITIES"), 0)
-    total_equity = get_value_from_pipe_string(bs_c.get("TOTAL_EQUITY"), 0)
-    de_ratio = non_current_liab / total_equity if total_equity != 0 else 0.0
+def valuation_columns(items, eps_latest, yoy_eps):
+    cvs = [item.get("CV", {}) for item in items]
+    ttm_cys = [item.get("TTM_cy", {}) for item in items]
+    roce_roes = [item.get("roce_roe", {}) for item in items]
+    bs_cs = [item.get("bs_c", {}) for item in items]
 
-    peg = pe / yoy_eps if yoy_eps > 0 and pe > 0 else 0.0
+    pe = _scalars(cvs, "STOCK_PE")
+    non_current_liab = pipe_matrix(bs_cs, "NON_CURRENT_LIABILITIES", 1)[:, 0]
+    total_equity = pipe_matrix(bs_cs, "TOTAL_EQUITY", 1)[:, 0]
+    ttm_eps = _scalars(ttm_cys, "EPS")
 
-    forward_pe = 0.0
-    if eps_latest > 0 and pe > 0:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        de_ratio = np.where(total_equity != 0, non_current_liab / total_equity, 0.0)
+        peg = np.where((yoy_eps > 0) & (pe > 0), pe / yoy_eps, 0.0)
         annualized_eps = eps_latest * 4
-        ttm_eps = get_float(ttm_cy.get("EPS"))
-        if annualized_eps > 0:
-            forward_pe = pe * (ttm_eps / annualized_eps)
+        forward_pe = np.where(
+            (eps_latest > 0) & (pe > 0) & (annualized_eps > 0),
+            pe * (ttm_eps / annualized_eps),
+            0.0,
+        )
 
     return {
-        "ROE(%)": roe,
-        "ROCE(%)": roce,
-        "D/E": round(de_ratio, 2),
-        "OPM TTM(%)": get_float(ttm_cy.get("OPM")),
-        "P/E": pe,
-        "PEG": round(peg, 2),
-        "Forward P/E": round(forward_pe, 2),
-        "Historical P/E 5": 0.0,
+        "ROE(%)": _scalars(roce_roes, "ROE").tolist(),
+        "ROCE(%)": _scalars(roce_roes, "ROCE").tolist(),
+        "D/E": _rounded(de_ratio),
+        "OPM TTM(%)": _scalars(ttm_cys, "OPM").tolist(),
+        "P/E": pe.tolist(),
+        "PEG": _rounded(peg),
+        "Forward P/E": _rounded(forward_pe),
+        "Historical P/E 5": [0.0] * len(items),
     }
 
 
-def ownership_fields(shp, market_cap_cr, ltp, total_shares):
-    fii_latest = get_value_from_pipe_string(shp.get("FII"), 0)
-    fii_prev = get_value_from_pipe_string(shp.get("FII"), 1)
-    dii_latest = get_value_from_pipe_string(shp.get("DII"), 0)
-    dii_prev = get_value_from_pipe_string(shp.get("DII"), 1)
+def ownership_columns(items, market_cap_cr, ltp, total_shares):
+    shps = [item.get("sHp", {}) for item in items]
+    fii = pipe_matrix(shps, "FII", 2)
+    dii = pipe_matrix(shps, "DII", 2)
+    promoter_latest = pipe_matrix(shps, "PROMOTER", 1)[:, 0]
+    has_promoter = np.array([bool(shp.get("PROMOTER")) for shp in shps], dtype=bool)
 
-    promoter_history = shp.get("PROMOTER")
-    promoter_latest = get_value_from_pipe_string(promoter_history, 0) if promoter_history else None
-    free_float_pct = 100.0 - promoter_latest if promoter_latest is not None and promoter_latest >= 0 else None
+    with np.errstate(invalid="ignore"):
+        has_free_float = has_promoter & (promoter_latest >= 0)
+    free_float_pct = 100.0 - promoter_latest
 
-    total_shares_cr = total_shares / 10_000_000 if total_shares > 0 else 0.0
-    if total_shares_cr == 0.0 and market_cap_cr > 0 and ltp > 0:
-        total_shares_cr = market_cap_cr / ltp
-    float_shares_cr = total_shares_cr * (free_float_pct / 100.0) if free_float_pct is not None else None
+    total_shares_cr = np.where(total_shares > 0, total_shares / 10_000_000, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total_shares_cr = np.where(
+            (total_shares_cr == 0.0) & (market_cap_cr > 0) & (ltp > 0),
+            market_cap_cr / ltp,
+            total_shares_cr,
+        )
+    float_shares_cr = total_shares_cr * (free_float_pct / 100.0)
 
     return {
-        "FII % change QoQ": round(fii_latest - fii_prev, 2),
-        "DII % change QoQ": round(dii_latest - dii_prev, 2),
-        "Free Float(%)": round(free_float_pct, 2) if free_float_pct is not None else None,
-        "Float Shares(Cr.)": round(float_shares_cr, 2) if float_shares_cr is not None else None,
+        "FII % change QoQ": _rounded(fii[:, 0] - fii[:, 1]),
+        "DII % change QoQ": _rounded(dii[:, 0] - dii[:, 1]),
+        "Free Float(%)": [
+            value if valid else None
+            for value, valid in zip(_rounded(free_float_pct), has_free_float.tolist())
+        ],
+        "Float Shares(Cr.)": [
+            value if valid else None
+            for value, valid in zip(_rounded(float_shares_cr), has_free_float.tolist())
+        ],
+    }
+
+
+def fundamental_records(items, techs):
+    """Return each stock's pipe-derived fundamental fields in record order.
+
+    ``techs`` holds the scan row for each item (``{}`` when unavailable).
+    """
+    inputs = np.array([market_inputs(item, tech) for item, tech in zip(items, techs)], dtype=float)
+    inputs = inputs.reshape(len(items), 3)
+    cqs = [item.get("incomeStat_cq", {}) for item in items]
+    cys = [item.get("incomeStat_cy", {}) for item in items]
+
+    metrics = {
+        prefix: quarterly_metric_columns(prefix, pipe_matrix(cqs, field, len(QUARTER_LABELS)))
+        for prefix, field in QUARTERLY_METRICS
+    }
+    annual_eps = pipe_matrix(cys, "EPS", 2)
+    annual_sales = pipe_matrix(cys, "SALES", SALES_CAGR_YEARS + 1)
+    eps = metrics["EPS"]
+
+    columns = {
+        **metrics["Net Profit"],
+        **eps,
+        "EPS Last Year": annual_eps[:, 0].tolist(),
+        "EPS 2 Years Back": annual_eps[:, 1].tolist(),
+        **metrics["Sales"],
+        "Sales Growth 5 Years(%)": _rounded(
+            _cagr(annual_sales[:, 0], annual_sales[:, SALES_CAGR_YEARS], SALES_CAGR_YEARS)
+        ),
+        **metrics["OPM"],
+        **valuation_columns(
+            items,
+            np.array(eps["EPS Latest Quarter"]),
+            np.array(eps["YoY % EPS Latest"]),
+        ),
+        **ownership_columns(items, inputs[:, 0], inputs[:, 1], inputs[:, 2]),
     }
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
 
 
 def index_memberships(tech):
@@ -210,37 +334,28 @@ def classic_pivot(advanced_tech):
     return "N/A"
 
 
-def analyze_stock(item, tech, advanced_tech, listing_date_map, sme_map=None):
+def analyze_stock(item, tech, advanced_tech, listing_date_map, sme_map=None, fundamentals=None):
+    """Build one stock's analysis record.
+
+    ``fundamentals`` is the stock's row from ``fundamental_records``; it is
+    computed for this stock alone when omitted.
+    """
     symbol = item.get("Symbol", "UNKNOWN")
     cq = item.get("incomeStat_cq", {})
-    cy = item.get("incomeStat_cy", {})
-    ttm_cy = item.get("TTM_cy", {})
     cv = item.get("CV", {})
-    roce_roe = item.get("roce_roe", {})
-    shp = item.get("sHp", {})
-    bs_c = item.get("bs_c", {})
 
     industry = cv.get("INDUSTRY_NAME", "N/A")
     sector = cv.get("SECTOR", "N/A")
-    market_cap_cr = get_float(tech.get("Mcap") or cv.get("MARKET_CAP"))
-    ltp = get_float(tech.get("Ltp", 0))
-    total_shares = get_optional_float(tech.get("TotalShares")) or 0.0
+    market_cap_cr, ltp, total_shares = market_inputs(item, tech)
     volume = get_optional_float(tech.get("Volume", tech.get("volume")))
     sme_record = sme_map.get(symbol) if sme_map is not None else None
-
-    net_profit = quarterly_metric_fields("Net Profit", cq, "NET_PROFIT")
-    eps = quarterly_metric_fields("EPS", cq, "EPS")
-    sales = quarterly_metric_fields("Sales", cq, "SALES")
-    opm = quarterly_metric_fields("OPM", cq, "OPM")
-
-    sales_current_annual = get_value_from_pipe_string(cy.get("SALES"), 0)
-    sales_5_years_ago = get_value_from_pipe_string(cy.get("SALES"), 5)
+    if fundamentals is None:
+        fundamentals = fundamental_records([item], [tech])[0]
 
     high_52w = get_float(tech.get("High1Yr", 0))
     pct_from_52w_high = ((ltp - high_52w) / high_52w) * 100 if high_52w > 0 and ltp > 0 else 0.0
 
-    ownership = ownership_fields(shp, market_cap_cr, ltp, total_shares)
-    free_float_pct = ownership["Free Float(%)"]
+    free_float_pct = fundamentals["Free Float(%)"]
 
     stock_analysis = {
         "Symbol": symbol,
@@ -250,15 +365,7 @@ def analyze_stock(item, tech, advanced_tech, listing_date_map, sme_map=None):
         "Sector": sector,
         "Market Cap(Cr.)": market_cap_cr,
         "Latest Quarter": cq.get("YEAR", "").split("|")[0] if cq.get("YEAR") else "N/A",
-        **net_profit,
-        **eps,
-        "EPS Last Year": get_value_from_pipe_string(cy.get("EPS"), 0),
-        "EPS 2 Years Back": get_value_from_pipe_string(cy.get("EPS"), 1),
-        **sales,
-        "Sales Growth 5 Years(%)": round(calculate_cagr(sales_current_annual, sales_5_years_ago, 5), 2),
-        **opm,
-        **valuation_fields(cv, ttm_cy, roce_roe, bs_c, eps["EPS Latest Quarter"], eps["YoY % EPS Latest"]),
-        **ownership,
+        **fundamentals,
         "% from 52W High": round(pct_from_52w_high, 2),
     }
 
@@ -320,32 +427,40 @@ def analyze_stock(item, tech, advanced_tech, listing_date_map, sme_map=None):
 
 def analyze_all_stocks():
     print("Loading fundamental data...")
+    store = open_intermediate_store(os.path.join(BASE_DIR, "intermediate.sqlite"))
+    if store is not None:
+        print("Reading intermediates from intermediate.sqlite...")
     try:
-        data = load_json(FUNDAMENTAL_FILE)
+        data = load_intermediate(FUNDAMENTAL_FILE, store)
     except FileNotFoundError:
         print(f"Error: {FUNDAMENTAL_FILE} not found.")
         return False
 
     listing_date_map = load_listing_dates()
-    sme_map = load_sme_map()
-    dhan_tech_map = map_scan_rows_by_symbol(DHAN_DATA_FILE, "Sym", "technical data", f"Warning: {DHAN_DATA_FILE} not found.")
+    sme_map = load_sme_map(store=store)
+    dhan_tech_map = map_scan_rows_by_symbol(
+        DHAN_DATA_FILE, "Sym", "technical data", f"Warning: {DHAN_DATA_FILE} not found.", store
+    )
     advanced_tech_map = map_scan_rows_by_symbol(
         ADVANCED_FILE,
         "Symbol",
         "advanced indicators",
         f"Warning: {ADVANCED_FILE} not found. Running without advanced indicators.",
+        store,
     )
 
     print(f"Analyzing {len(data)} stocks...")
+    techs = [dhan_tech_map.get(item.get("Symbol", "UNKNOWN"), {}) for item in data]
     final_data = [
         analyze_stock(
             item,
-            dhan_tech_map.get(item.get("Symbol", "UNKNOWN"), {}),
+            tech,
             advanced_tech_map.get(item.get("Symbol", "UNKNOWN"), {}),
             listing_date_map,
             sme_map,
+            fundamentals,
         )
-        for item in data
+        for item, tech, fundamentals in zip(data, techs, fundamental_records(data, techs))
     ]
 
     save_json(OUTPUT_FILE, final_data)
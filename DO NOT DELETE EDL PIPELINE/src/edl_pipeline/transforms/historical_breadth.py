@@ -9,6 +9,8 @@ import pandas as pd
 
 from pipeline_utils import BASE_DIR, load_json
 
+from ..features import default_feature_cache, load_features
+
 
 SYMBOL_OHLCV_DIR = os.path.join(BASE_DIR, "ohlcv_data")
 INDEX_OHLCV_DIR = os.path.join(BASE_DIR, "indices_ohlcv_data")
@@ -59,26 +61,15 @@ def empty_breadth_arrays(num_days):
     }
 
 
-def prepare_stock_history(csv_path, timeline):
-    df = pd.read_csv(csv_path)
-    if df.empty or len(df) < 5:
+def prepare_stock_history(csv_path, timeline, feature_cache=None):
+    full_df = load_features(csv_path, feature_cache)
+    if full_df.empty or len(full_df) < 5:
         return None
 
-    df = df[df["Date"].isin(timeline)].copy()
+    df = full_df[full_df["Date"].isin(timeline)]
     if df.empty:
         return None
-
-    full_df = pd.read_csv(csv_path)
-    full_df["SMA_10"] = full_df["Close"].rolling(10).mean()
-    full_df["SMA_20"] = full_df["Close"].rolling(20).mean()
-    full_df["SMA_50"] = full_df["Close"].rolling(50).mean()
-    full_df["SMA_200"] = full_df["Close"].rolling(200).mean()
-    full_df["Vol_SMA_20"] = full_df["Volume"].rolling(20).mean()
-    full_df["H_52W"] = full_df["High"].rolling(252).max()
-    full_df["L_52W"] = full_df["Low"].rolling(252).min()
-    full_df["Prev_Close"] = full_df["Close"].shift(1)
-    full_df["Daily_Ret"] = ((full_df["Close"] - full_df["Prev_Close"]) / full_df["Prev_Close"]) * 100
-    return full_df[full_df["Date"].isin(timeline)]
+    return df
 
 
 def update_breadth_arrays(analysis_df, date_to_idx, arrays):
@@ -101,23 +92,23 @@ def update_breadth_arrays(analysis_df, date_to_idx, arrays):
         if row["Close"] > row["SMA_10"]:
             arrays["above_10ma"][idx] += 1
 
-        if row["Daily_Ret"] >= 4:
+        if row["Daily_Return"] >= 4:
             arrays["up_4pc"][idx] += 1
-        if row["Daily_Ret"] <= -4:
+        if row["Daily_Return"] <= -4:
             arrays["down_4pc"][idx] += 1
 
-        if row["High"] >= row["H_52W"]:
+        if row["High"] >= row["High_252"]:
             arrays["high_52w"][idx] += 1
-        if row["Low"] <= row["L_52W"]:
+        if row["Low"] <= row["Low_252"]:
             arrays["low_52w"][idx] += 1
 
-        if row["Volume"] > row["Vol_SMA_20"]:
+        if row["Volume"] > row["Volume_SMA_20"]:
             arrays["vol_plus"][idx] += 1
         else:
             arrays["vol_minus"][idx] += 1
 
 
-def process_stock_histories(valid_symbols, timeline):
+def process_stock_histories(valid_symbols, timeline, feature_cache=None):
     date_to_idx = {date: i for i, date in enumerate(timeline)}
     arrays = empty_breadth_arrays(len(timeline))
     processed_count = 0
@@ -128,7 +119,7 @@ def process_stock_histories(valid_symbols, timeline):
             continue
 
         try:
-            analysis_df = prepare_stock_history(csv_path, timeline)
+            analysis_df = prepare_stock_history(csv_path, timeline, feature_cache)
             if analysis_df is None:
                 continue
             update_breadth_arrays(analysis_df, date_to_idx, arrays)
@@ -220,7 +211,11 @@ def calculate_historical_breadth():
         return False
 
     print("🧬 Processing stock-level history...")
-    arrays, processed_count = process_stock_histories(valid_symbols, timeline)
+    arrays, processed_count = process_stock_histories(
+        valid_symbols,
+        timeline,
+        default_feature_cache(),
+    )
     print(f"✅ Analyzed {processed_count} stocks. Merging with Index data...")
 
     rows = build_breadth_rows(timeline, arrays, load_index_data(timeline), processed_count)
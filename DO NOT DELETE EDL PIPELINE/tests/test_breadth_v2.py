@@ -1,4 +1,5 @@
 import contextlib
+import gzip
 import io
 import math
 import json
@@ -16,16 +17,27 @@ SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
-from edl_pipeline.breadth.aggregates import BreadthAccumulator
 from edl_pipeline.breadth.config import BreadthMethodology, load_methodology
 from edl_pipeline.breadth.indicators import prepare_history
 from edl_pipeline.breadth.indices import (
     generate_all_index_history,
     safe_index_symbol,
 )
+from edl_pipeline.breadth import evaluation
+from edl_pipeline.breadth.evaluation import evaluate_methodologies
 from edl_pipeline.breadth.mbi import enrich_records
-from edl_pipeline.breadth.pipeline import generate_market_breadth, load_index_closes
+from edl_pipeline.breadth.panel import (
+    aggregate_panel,
+    assemble_panel,
+    symbol_columns,
+)
+from edl_pipeline.breadth.pipeline import (
+    generate_market_breadth,
+    generate_universe_breadth,
+    load_index_closes,
+)
 from edl_pipeline.breadth.universe import build_universe_snapshot
+import calibrate_mbi_reference
 import process_mbi_market_breadth
 from process_mbi_market_breadth import history_coverage
 
@@ -42,6 +54,14 @@ def make_ohlcv(closes, start="2024-01-01"):
     })
 
 
+def panel_breadth(histories, methodology, memberships=None):
+    panel = assemble_panel(
+        {symbol: symbol_columns(history, methodology) for symbol, history in histories.items()},
+        methodology,
+    )
+    return aggregate_panel(panel, methodology, memberships)
+
+
 def blank_aggregate(date):
     row = {
         "date": date,
@@ -141,9 +161,7 @@ class BreadthV2Tests(unittest.TestCase):
     def test_negative_four_boundary_is_strict(self):
         closes = [100.0, 104.0, 99.84, 95.74656]
         prepared = prepare_history(make_ohlcv(closes), self.methodology)
-        accumulator = BreadthAccumulator(self.methodology)
-        accumulator.update(prepared)
-        records = accumulator.records()
+        records = panel_breadth({"S": prepared}, self.methodology)[0]
 
         self.assertEqual(records[1]["up_4"], 1)
         self.assertEqual(records[2]["down_4"], 0)
@@ -152,10 +170,7 @@ class BreadthV2Tests(unittest.TestCase):
     def test_metric_denominators_do_not_include_insufficient_history(self):
         long_history = prepare_history(make_ohlcv([100 + index for index in range(220)]), self.methodology)
         short_history = prepare_history(make_ohlcv([100 + index for index in range(30)], start="2024-09-23"), self.methodology)
-        accumulator = BreadthAccumulator(self.methodology)
-        accumulator.update(long_history)
-        accumulator.update(short_history)
-        latest = accumulator.records()[-1]
+        latest = panel_breadth({"LONG": long_history, "SHORT": short_history}, self.methodology)[0][-1]
 
         self.assertEqual(latest["eligible_with_candle"], 2)
         self.assertEqual(latest["valid_sma_20"], 2)
@@ -268,6 +283,59 @@ class BreadthV2Tests(unittest.TestCase):
         self.assertAlmostEqual(output[1]["xp_smoothed_advances"], 8.38)
         self.assertTrue(math.isfinite(output[1]["xp"]))
 
+    def test_columnar_enrichment_matches_scalar_recurrences(self):
+        rows = []
+        for index in range(150):
+            row = blank_aggregate(f"d{index:03d}")
+            row["up_4_5"] = (index * 7) % 11
+            row["down_4_5"] = (index * 5) % 4
+            row["advances"] = (index * 3) % 10
+            row["declines"] = 10 - row["advances"]
+            row["above_sma_10"] = (index * 3) % 11
+            row["above_sma_20"] = (index * 7) % 11
+            if index == 40:
+                row["eligible_with_candle"] = 0
+            rows.append(row)
+        index_closes = {f"d{index:03d}": 100.0 + index for index in range(0, 150, 4)}
+
+        output = enrich_records(rows, self.methodology, index_closes)
+
+        def log_odds(percentage):
+            bounded = min(max(percentage, 0.01), 99.99)
+            return math.log(bounded / (100.0 - bounded))
+
+        smoothed = None
+        xp = self.methodology.xp_initial
+        for index, (row, result) in enumerate(zip(rows, output)):
+            up = row["up_4_5"]
+            smoothed = up if smoothed is None else 0.162 * up + 0.838 * smoothed
+            self.assertAlmostEqual(result["xp_smoothed_advances"], smoothed)
+
+            if row["eligible_with_candle"] == 0:
+                self.assertIsNone(result["xp_raw"])
+            else:
+                p10 = 100.0 * row["above_sma_10"] / row["eligible_with_candle"]
+                p20 = 100.0 * row["above_sma_20"] / row["eligible_with_candle"]
+                xp = math.exp(
+                    0.592 * math.log(xp)
+                    + 0.471 * math.log(max(smoothed, 0.5))
+                    + 0.198 * log_odds(p10)
+                    + 0.334
+                    - 0.067 * math.log(max(row["down_4_5"], 0.5))
+                    - 0.077 * log_odds(p20)
+                )
+                self.assertAlmostEqual(result["xp_raw"] / xp, 1.0, places=10)
+
+            window = rows[max(0, index - 4):index + 1]
+            declines = sum(item["declines"] for item in window)
+            self.assertAlmostEqual(
+                result["advance_decline_ratio_5d"],
+                sum(item["advances"] for item in window) / declines,
+            )
+
+        self.assertIsNone(output[3]["index_change_pct"])
+        self.assertAlmostEqual(output[8]["index_change_pct"], 100.0 * (108.0 / 104.0 - 1))
+
     def test_end_to_end_generator_writes_auditable_artifacts(self):
         universe = [
             {"Sym": "AAA", "DispSym": "AAA Ltd", "Isin": "I1", "Sid": 1, "Ltp": 130, "Mcap": 1500},
@@ -331,11 +399,322 @@ class BreadthV2Tests(unittest.TestCase):
             self.assertEqual(json.loads(output_path.read_text(encoding="utf-8"))["methodology"]["version"], "mbi-xp-v2.2")
             self.assertEqual(json.loads(snapshot_path.read_text(encoding="utf-8"))["eligible_count"], 2)
 
+    def test_panel_membership_masks_match_separate_panels(self):
+        histories = {}
+        for position in range(6):
+            closes = [
+                100 + ((index * (position + 3)) % 17) - (index % (position + 5)) * 0.5
+                for index in range(120 + position * 40)
+            ]
+            frame = make_ohlcv(closes, start=f"2024-01-0{position + 1}")
+            frame.loc[frame.index % 11 == position, "Volume"] = None
+            histories[f"S{position}"] = prepare_history(frame, self.methodology)
+
+        mask = [[True] * 6, [True, False, True, False, False, False]]
+        everything, subset = panel_breadth(histories, self.methodology, mask)
+
+        self.assertEqual(len(everything), len({date for history in histories.values() for date in history["Date"]}))
+        self.assertEqual(max(row["eligible_with_candle"] for row in everything), 6)
+        self.assertEqual(
+            subset,
+            panel_breadth({symbol: histories[symbol] for symbol in ("S0", "S2")}, self.methodology)[0],
+        )
+
+    def test_universe_breadth_counts_memberships_in_one_panel(self):
+        universe = [
+            {
+                "Sym": "AAA", "Isin": "I1", "Sid": 1, "Ltp": 130, "Mcap": 1500,
+                "Sector": "Tech", "idxlist": [{"Indexid": 13, "Name": "Nifty 50"}],
+            },
+            {
+                "Sym": "BBB", "Isin": "I2", "Sid": 2, "Ltp": 80, "Mcap": 2000,
+                "Sector": "Tech", "idxlist": [],
+            },
+            {
+                "Sym": "CCC", "Isin": "I3", "Sid": 3, "Ltp": 40, "Mcap": 500,
+                "Sector": "Energy", "idxlist": [{"Indexid": 99, "Name": "Unlisted"}],
+            },
+        ]
+        index_rows = [{"IndexName": "Nifty 50", "Symbol": "NIFTY", "IndexID": 13}]
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            ohlcv = root / "ohlcv"
+            indices = root / "indices"
+            ohlcv.mkdir()
+            indices.mkdir()
+            make_ohlcv([100 + index * 0.2 for index in range(60)]).to_csv(ohlcv / "AAA.csv", index=False)
+            make_ohlcv([200 - index * 0.1 for index in range(60)]).to_csv(ohlcv / "BBB.csv", index=False)
+            make_ohlcv([50 + index % 3 for index in range(60)]).to_csv(ohlcv / "CCC.csv", index=False)
+            make_ohlcv([1000 + index for index in range(60)]).to_csv(root / "BENCH.csv", index=False)
+            make_ohlcv([500 + 2 * index for index in range(60)]).to_csv(indices / "NIFTY.csv", index=False)
+
+            market, _snapshot = generate_market_breadth(
+                universe,
+                ohlcv,
+                root / "BENCH.csv",
+                self.methodology,
+                root / "breadth.json",
+                root / "snapshot.json",
+                generated_at="2026-01-01T00:00:00+00:00",
+            )
+            artifact = generate_universe_breadth(
+                universe,
+                ohlcv,
+                root / "BENCH.csv",
+                self.methodology,
+                root / "universes.json.gz",
+                index_rows=index_rows,
+                indices_dir=indices,
+                industries={"AAA": "Software", "BBB": "Software", "CCC": "N/A"},
+                sme_symbols={"CCC"},
+                generated_at="2026-01-01T00:00:00+00:00",
+            )
+            with gzip.open(root / "universes.json.gz", "rt", encoding="utf-8") as handle:
+                self.assertEqual(json.load(handle), artifact)
+
+        universes = {item["key"]: item for item in artifact["universes"]}
+        self.assertEqual(
+            list(universes),
+            [
+                "all", "index:13", "index:99", "sector:Energy", "sector:Tech",
+                "industry:Software", "board:MAINBOARD", "board:SME", "market_cap:large",
+            ],
+        )
+        self.assertEqual(universes["all"]["records"], market["records"])
+        self.assertEqual(universes["sector:Tech"]["member_count"], 2)
+        self.assertEqual(universes["sector:Tech"]["records"][-1]["eligible_with_candle"], 2)
+        self.assertEqual(universes["board:SME"]["records"][-1]["eligible_with_candle"], 1)
+        self.assertAlmostEqual(
+            universes["index:13"]["records"][-1]["index_change_pct"],
+            round(100 * (618 / 616 - 1), 6),
+        )
+        self.assertAlmostEqual(
+            universes["sector:Tech"]["records"][-1]["index_change_pct"],
+            round(100 * (1059 / 1058 - 1), 6),
+        )
+        self.assertIsNone(universes["index:99"]["index_history"])
+        self.assertEqual(artifact["quality"]["missing_index_history"], ["index:99"])
+
+    def test_point_in_time_universe_scales_market_cap_by_historical_close(self):
+        universe = [
+            {"Sym": "AAA", "Isin": "I1", "Sid": 1, "Ltp": 40, "Mcap": 150},
+            {"Sym": "BBB", "Isin": "I2", "Sid": 2, "Ltp": 50, "Mcap": 80},
+            {"Sym": "PENNY", "Isin": "I3", "Sid": 3, "Ltp": 0.5, "Mcap": 1000},
+            {"Sym": "NOCAP", "Isin": "I4", "Sid": 4, "Ltp": 10, "Mcap": None},
+        ]
+        methodology = replace(self.methodology, universe_mode="point_in_time").validate()
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            ohlcv = root / "ohlcv"
+            ohlcv.mkdir()
+            make_ohlcv([100] * 30 + [40] * 30).to_csv(ohlcv / "AAA.csv", index=False)
+            make_ohlcv([200] * 30 + [50] * 30).to_csv(ohlcv / "BBB.csv", index=False)
+            make_ohlcv([0.5] * 60).to_csv(ohlcv / "PENNY.csv", index=False)
+            make_ohlcv([10] * 60).to_csv(ohlcv / "NOCAP.csv", index=False)
+            make_ohlcv([1000 + index for index in range(60)]).to_csv(root / "NIFTY.csv", index=False)
+
+            outputs = {}
+            for mode in (self.methodology, methodology):
+                outputs[mode.universe_mode] = generate_market_breadth(
+                    universe,
+                    ohlcv,
+                    root / "NIFTY.csv",
+                    replace(mode, output_sessions=60),
+                    root / "breadth.json",
+                    root / "snapshot.json",
+                    generated_at="2026-01-01T00:00:00+00:00",
+                )
+
+        artifact, snapshot = outputs["point_in_time"]
+        self.assertEqual(snapshot["eligible_count"], 1)
+        self.assertEqual(snapshot["history_candidates"], ["AAA", "BBB", "PENNY"])
+        self.assertEqual(artifact["quality"]["processed_symbols"], 3)
+        counts = [row["eligible_with_candle"] for row in artifact["records"]]
+        self.assertEqual(counts, [2] * 30 + [1] * 30)
+        self.assertEqual(artifact["records"][30]["down_4_5"], 1)
+
+        latest, _snapshot = outputs["latest_snapshot"]
+        self.assertEqual(
+            [row["eligible_with_candle"] for row in latest["records"]],
+            [1] * 60,
+        )
+
+    def test_methodology_variants_share_panels_and_match_single_runs(self):
+        universe = [
+            {"Sym": "AAA", "Isin": "I1", "Sid": 1, "Ltp": 130, "Mcap": 1500},
+            {"Sym": "BBB", "Isin": "I2", "Sid": 2, "Ltp": 80, "Mcap": 2000},
+            {"Sym": "CCC", "Isin": "I3", "Sid": 3, "Ltp": 40, "Mcap": 500},
+        ]
+        variants = [
+            replace(self.methodology, output_sessions=40),
+            replace(self.methodology, version="strict", output_sessions=40, advance_threshold=5.0,
+                    minimum_market_cap_crore=1000.0),
+            replace(self.methodology, version="ema", output_sessions=40, default_ma_type="EMA"),
+            replace(self.methodology, version="short", output_sessions=40, monthly_sessions=10),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            ohlcv = root / "ohlcv"
+            ohlcv.mkdir()
+            make_ohlcv([100 + (index * 7) % 13 for index in range(80)]).to_csv(ohlcv / "AAA.csv", index=False)
+            make_ohlcv([80 + (index * 5) % 11 for index in range(80)]).to_csv(ohlcv / "BBB.csv", index=False)
+            make_ohlcv([40 + (index * 3) % 7 for index in range(80)]).to_csv(ohlcv / "CCC.csv", index=False)
+            make_ohlcv([1000 + index for index in range(80)]).to_csv(root / "NIFTY.csv", index=False)
+
+            with mock.patch(
+                "edl_pipeline.breadth.evaluation.build_panel",
+                wraps=evaluation.build_panel,
+            ) as build_panel:
+                artifacts, report = evaluate_methodologies(
+                    universe,
+                    ohlcv,
+                    root / "NIFTY.csv",
+                    variants,
+                    output_dir=root / "variants",
+                    report_path=root / "comparison.json",
+                    generated_at="2026-01-01T00:00:00+00:00",
+                )
+            self.assertEqual(build_panel.call_count, 2)
+            self.assertTrue((root / "variants" / "market_breadth_strict.json").exists())
+            self.assertTrue((root / "comparison.json").exists())
+
+            for methodology, (name, artifact) in zip(variants, artifacts.items()):
+                expected, _snapshot = generate_market_breadth(
+                    universe,
+                    ohlcv,
+                    root / "NIFTY.csv",
+                    methodology,
+                    root / "single.json",
+                    root / "snapshot.json",
+                    generated_at="2026-01-01T00:00:00+00:00",
+                )
+                self.assertEqual(artifact["records"], expected["records"], name)
+                self.assertEqual(artifact["quality"], expected["quality"], name)
+
+        self.assertEqual(list(artifacts), ["mbi-xp-v2.2", "strict", "ema", "short"])
+        self.assertEqual(artifacts["strict"]["quality"]["processed_symbols"], 2)
+        self.assertEqual(report["baseline"], "mbi-xp-v2.2")
+        self.assertEqual(
+            report["variants"][1]["changed_settings"],
+            {"version": "strict", "minimum_market_cap_crore": 1000.0, "advance_threshold": 5.0},
+        )
+        self.assertEqual(report["variants"][0]["mean_absolute_difference"]["ratio_4_5"], 0)
+
+    def test_calibration_grid_broadcast_matches_single_cells(self):
+        dates = ["2026-07-13", "2026-07-14", "2026-07-15", "2026-07-16", "2026-07-17"]
+        snapshot = {"stocks": [
+            {
+                "symbol": "AAA",
+                "market_cap": 1200.0,
+                "latest_price": 110.0,
+                "history": dict(zip(dates, [100.0, 104.0, 99.0, 105.0, 110.0])),
+            },
+            {
+                "symbol": "BBB",
+                "market_cap": 300.0,
+                "latest_price": 50.0,
+                "history": dict(zip(dates[1:], [40.0, 42.0, 38.0, 50.0])),
+            },
+            {
+                "symbol": "CCC",
+                "market_cap": 5000.0,
+                "latest_price": 20.0,
+                "history": {dates[0]: 25.0, dates[2]: 24.0, dates[4]: 20.0},
+            },
+        ]}
+        panel = calibrate_mbi_reference.CalibrationPanel(snapshot)
+        data = calibrate_mbi_reference.observations(panel, dates)
+        floors = [0.0, 250.0, 1000.0]
+        thresholds = [3.5, 4.5, 5.5]
+
+        for cap_mode in calibrate_mbi_reference.CAP_MODES:
+            for price_mode in calibrate_mbi_reference.PRICE_MODES:
+                eligible, advances, declines = calibrate_mbi_reference.calculate_ratio_grid(
+                    data, floors, thresholds, cap_mode, price_mode
+                )
+                for floor_index, floor in enumerate(floors):
+                    for threshold_index, threshold in enumerate(thresholds):
+                        _ratios, counts, _pcts = calibrate_mbi_reference.calculate_ratios(
+                            data, floor, threshold, cap_mode, price_mode
+                        )
+                        for position, date in enumerate(dates):
+                            self.assertEqual(
+                                counts[date],
+                                {
+                                    "eligible": eligible[position, floor_index],
+                                    "advances": advances[position, floor_index, threshold_index],
+                                    "declines": declines[position, floor_index, threshold_index],
+                                },
+                            )
+
+        # CCC's return on 07-15 is against its own previous close on 07-13.
+        _ratios, counts, _pcts = calibrate_mbi_reference.calculate_ratios(
+            data, 0.0, 3.5, "latest_snapshot", "latest_snapshot"
+        )
+        self.assertEqual(counts["2026-07-13"]["eligible"], 0)
+        self.assertEqual(
+            counts["2026-07-15"],
+            {"eligible": 3, "advances": 1, "declines": 2},
+        )
+        self.assertEqual(
+            counts["2026-07-17"],
+            {"eligible": 3, "advances": 2, "declines": 1},
+        )
+
     def test_market_breadth_requires_valid_index_history(self):
         with tempfile.TemporaryDirectory() as tmp:
             with self.assertRaises(FileNotFoundError):
                 load_index_closes(Path(tmp) / "NIFTY.csv")
 
+    def test_calibration_optimizer_refines_grid_start_with_walk_forward(self):
+        module = calibrate_mbi_reference
+        dates = ["2026-07-14", *sorted(module.REFERENCE_45R)]
+        stocks = []
+        for index in range(60):
+            closes = [100.0]
+            for step in range(1, len(dates)):
+                change = ((index * 7 + step * 13) % 23 - 11) / 100.0
+                closes.append(round(closes[-1] * (1.0 + change), 2))
+            stocks.append({
+                "symbol": f"S{index}",
+                "market_cap": 50.0 * (index + 1),
+                "latest_price": closes[-1],
+                "history": dict(zip(dates, closes)),
+            })
+        data = module.observations(module.CalibrationPanel({"stocks": stocks}))
+
+        objective = module.CalibrationObjective(data, "latest_snapshot", "latest_snapshot")
+        params, score, _rounds = module.coordinate_descent(objective)
+        result = module._calibration_result(
+            "latest_snapshot",
+            "latest_snapshot",
+            params["market_cap_floor_crore"],
+            params["return_threshold_pct"],
+            *module.calculate_ratios(
+                data,
+                params["market_cap_floor_crore"],
+                params["return_threshold_pct"],
+                "latest_snapshot",
+                "latest_snapshot",
+            ),
+        )
+        self.assertAlmostEqual(score, result["score"])
+        self.assertLessEqual(score, objective(module.OPTIMIZER_START))
+        evaluations = objective.evaluations
+        objective(params)
+        self.assertEqual(objective.evaluations, evaluations)
+
+        confidence = module.parameter_confidence(objective, params)
+        for name, value in params.items():
+            self.assertLessEqual(confidence[name]["low"], value)
+            self.assertLessEqual(value, confidence[name]["high"])
+
+        walk_forward = module.walk_forward_45r(data, "latest_snapshot", "latest_snapshot")
+        self.assertEqual(
+            [fold["test_date"] for fold in walk_forward["folds"]],
+            dates[1 + module.WALK_FORWARD_MIN_TRAIN:],
+        )
+
     def test_history_coverage_rejects_catastrophic_partial_data(self):
         self.assertEqual(history_coverage(1, 100), 0.01)
         self.assertEqual(history_coverage(90, 100), 0.90)
@@ -0,0 +1,168 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from advanced_metrics_processor import process_symbol_csv
+from edl_pipeline.breadth.config import BreadthMethodology
+from edl_pipeline.breadth.indicators import prepare_history
+from edl_pipeline.breadth.pipeline import generate_market_breadth
+from edl_pipeline.features import FeatureCache, build_feature_cache, build_features
+from edl_pipeline.technical_indicators import compute_indicators, parity_report
+from edl_pipeline.transforms.fundamentals import average_status, classic_pivot, technical_sentiment
+
+
+def write_ohlcv(path, closes, start="2024-01-01"):
+    dates = pd.bdate_range(start, periods=len(closes))
+    pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d"),
+        "Open": [value - 0.5 for value in closes],
+        "High": [value + 1 for value in closes],
+        "Low": [value - 1 for value in closes],
+        "Close": closes,
+        "Volume": [1000 + 7 * index for index in range(len(closes))],
+    }).to_csv(path, index=False)
+
+
+class FeatureCacheTests(unittest.TestCase):
+    def test_cache_is_keyed_by_ohlcv_content(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            csv_path = root / "ABC.csv"
+            write_ohlcv(csv_path, [100 + (index % 9) for index in range(300)])
+            cache = FeatureCache(root / "cache")
+
+            self.assertEqual(cache.ensure(csv_path), "built")
+            self.assertEqual(cache.ensure(csv_path), "cached")
+            cached = cache.load(csv_path)
+            expected = build_features(pd.read_csv(csv_path))
+            pd.testing.assert_frame_equal(cached, expected, check_dtype=False)
+
+            write_ohlcv(csv_path, [100 + (index % 7) for index in range(300)])
+            self.assertEqual(cache.ensure(csv_path), "built")
+
+            csv_path.unlink()
+            statuses, pruned = build_feature_cache(root, cache, workers=1)
+            self.assertEqual((statuses, pruned), ({}, 1))
+
+    def test_cached_features_are_a_superset_of_breadth_indicators(self):
+        methodology = BreadthMethodology()
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = Path(tmp) / "ABC.csv"
+            write_ohlcv(csv_path, [50 + (index % 13) * 1.5 for index in range(280)])
+            features = FeatureCache(Path(tmp) / "cache", methodology).load(csv_path)
+            prepared = prepare_history(pd.read_csv(csv_path), methodology)
+
+        pd.testing.assert_frame_equal(
+            features.loc[:, prepared.columns],
+            prepared,
+            check_dtype=False,
+        )
+
+    def test_consumers_match_uncached_outputs(self):
+        methodology = BreadthMethodology(output_sessions=30)
+        universe = [
+            {"Sym": symbol, "Isin": f"INE{index:09d}", "Sid": index, "Ltp": 10, "Mcap": 500}
+            for index, symbol in enumerate(("AAA", "BBB"), start=1)
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            ohlcv = root / "ohlcv"
+            ohlcv.mkdir()
+            write_ohlcv(ohlcv / "AAA.csv", [100 + (index % 11) for index in range(260)])
+            write_ohlcv(ohlcv / "BBB.csv", [80 - (index % 5) for index in range(260)])
+            write_ohlcv(root / "NIFTY.csv", [1000 + index for index in range(260)])
+            cache = FeatureCache(root / "cache", methodology)
+
+            outputs = []
+            for feature_cache in (None, cache):
+                artifact, _snapshot = generate_market_breadth(
+                    universe,
+                    ohlcv,
+                    root / "NIFTY.csv",
+                    methodology,
+                    root / "breadth.json",
+                    root / "snapshot.json",
+                    generated_at="2026-01-01T00:00:00+00:00",
+                    feature_cache=feature_cache,
+                )
+                outputs.append(artifact["records"])
+            self.assertEqual(artifact["quality"]["processed_symbols"], 2)
+            self.assertEqual(outputs[0], outputs[1])
+
+            self.assertEqual(
+                process_symbol_csv(ohlcv / "AAA.csv"),
+                process_symbol_csv(ohlcv / "AAA.csv", cache),
+            )
+
+            with self.assertRaises(ValueError):
+                generate_market_breadth(
+                    universe,
+                    ohlcv,
+                    root / "NIFTY.csv",
+                    methodology,
+                    root / "breadth.json",
+                    root / "snapshot.json",
+                    feature_cache=FeatureCache(root / "cache", BreadthMethodology(monthly_sessions=20)),
+                )
+
+    def test_incomplete_ohlcv_rows_are_dropped_before_features(self):
+        closes = [100 + (index % 13) for index in range(300)]
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            write_ohlcv(root / "GAPS.csv", closes)
+            frame = pd.read_csv(root / "GAPS.csv")
+            frame.loc[40, "Volume"] = None
+            frame.loc[120, "High"] = None
+            frame.loc[250, "Open"] = None
+            frame.to_csv(root / "GAPS.csv", index=False)
+            frame.drop(index=[40, 120, 250]).to_csv(root / "COMPLETE.csv", index=False)
+            cache = FeatureCache(root / "cache")
+
+            expected = process_symbol_csv(root / "COMPLETE.csv")[1]
+            self.assertIsNotNone(expected)
+            self.assertEqual(process_symbol_csv(root / "GAPS.csv")[1], expected)
+            self.assertEqual(process_symbol_csv(root / "GAPS.csv", cache)[1], expected)
+
+    def test_local_indicator_payloads_match_endpoint_shape(self):
+        closes = [100 + index * 0.5 + (index % 6) for index in range(260)]
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            ohlcv = root / "ohlcv"
+            ohlcv.mkdir()
+            write_ohlcv(ohlcv / "ABC.csv", closes)
+            write_ohlcv(ohlcv / "NEW.csv", closes[:30])
+            write_ohlcv(ohlcv / "SKIP.csv", closes)
+            payloads, errors = compute_indicators(ohlcv, {"ABC", "NEW"}, FeatureCache(root / "cache"))
+
+        self.assertEqual(errors, {})
+        records = {record["Symbol"]: record for record in payloads}
+        self.assertEqual(sorted(records), ["ABC", "NEW"])
+        abc = records["ABC"]
+        self.assertEqual([item["Indicator"] for item in abc["SMA"]], ["20-SMA", "50-SMA", "200-SMA"])
+        self.assertAlmostEqual(abc["SMA"][0]["Value"], sum(closes[-20:]) / 20, places=2)
+        high, low, close = closes[-1] + 1, closes[-1] - 1, closes[-1]
+        self.assertAlmostEqual(abc["Pivots"][0]["Classic"]["PP"], (high + low + close) / 3, places=2)
+        self.assertEqual(classic_pivot(abc), abc["Pivots"][0]["Classic"]["PP"])
+        self.assertEqual(average_status(abc["SMA"], "-SMA", close)[0].split(":")[0], "SMA 20")
+        self.assertRegex(technical_sentiment(abc), r"^RSI: \w+ \| MACD: (Bullish|Bearish|Neutral)$")
+        self.assertEqual([item["Indicator"] for item in records["NEW"]["SMA"]], ["20-SMA"])
+        self.assertEqual([item["Indicator"] for item in records["NEW"]["TechnicalIndicators"]], ["RSI(14)"])
+
+        remote = {"ABC": dict(abc, SMA=[dict(abc["SMA"][0], Value=str(abc["SMA"][0]["Value"] * 1.02))])}
+        report = parity_report(records, remote)
+        self.assertEqual(report["symbols_compared"], 1)
+        self.assertEqual(report["fields"]["20-SMA"]["within_tolerance"], 0)
+        self.assertEqual(report["fields"]["Classic PP"]["within_tolerance"], 1)
+        self.assertEqual(report["actions"]["MACD"], {"compared": 1, "matching": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from edl_pipeline.fundamentals_index import lookup_fundamentals, write_fundamentals_index
+from edl_pipeline.fundamentals_store import (
+    FundamentalsStore,
+    accelerating,
+    parse_period,
+    update_fundamentals_store,
+)
+
+
+QUARTERS = [
+    "Jun 2026", "Mar 2026", "Dec 2025", "Sep 2025", "Jun 2025",
+    "Mar 2025", "Dec 2024", "Sep 2024", "Jun 2024", "Mar 2024",
+]
+
+
+def fundamental_row(isin, symbol, labels, eps):
+    return {
+        "isin": isin,
+        "Symbol": symbol,
+        "incomeStat_cq": {
+            "YEAR": "|".join(labels),
+            "EPS": "|".join(str(value) for value in eps),
+            "SALES": "|".join(str(value * 10) for value in eps),
+        },
+        "incomeStat_cy": {"YEAR": "Mar 2026|Mar 2025", "EPS": "20|16"},
+    }
+
+
+class FundamentalsStoreTests(unittest.TestCase):
+    def test_updates_accumulate_periods_beyond_the_upstream_window(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            source = root / "fundamental_data.json"
+            source.write_text(json.dumps([
+                fundamental_row("INE1", "AAA", QUARTERS[1:], [9, 7, 5, 4, 4, 4, 4, 4, 4]),
+                {"isin": "INE2", "incomeStat_cq": {"YEAR": "Q1|Q0", "EPS": "1|2"}},
+            ]))
+
+            first = update_fundamentals_store(source, FundamentalsStore(root / "store"))
+            self.assertEqual(first["quarterly"]["new_periods"], 9)
+            self.assertEqual(first["quarterly"]["unparsed_isins"], 1)
+            self.assertEqual(first["annual"]["rows"], 2)
+            self.assertIsNone(update_fundamentals_store(source, FundamentalsStore(root / "store")))
+
+            source.write_text(json.dumps([
+                fundamental_row("INE1", "AAA", QUARTERS[:5], [12, 9.5, 7, 5, 4]),
+            ]))
+            second = update_fundamentals_store(source, FundamentalsStore(root / "store"))
+            self.assertEqual(second["quarterly"]["new_periods"], 1)
+
+            store = FundamentalsStore(root / "store")
+            quarterly = store.load("quarterly")
+            self.assertEqual(len(quarterly), 10)
+            self.assertEqual(quarterly["label"].tolist()[-2:], ["Mar 2026", "Jun 2026"])
+            self.assertEqual(quarterly["EPS"].tolist()[-2:], [9.5, 12.0])
+            self.assertEqual(store.symbols, {"INE1": "AAA"})
+
+    def test_acceleration_screen_requires_consecutive_rising_yoy_growth(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = FundamentalsStore(Path(tmp))
+            gapped = QUARTERS[:3] + QUARTERS[4:]
+            store.update([
+                fundamental_row("INE1", "AAA", QUARTERS[:8], [12, 9, 7, 5, 4, 4, 4, 4]),
+                fundamental_row("INE2", "BBB", QUARTERS[:8], [12, 9, 7, 5, 4, 2, 4, 4]),
+                fundamental_row("INE3", "CCC", gapped[:8], [12, 9, 7, 5, 4, 4, 4, 4]),
+            ])
+
+            matches = accelerating(store, "EPS", 3)
+
+            self.assertEqual([match["symbol"] for match in matches], ["AAA"])
+            self.assertEqual(matches[0]["latest_period"], "2026-06")
+            self.assertEqual(matches[0]["growth"], [200.0, 125.0, 75.0, 25.0])
+            self.assertEqual(parse_period("Mar 2026"), parse_period("2026-03"))
+            self.assertIsNone(parse_period("Q1"))
+
+    def test_index_returns_one_record_by_symbol_or_isin(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "fundamentals_index.sqlite"
+            with self.assertRaises(FileNotFoundError):
+                lookup_fundamentals("AAA", path)
+
+            rows = [
+                fundamental_row("INE1", "AAA", QUARTERS[:2], [2, 1]),
+                fundamental_row("INE2", "BBB", QUARTERS[:2], [4, 3]),
+                {"Symbol": "NOISIN"},
+            ]
+            self.assertEqual(write_fundamentals_index(rows, path), 2)
+            self.assertEqual(write_fundamentals_index(rows[1:], path), 1)
+
+            self.assertEqual(lookup_fundamentals("BBB", path), rows[1])
+            self.assertEqual(lookup_fundamentals("INE2", path)["Symbol"], "BBB")
+            self.assertIsNone(lookup_fundamentals("AAA", path))
+
+
+if __name__ == "__main__":
+    unittest.main()
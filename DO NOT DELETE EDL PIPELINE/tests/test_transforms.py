@@ -1,34 +1,63 @@
 import contextlib
+from contextlib import closing
+from datetime import date
 import gzip
 import io
 import json
+import sqlite3
 import sys
 import tempfile
+import time
 import unittest
 from unittest import mock
 from pathlib import Path
 
+import requests
+
 ROOT = Path(__file__).resolve().parents[1]
 SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
 from fetch_bulk_block_deals import date_chunks, dedupe_deals
+import fetch_company_filings
 from fetch_company_filings import dedupe_filings
 from fetch_corporate_actions import flatten_actions
 from fetch_dhan_data import build_master_map
+import dhan_next_utils
+import fetch_advanced_indicators
+import fetch_fundamental_data
+import fetch_market_news
+import fetch_new_announcements
 from fetch_fno_expiry import flatten_expiry_data
 from fetch_fno_lot_sizes import clean_lot_size_item
-from advanced_metrics_processor import merge_historical_metrics, process_symbol_csv
+from advanced_metrics_processor import merge_historical_metrics, process_symbol_chunk, process_symbol_csv
 from standardize_stock_artifact import canonicalize_stock
 from bulk_market_analyzer import analyze_stock, calculate_cagr
+from edl_pipeline.transforms.fundamentals import fundamental_records
 from process_market_breadth import generate_analytics
 from nse_archive_utils import clean_records
 from ohlcv_utils import merge_rows_by_date, read_ohlcv_csv, rows_from_tick_data, write_ohlcv_csv
-from pipeline_utils import apply_sma_fields, chunked, load_json, save_json
+from pipeline_utils import BASE_PATH, apply_sma_fields, chunked, load_json, save_json
 from run_full_pipeline import env_bool
+from edl_pipeline.batching import BatchEndpoint, BatchFetcher, batch_size
+from edl_pipeline.crawler import Crawler, Endpoint
+from edl_pipeline.field_usage import field_usage
+from edl_pipeline.http_cache import CachePolicy, ResponseCache, run_cache_stats
+from edl_pipeline.scanx_planner import CONSUMER_QUERIES, DASHBOARD_QUERY, ScanxPlanner, ScanxQuery, superset_query
+from edl_pipeline.priority import coverage_by_bucket, market_cap_ranks, priority_key
+from edl_pipeline.filing_classifier import KEYWORD_CATEGORIES, FilingClassifier, classify_filing
+from edl_pipeline.filings_store import STORE_VERSION, FilingsStore
+from edl_pipeline.intermediate_store import IntermediateStore, intermediate_name, load_intermediate
+from edl_pipeline.news_store import NewsStore
+from process_earnings_performance import get_earnings_info
 from edl_pipeline.transforms.events import (
     apply_events_to_master,
+    collect_filing_events,
+    collect_filing_events_and_headlines,
+    collect_market_news,
+    collect_news_feed,
+    collect_stored_filing_events,
     collect_circuit_revision_events,
     collect_deal_events,
     collect_surveillance_events,
@@ -151,6 +180,46 @@ class TransformTests(unittest.TestCase):
         self.assertEqual(result["sma10"], 90.0)
         self.assertEqual(result["perf_6m"], 4.5)
 
+
+    def test_fundamental_records_match_single_stock_fields_across_edge_cases(self):
+        items = [
+            {
+                "Symbol": "ABC",
+                "incomeStat_cq": {"NET_PROFIT": "10|5|4|3|2", "EPS": "2|0|x", "SALES": "", "OPM": "5|-5"},
+                "incomeStat_cy": {"EPS": "8", "SALES": "200|180|160|140|120|-1"},
+                "TTM_cy": {"EPS": "bad"},
+                "CV": {"STOCK_PE": "20", "MARKET_CAP": "500"},
+                "sHp": {"FII": "10|8", "PROMOTER": "-1"},
+                "bs_c": {"NON_CURRENT_LIABILITIES": "50", "TOTAL_EQUITY": "0"},
+            },
+            {"Symbol": "DEF", "CV": {"MARKET_CAP": "250"}, "sHp": {"PROMOTER": "75.5|70"}},
+            {
+                "Symbol": "GHI",
+                "incomeStat_cq": {"EPS": "1.5|1|1|1|0.5|0.4|0.3"},
+                "incomeStat_cy": {"SALES": "300|0|0|0|0|100"},
+                "TTM_cy": {"EPS": "5"},
+                "CV": {"STOCK_PE": "30"},
+                "sHp": {"PROMOTER": "50"},
+            },
+        ]
+        techs = [{"Ltp": "50"}, {}, {"Ltp": "10", "Mcap": "100", "TotalShares": "20000000"}]
+
+        records = fundamental_records(items, techs)
+
+        for item, tech, record in zip(items, techs, records):
+            single = analyze_stock(item, tech, {}, {})
+            batched = analyze_stock(item, tech, {}, {}, None, record)
+            self.assertEqual(json.dumps(batched), json.dumps(single))
+        self.assertEqual(records[0]["EPS Previous Quarter"], 0.0)
+        self.assertEqual(records[0]["QoQ % EPS Latest"], 0.0)
+        self.assertEqual(records[0]["Sales Growth 5 Years(%)"], 0.0)
+        self.assertEqual(records[0]["D/E"], 0.0)
+        self.assertIsNone(records[0]["Free Float(%)"])
+        self.assertEqual(records[1]["Float Shares(Cr.)"], 0.0)
+        self.assertEqual(records[2]["Free Float(%)"], 50.0)
+        self.assertEqual(records[2]["Float Shares(Cr.)"], 1.0)
+        self.assertEqual(records[2]["Forward P/E"], 25.0)
+        self.assertEqual(records[2]["Sales Growth 5 Years(%)"], 24.57)
     def test_historical_metrics_do_not_replace_live_scanner_values(self):
         stock = {"rupee_volume": 1000.0, "sma10": 101.0, "sma20": 102.0, "sma50": 103.0, "sma200": 104.0}
         merge_historical_metrics(stock, {
@@ -243,6 +312,37 @@ class TransformTests(unittest.TestCase):
         self.assertEqual(metrics["as_of_date"], rows[-2]["Date"])
         self.assertTrue(metrics["breakout_above_20d_high"])
 
+    def test_ohlcv_metrics_null_long_windows_for_short_history(self):
+        pandas = __import__("pandas")
+        rows = [
+            {
+                "Date": (pandas.Timestamp("2025-01-01") + pandas.Timedelta(days=index)).strftime("%Y-%m-%d"),
+                "Open": 100,
+                "High": 100,
+                "Low": 100,
+                "Close": 100,
+                "Volume": 1_000,
+            }
+            for index in range(30)
+        ]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = Path(tmp) / "NEWIPO.csv"
+            pandas.DataFrame(rows).to_csv(csv_path, index=False)
+            (Path(tmp) / "BROKEN.csv").write_text("Date,Close\n2025-01-01,1\n", encoding="utf-8")
+            results = process_symbol_chunk([csv_path, Path(tmp) / "BROKEN.csv"])
+
+        symbol, metrics, error = results[0]
+        self.assertEqual((symbol, error), ("NEWIPO", None))
+        self.assertTrue(metrics["close_above_sma20"] is False)
+        self.assertIsNone(metrics["close_above_sma200"])
+        self.assertIsNone(metrics["breakout_above_52w_high"])
+        self.assertIsNone(metrics["close_near_day_high"])
+        self.assertNotIn("sma200", metrics)
+        self.assertEqual(results[1][0], "BROKEN")
+        self.assertIsNone(results[1][1])
+        self.assertIn("Missing OHLCV columns", results[1][2])
+
     def test_dedupe_filings_prefers_record_with_file_url(self):
         filings = [
             {"news_id": "1", "news_date": "2026-01-01", "caption": "Result"},
@@ -255,6 +355,501 @@ class TransformTests(unittest.TestCase):
         self.assertEqual(len(result), 2)
         self.assertEqual(result[1]["file_url"], "https://example.com/a.pdf")
 
+    def test_results_triggers_work_without_intermediate_files(self):
+        upcoming = [
+            {"Symbol": "DUE", "Type": "QUARTERLY RESULT ANNOUNCEMENT", "ExDate": "2026-08-16"},
+            {"Symbol": "DIV", "Type": "DIVIDEND", "ExDate": "2026-08-16"},
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            store = FilingsStore(root / "filings.sqlite")
+            store.replace_symbol("AAA", [{"news_id": "1", "news_date": "2026-08-14 18:01:00", "descriptor": "Financial Results"}])
+            with mock.patch.object(fetch_fundamental_data, "ANNOUNCEMENTS_FILE", root / "missing.json"), \
+                    mock.patch.object(fetch_fundamental_data, "CORPORATE_ACTION_FILES", (root / "missing_actions.json",)), \
+                    mock.patch.object(fetch_fundamental_data, "open_filings_store", return_value=store), \
+                    mock.patch("fetch_corporate_actions.fetch_actions", return_value=upcoming) as fetch_actions:
+                triggers = fetch_fundamental_data.results_trigger_symbols("2026-08-15", 3, 2)
+
+        self.assertEqual(triggers, {"AAA", "DUE"})
+        fetch_actions.assert_called_once_with("2026-08-12", "2026-08-17")
+
+    def test_targeted_fundamentals_refresh_plans_result_events_and_sweep(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            store = FilingsStore(root / "filings.sqlite")
+            store.replace_symbol("AAA", [{"news_id": "1", "news_date": "2026-08-13 18:01:00", "descriptor": "Financial Results"}])
+            store.replace_symbol("OLD", [{"news_id": "2", "news_date": "2026-05-01 18:01:00", "descriptor": "Financial Results"}])
+            save_json(root / "announcements.json", [
+                {"Symbol": "BBB", "Date": "2026-08-14 09:00", "Type": "Results Update", "Event": "Q1 results"},
+                {"Symbol": "CCC", "Date": "2026-08-14 09:00", "Type": "Order", "Event": "New order"},
+            ])
+            save_json(root / "upcoming.json", [
+                {"Symbol": "DDD", "Type": "QUARTERLY RESULT ANNOUNCEMENT", "ExDate": "2026-08-15"},
+                {"Symbol": "FFF", "Type": "QUARTERLY RESULT ANNOUNCEMENT", "ExDate": "2026-08-17"},
+                {"Symbol": "EEE", "Type": "QUARTERLY RESULT ANNOUNCEMENT", "ExDate": "2026-08-30"},
+            ])
+            with mock.patch.object(fetch_fundamental_data, "ANNOUNCEMENTS_FILE", root / "announcements.json"), \
+                    mock.patch.object(fetch_fundamental_data, "CORPORATE_ACTION_FILES", (root / "upcoming.json",)):
+                triggers = fetch_fundamental_data.results_trigger_symbols("2026-08-15", 3, 2, store)
+
+        self.assertEqual(triggers, {"AAA", "BBB", "DDD", "FFF"})
+
+        lookup = {f"INE{index}": {"Symbol": symbol} for index, symbol in enumerate(["AAA", "NEW", "OLD", "ZZZ"])}
+        cache = {}
+        fetch_fundamental_data.update_cache(cache, [{"isin": "INE0", "pe": 1}, {"isin": "INE3", "pe": 2}], "2026-08-01")
+        fetch_fundamental_data.update_cache(cache, [{"isin": "INE2", "pe": 3}], "2026-05-01")
+        slot = fetch_fundamental_data.sweep_bucket("INE3", 30)
+        first_day = date(2026, 8, 15).toordinal()
+        sweep_day = next(day for day in range(first_day, first_day + 30) if day % 30 == slot)
+        today = date.fromordinal(sweep_day).isoformat()
+
+        plan = fetch_fundamental_data.plan_refresh(lookup, cache, today, {"AAA"}, 30)
+        quiet = fetch_fundamental_data.plan_refresh(
+            lookup, cache, date.fromordinal(sweep_day + 1).isoformat(), set(), 30
+        )
+
+        self.assertEqual(plan, {"INE0": "results", "INE1": "new", "INE2": "stale", "INE3": "sweep"})
+        self.assertNotIn("INE3", quiet)
+        self.assertNotIn("INE0", quiet)
+        self.assertEqual(fetch_fundamental_data.update_cache(cache, [{"isin": "INE3", "pe": 2, "Symbol": "ZZZ"}], today), 0)
+        self.assertEqual(fetch_fundamental_data.update_cache(cache, [{"isin": "INE3", "pe": 4}], today), 1)
+        self.assertEqual(cache["INE3"]["changed_at"], today)
+
+    def test_incremental_filings_fetch_stops_at_stored_cursor(self):
+        feed = [
+            {"news_id": str(index), "news_date": f"2026-08-{index:02d} 10:00:00", "caption": f"Filing {index}"}
+            for index in range(30, 0, -1)
+        ]
+        calls = []
+
+        def endpoint(url, isin, headers, page=1, count=100):
+            calls.append((url, page, count))
+            items = feed if url == fetch_company_filings.LEGACY_URL else []
+            return items[(page - 1) * count:page * count]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = FilingsStore(Path(tmp) / "filings_store.sqlite")
+            item = {"Symbol": "ABC", "ISIN": "INE1"}
+            with mock.patch.object(fetch_company_filings, "OUTPUT_DIR", tmp), \
+                    mock.patch.object(fetch_company_filings, "fetch_page", side_effect=endpoint):
+                feed = feed[2:]
+                self.assertEqual(fetch_company_filings.fetch_filings(item, store, incremental=True), "success")
+                self.assertEqual(store.cursor("INE1"), {"news_id": "28", "news_date": "2026-08-28 10:00:00"})
+
+                feed = [
+                    {"news_id": str(index), "news_date": f"2026-08-{index:02d} 10:00:00", "caption": f"Filing {index}"}
+                    for index in range(30, 0, -1)
+                ]
+                calls.clear()
+                self.assertEqual(fetch_company_filings.fetch_filings(item, store, incremental=True), "success")
+                self.assertEqual(calls, [
+                    (fetch_company_filings.LEGACY_URL, 1, 20),
+                    (fetch_company_filings.LODR_URL, 1, 20),
+                ])
+                self.assertEqual([entry["news_id"] for entry in store.filings("ABC")], [entry["news_id"] for entry in feed])
+                self.assertEqual(load_json(Path(tmp) / "ABC_filings.json")["data"], feed)
+
+                with mock.patch.object(fetch_company_filings, "save_json") as save:
+                    self.assertEqual(fetch_company_filings.fetch_filings(item, store, incremental=True), "unchanged")
+                save.assert_not_called()
+
+            with mock.patch.object(fetch_company_filings, "OUTPUT_DIR", tmp), \
+                    mock.patch.object(fetch_company_filings, "fetch_page", return_value=None), \
+                    mock.patch.object(fetch_company_filings, "save_json") as save:
+                self.assertEqual(fetch_company_filings.fetch_filings(item, store, incremental=True), "error")
+            save.assert_not_called()
+
+    def test_incremental_filings_fetch_refetches_in_full_after_store_version_change(self):
+        feed = [
+            {"news_id": str(index), "news_date": f"2026-08-{index:02d} 10:00:00", "caption": f"Filing {index}"}
+            for index in range(100, 0, -1)
+        ]
+        counts = []
+
+        def endpoint(url, isin, headers, page=1, count=100):
+            counts.append(count)
+            items = feed if url == fetch_company_filings.LEGACY_URL else []
+            return items[(page - 1) * count:page * count]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "filings_store.sqlite"
+            store = FilingsStore(path)
+            item = {"Symbol": "ABC", "ISIN": "INE1"}
+            with mock.patch.object(fetch_company_filings, "OUTPUT_DIR", tmp), \
+                    mock.patch.object(fetch_company_filings, "fetch_page", side_effect=endpoint):
+                fetch_company_filings.fetch_filings(item, store, incremental=True)
+                self.assertEqual(len(store.filings("ABC")), 100)
+
+                with closing(sqlite3.connect(path)) as connection:
+                    connection.execute("PRAGMA user_version = 1")
+                self.assertIsNone(store.cursor("INE1"))
+
+                counts.clear()
+                fetch_company_filings.fetch_filings(item, store, incremental=True)
+                self.assertEqual(counts, [100, 100])
+                self.assertEqual(len(store.filings("ABC")), 100)
+                self.assertEqual(len(load_json(Path(tmp) / "ABC_filings.json")["data"]), 100)
+
+    def test_incremental_news_sync_appends_new_items_and_skips_unchanged_files(self):
+        day_ms = 86400 * 1000
+        now_ms = 1_790_000_000_000
+
+        def raw(title, stamp):
+            return {"news_object": {"title": title, "overall_sentiment": "positive"}, "publish_date": stamp, "category": "NEWS"}
+
+        responses = [
+            [raw("old", now_ms - 40 * day_ms), raw("b", now_ms - day_ms), raw("a", now_ms - 2 * day_ms)],
+            [raw("c", now_ms), raw("b", now_ms - day_ms)],
+            [],
+        ]
+        payloads = []
+
+        def post(url, json, headers, timeout):
+            payloads.append(json)
+            return mock.Mock(status_code=200, json=lambda: {"data": {"latest_news": responses[len(payloads) - 1]}})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = NewsStore(Path(tmp) / "news_store.sqlite")
+            item = {"Symbol": "ABC", "ISIN": "INE1"}
+            with mock.patch.object(fetch_market_news, "OUTPUT_DIR", tmp), \
+                    mock.patch.object(fetch_market_news, "http_session", return_value=mock.Mock(post=post)), \
+                    mock.patch("edl_pipeline.news_store.time.time", return_value=now_ms / 1000):
+                self.assertEqual(fetch_market_news.fetch_market_news(item, store), "success")
+                self.assertEqual(fetch_market_news.fetch_market_news(item, store), "success")
+                with mock.patch.object(fetch_market_news, "save_json") as save:
+                    self.assertEqual(fetch_market_news.fetch_market_news(item, store), "unchanged")
+                save.assert_not_called()
+
+            self.assertEqual([payload["first_news_timeStamp"] for payload in payloads], [0, now_ms - day_ms, now_ms])
+            titles = [news["Title"] for news in load_json(Path(tmp) / "ABC_news.json")["News"]]
+            self.assertEqual(titles, ["c", "b", "a"])
+
+    def test_crawler_interleaves_endpoints_by_priority_and_counts_statuses_separately(self):
+        calls = []
+        finished = {}
+
+        def fetcher(name, fail=None):
+            def fetch(item):
+                calls.append((name, item["Symbol"]))
+                if item["Symbol"] == fail:
+                    raise RuntimeError("boom")
+                return {"Symbol": item["Symbol"]}
+            return fetch
+
+        endpoints = [
+            Endpoint("filings", fetcher("filings"), finish=lambda results: finished.setdefault("filings", results)),
+            Endpoint("news", fetcher("news", fail="B"), max_concurrency=1),
+        ]
+        items = [{"Symbol": "C", "Rank": 3}, {"Symbol": "A", "Rank": 1}, {"Symbol": "B", "Rank": 2}]
+        report = Crawler(endpoints, workers=1, progress_every=0).run(items, priority=lambda item: item["Rank"])
+
+        self.assertEqual(
+            calls,
+            [("filings", "A"), ("news", "A"), ("filings", "B"), ("news", "B"), ("filings", "C"), ("news", "C")],
+        )
+        self.assertEqual(report.statuses["filings"], {"success": 3})
+        self.assertEqual(report.statuses["news"], {"success": 2, "error": 1})
+        self.assertEqual([result["Symbol"] for _item, result in finished["filings"]], ["A", "B", "C"])
+        self.assertFalse(report.cancelled)
+
+        crawler = Crawler([Endpoint("slow", lambda item: crawler.cancel() or "success")], workers=4, progress_every=0)
+        report = crawler.run(items)
+        self.assertTrue(report.cancelled)
+        self.assertLess(sum(report.statuses["slow"].values()), len(items))
+
+    def test_crawler_coverage_excludes_throttled_and_failed_fetches(self):
+        statuses = {"A": "success", "B": "rate_limit", "C": "http_503", "D": "unchanged", "E": "empty"}
+        items = [{"Symbol": symbol, "ISIN": f"INE{symbol}"} for symbol in statuses]
+        endpoint = Endpoint("market_news", lambda item: statuses[item["Symbol"]])
+        report = Crawler([endpoint], workers=1, progress_every=0).run(items)
+
+        self.assertEqual(report.covered_isins("market_news"), {"INEA", "INED", "INEE"})
+
+    def test_crawler_budget_stops_cleanly_after_largest_caps(self):
+        rows = [{"Isin": f"INE{index}", "Mcap": 1000 - index, "Volume": 1, "Ltp": 1} for index in range(120)]
+        rows.append({"Isin": "INE_LIQUID", "Mcap": 1000 - 5, "Volume": 10**6, "Ltp": 100})
+        ranks = market_cap_ranks(rows)
+        self.assertEqual(ranks["INE0"], 1)
+        self.assertEqual(ranks["INE_LIQUID"], ranks["INE5"] - 1)
+
+        items = sorted(({"Symbol": row["Isin"][::-1], "ISIN": row["Isin"]} for row in rows), key=lambda item: item["Symbol"])
+        items.append({"Symbol": "NEW", "ISIN": "INE_UNRANKED"})
+        seen = []
+
+        def fetch(item):
+            seen.append(item["ISIN"])
+            time.sleep(0.05)
+            return {"ISIN": item["ISIN"]}
+
+        crawler = Crawler([Endpoint("indicators", fetch)], workers=1, progress_every=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = crawler.run(items, priority=priority_key(ranks), budget=0.2)
+
+        self.assertTrue(report.timed_out)
+        self.assertTrue(report.cancelled)
+        self.assertLess(len(seen), 100)
+        self.assertEqual(seen, sorted(seen, key=ranks.get))
+        coverage = coverage_by_bucket(items, report.covered_isins("indicators"), ranks)
+        self.assertEqual(coverage["top_100"]["covered"], len(seen))
+        self.assertEqual(coverage["101_250"], {"total": 21, "covered": 0, "pct": 0.0})
+        self.assertEqual(coverage["rest"], {"total": 1, "covered": 0, "pct": 0.0})
+
+    def test_standalone_fetcher_honours_budget_and_reports_coverage(self):
+        rows = [{"Isin": f"INE{index}", "Mcap": 1000 - index, "Volume": 1, "Ltp": 1} for index in range(200)]
+        ranks = market_cap_ranks(rows)
+        items = [{"Symbol": f"S{index}", "ISIN": f"INE{index}", "Sid": index} for index in reversed(range(200))]
+        saved = {}
+
+        def fetch(item):
+            time.sleep(0.05)
+            return {"Symbol": item["Symbol"]}
+
+        with mock.patch.dict("os.environ", {"EDL_CRAWL_BUDGET_SECONDS": "1"}), \
+                mock.patch.object(fetch_advanced_indicators, "MAX_THREADS", 1), \
+                mock.patch.object(fetch_advanced_indicators, "load_json", return_value=items), \
+                mock.patch.object(fetch_advanced_indicators, "fetch_indicators", fetch), \
+                mock.patch.object(fetch_advanced_indicators, "save_json", side_effect=saved.__setitem__), \
+                mock.patch("edl_pipeline.per_isin.load_market_cap_ranks", return_value=ranks), \
+                mock.patch("edl_pipeline.per_isin.save_json", side_effect=saved.__setitem__), \
+                contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(fetch_advanced_indicators.main())
+
+        report = saved[fetch_advanced_indicators.REPORT_FILE]
+        fetched = saved[fetch_advanced_indicators.OUTPUT_FILE]
+        self.assertTrue(report["timed_out"])
+        self.assertEqual(report["budget_seconds"], 1)
+        self.assertLess(len(fetched), 100)
+        self.assertEqual(sorted(row["Symbol"] for row in fetched), sorted(f"S{index}" for index in range(len(fetched))))
+        coverage = report["endpoints"]["advanced_indicators"]["coverage"]
+        self.assertEqual(coverage["top_100"]["covered"], len(fetched))
+        self.assertEqual(coverage["101_250"], {"total": 100, "covered": 0, "pct": 0.0})
+
+    def test_isin_batching_probes_caches_and_falls_back_to_single_requests(self):
+        isins = [f"INE{index:03d}" for index in range(25)]
+        rows = {isin: [{"isin": isin, "n": n} for n in range(index % 3)] for index, isin in enumerate(isins)}
+        singles = []
+
+        def single(isin):
+            singles.append(isin)
+            return rows[isin]
+
+        def post(url, payload, timeout):
+            requested = payload["data"]["isins"]
+            if len(requested) > 10:
+                raise RuntimeError("too many isins")
+            return {"data": [row for isin in requested for row in rows[isin]]}
+
+        endpoint = BatchEndpoint("announcements", "https://example/announcements", lambda batch: {"data": {"isins": batch}}, single)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "batch_capabilities.json"
+            with mock.patch("edl_pipeline.batching.post_json", side_effect=post):
+                self.assertEqual(batch_size(endpoint, isins, path, date(2026, 1, 1)), 10)
+                probe_singles = len(singles)
+                self.assertEqual(batch_size(endpoint, isins, path, date(2026, 1, 5)), 10)
+                self.assertEqual(len(singles), probe_singles)
+
+                fetcher = BatchFetcher(endpoint, 10, workers=2)
+                self.assertEqual(fetcher.fetch_many(isins), rows)
+                self.assertEqual(fetcher.stats, {"batch_requests": 3, "single_requests": 0, "fallback_batches": 0})
+
+                fetcher = BatchFetcher(endpoint, 20, workers=2)
+                self.assertEqual(fetcher.fetch_many(isins), rows)
+                self.assertEqual(fetcher.stats, {"batch_requests": 2, "single_requests": 20, "fallback_batches": 1})
+
+            # An endpoint that ignores the list and returns unattributed rows never batches.
+            with mock.patch("edl_pipeline.batching.post_json", return_value={"data": [{"n": 0}]}):
+                self.assertEqual(batch_size(endpoint, isins, path, date(2026, 1, 9)), 1)
+            self.assertEqual(load_json(path)["announcements"]["max_batch"], 1)
+
+        # A full announcements batch may be truncated, so its ISINs are refetched one at a time.
+        announcements = fetch_new_announcements.BATCH_ENDPOINT
+        limit = fetch_new_announcements.BATCH_ROWS_PER_ISIN
+        self.assertEqual(announcements.batch_payload(["A", "B"])["data"]["count"], 2 * limit)
+        full = {"data": [{"isin": "A"}] * limit + [{"isin": "B"}] * limit}
+        with mock.patch("edl_pipeline.batching.post_json", return_value=full), \
+                mock.patch.object(
+                    fetch_new_announcements, "post_json",
+                    side_effect=lambda url, payload, timeout: {"data": [{"isin": payload["data"]["isin"]}]},
+                ):
+            fetcher = BatchFetcher(announcements, 2, workers=1)
+            self.assertEqual(fetcher.fetch_many(["A", "B"]), {"A": [{"isin": "A"}], "B": [{"isin": "B"}]})
+        self.assertEqual(fetcher.stats, {"batch_requests": 1, "single_requests": 2, "fallback_batches": 1})
+
+    def test_scanx_planner_serves_compatible_queries_from_one_request_per_run(self):
+        universe = [
+            {"Sym": "AAA", "Mcap": 300, "Volume": 5, "OgInst": "ES", "FnoFlag": 1.0, "Ltp": 10, "Exch": "NSE"},
+            {"Sym": "ETF", "Mcap": None, "Volume": 50, "OgInst": "ETF", "FnoFlag": 0, "Ltp": 20, "Exch": "NSE"},
+            {"Sym": "BBB", "Mcap": 900, "Volume": 1, "OgInst": "ES", "FnoFlag": 0, "Ltp": 30, "Exch": "NSE"},
+        ]
+        requests_made = []
+
+        def fetch(payload, timeout=30):
+            requests_made.append(payload["data"])
+            return universe
+
+        dashboard = ScanxQuery("dhan", ("Sym", "Mcap", "Ltp"), (("OgInst", "ES"), ("Exch", "NSE")))
+        snapshots = ScanxQuery("live", ("Sym", "Volume"), (("Exch", "NSE"),), sort="Volume")
+        fno = ScanxQuery("fno", ("Sym",), (("FnoFlag", "1"), ("OgInst", "ES"), ("Exch", "NSE")), count=1)
+        circuit = ScanxQuery("circuit", ("Sym",), (("LiveData.UpperCircuitBreak", "1"),))
+        self.assertEqual(
+            set(superset_query((dashboard, snapshots, fno, circuit)).fields),
+            {"Sym", "Mcap", "Ltp", "OgInst", "Volume", "FnoFlag"},
+        )
+        # Filters every consumer shares stay server-side; a lone consumer's superset is its own request.
+        self.assertEqual(superset_query((dashboard, fno)).filters, (("OgInst", "ES"), ("Exch", "NSE")))
+        self.assertEqual(set(superset_query((dashboard, fno)).fields), {"Sym", "Mcap", "Ltp", "FnoFlag"})
+        run_superset = superset_query(CONSUMER_QUERIES)
+        self.assertEqual(run_superset.fields, DASHBOARD_QUERY.fields)
+        self.assertEqual(run_superset.filters, DASHBOARD_QUERY.filters)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = Path(tmp) / "scanx_run_cache.json.gz"
+            planner = ScanxPlanner((dashboard, snapshots, fno), cache, "run-1", fetch)
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(planner.rows(dashboard), [
+                    {"Sym": "BBB", "Mcap": 900, "Ltp": 30},
+                    {"Sym": "AAA", "Mcap": 300, "Ltp": 10},
+                ])
+                second_process = ScanxPlanner((dashboard, snapshots, fno), cache, "run-1", fetch)
+                self.assertEqual([row["Sym"] for row in second_process.rows(snapshots)], ["ETF", "AAA", "BBB"])
+                self.assertEqual(second_process.rows(fno), [{"Sym": "AAA"}])
+                self.assertEqual(len(requests_made), 1)
+
+                self.assertEqual(planner.rows(circuit), universe)
+                self.assertEqual(requests_made[-1]["params"], [{"field": "LiveData.UpperCircuitBreak", "op": "", "val": "1"}])
+                ScanxPlanner((dashboard,), cache, "run-2", fetch).rows(dashboard)
+                self.assertEqual(len(requests_made), 3)
+                ScanxPlanner((dashboard,), cache, "", fetch).rows(dashboard)
+                self.assertEqual(requests_made[-1]["fields"], ["Sym", "Mcap", "Ltp"])
+
+                live = ScanxQuery("live", ("Sym", "Ltp"), (("Exch", "NSE"),), shared=False)
+                self.assertEqual(superset_query((dashboard, live)).fields, superset_query((dashboard,)).fields)
+                self.assertEqual(planner.rows(live), universe)
+                self.assertEqual(requests_made[-1]["fields"], ["Sym", "Ltp"])
+
+                delisted = ScanxQuery("delisted", ("Sym",), (("OgInst", "BOND"), ("Exch", "NSE")))
+                self.assertEqual(planner.rows(delisted), universe)
+                self.assertEqual(requests_made[-1]["params"][0], {"field": "OgInst", "op": "", "val": "BOND"})
+
+    def test_build_id_is_shared_through_file_and_refreshed_after_next_data_404(self):
+        page_fetches = []
+        data_urls = []
+
+        def get_build_id(page_url):
+            page_fetches.append(page_url)
+            return f"build-{len(page_fetches)}"
+
+        def cached_get(url, headers=None, timeout=15):
+            data_urls.append(url)
+            if "/build-1/" in url:
+                return mock.Mock(status_code=404)
+            return mock.Mock(status_code=200, json=lambda: {"pageProps": {"listData": [1]}})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with mock.patch.object(dhan_next_utils, "BUILD_ID_FILE", Path(tmp) / "dhan_build_id.json"):
+                with mock.patch.object(dhan_next_utils, "get_build_id", side_effect=get_build_id):
+                    with mock.patch.object(dhan_next_utils, "cached_get", side_effect=cached_get):
+                        self.assertEqual(dhan_next_utils.resolve_build_id(), "build-1")
+                        self.assertEqual(dhan_next_utils.resolve_build_id("https://dhan.co/nse-fno-lot-size/"), "build-1")
+                        self.assertEqual(len(page_fetches), 1)
+
+                        data = dhan_next_utils.get_next_data("build-1", "nse-fno-lot-size")
+                        self.assertEqual(data, {"pageProps": {"listData": [1]}})
+                        self.assertEqual(data_urls[-1], "https://dhan.co/_next/data/build-2/nse-fno-lot-size.json")
+                        self.assertEqual(dhan_next_utils.resolve_build_id(), "build-2")
+                        self.assertEqual(len(page_fetches), 2)
+
+                        # A caller still holding the rotated id reuses the refreshed one without a page fetch.
+                        self.assertTrue(dhan_next_utils.get_next_data("build-1", "fno-expiry-calendar"))
+                        self.assertEqual(len(page_fetches), 2)
+
+    def test_response_cache_serves_fresh_entries_and_revalidates_stale_ones(self):
+        now = [1000.0]
+        sent = []
+        replies = []
+
+        def get(url, headers=None, timeout=15):
+            sent.append(headers)
+            reply = replies.pop(0)
+            if isinstance(reply, Exception):
+                raise reply
+            return reply
+
+        session = mock.Mock(get=get)
+        policies = (CachePolicy("archive", r"https://archive/.*", 60, max_stale_seconds=60, negative_ttl_seconds=30),)
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResponseCache(tmp, policies, max_bytes=10, session=session, clock=lambda: now[0])
+            replies.append(mock.Mock(status_code=200, content=b"a,b", headers={"ETag": '"v1"'}))
+            self.assertEqual(cache.get("https://archive/list.csv").text, "a,b")
+            self.assertTrue(cache.get("https://archive/list.csv").from_cache)
+            self.assertEqual(len(sent), 1)
+
+            now[0] += 61
+            replies.append(mock.Mock(status_code=304, content=b"", headers={}))
+            self.assertEqual(cache.get("https://archive/list.csv").content, b"a,b")
+            self.assertEqual(sent[-1]["If-None-Match"], '"v1"')
+            now[0] += 61
+            replies.append(requests.ConnectionError("offline"))
+            self.assertEqual(cache.get("https://archive/list.csv").content, b"a,b")
+            now[0] += 120
+            replies.append(requests.ConnectionError("offline"))
+            with self.assertRaises(requests.ConnectionError):
+                cache.get("https://archive/list.csv")
+
+            replies.append(mock.Mock(status_code=404, content=b"", headers={}))
+            self.assertEqual(cache.get("https://archive/missing.csv").status_code, 404)
+            self.assertEqual(cache.get("https://archive/missing.csv").status_code, 404)
+            self.assertEqual(len(sent), 5)
+
+            replies.append(mock.Mock(status_code=200, content=b"0123456789", headers={}))
+            cache.get("https://archive/big.csv")
+            bodies = [path.read_bytes() for path in Path(tmp).glob("*.body")]
+            self.assertEqual(sorted(bodies), [b"", b"0123456789"])
+            self.assertEqual(cache.stats["archive"]["hits"], 2)
+            self.assertEqual(cache.stats["archive"]["misses"], 3)
+            self.assertEqual(cache.stats["archive"]["revalidated"], 1)
+            self.assertEqual(cache.stats["archive"]["stale"], 1)
+
+            cache.save_stats("run-1")
+            self.assertEqual(run_cache_stats("run-1", tmp)["archive"]["hits"], 2)
+            self.assertEqual(run_cache_stats("run-1", tmp), {})
+
+    def test_response_cache_only_covers_reference_pages_not_intraday_dhan_data(self):
+        session = mock.Mock(get=mock.Mock(return_value=mock.Mock(status_code=200, content=b"{}", headers={})))
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResponseCache(tmp, session=session)
+            for _ in range(2):
+                cache.get("https://dhan.co/_next/data/b1/stocks/market/shares-with-upper-circuit.json")
+                cache.get("https://dhan.co/_next/data/b1/stocks/market/lower-circuit-stocks.json")
+                cache.get("https://dhan.co/_next/data/b1/nse-asm-list.json")
+                cache.get("https://dhan.co/stocks/market/shares-with-upper-circuit/")
+            self.assertEqual(session.get.call_count, 8)
+            self.assertEqual(list(Path(tmp).glob("*.body")), [])
+
+            for _ in range(2):
+                cache.get("https://dhan.co/_next/data/b1/nse-fno-lot-size.json")
+                cache.get("https://dhan.co/fno-expiry-calendar/")
+            self.assertEqual(session.get.call_count, 10)
+            self.assertEqual(cache.stats["dhan_next_data"]["hits"], 1)
+            self.assertEqual(cache.stats["dhan_pages"]["hits"], 1)
+
+    def test_dashboard_projection_requests_every_field_a_consumer_reads(self):
+        report = field_usage()
+        self.assertEqual(report["newly_used"], [])
+        self.assertEqual(report["duplicate_requests"], [])
+        self.assertNotIn("Min5HighCurrentCandle", report["used"])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "src").mkdir()
+            (root / "consumer.py").write_text('rows = load_json("dhan_data_response.json")\nrows[0].get("Roe")\n')
+            (root / "unrelated.py").write_text('item.get("Eps")\n')
+            report = field_usage(root, catalogue=("Sym", "Roe", "Eps"), requested=("Sym", "Sym"))
+        self.assertEqual(report["consumers"], ["consumer.py"])
+        self.assertEqual(report["newly_used"], ["Roe"])
+        self.assertEqual(report["requested_unused"], ["Sym"])
+        self.assertEqual(report["duplicate_requests"], ["Sym"])
+
     def test_dedupe_deals_uses_existing_composite_key(self):
         deal = {"sym": "ABC", "date": "2026-01-01", "qty": 100, "avgprice": 12.3, "bs": "B", "cname": "Buyer"}
         duplicate = dict(deal)
@@ -331,6 +926,129 @@ class TransformTests(unittest.TestCase):
             save_json(json_path, {"a": 1})
             self.assertEqual(load_json(json_path), {"a": 1})
 
+    def test_intermediate_store_round_trips_documents_and_feeds_event_transforms(self):
+        filings = {"code": 0, "data": [
+            {"news_date": "2026-08-10 10:00:00", "caption": "Disclosure under SEBI (PIT)", "news_id": "2"},
+            {"news_date": "2026-06-01 10:00:00", "descriptor": "Financial Results", "news_id": "1"},
+        ]}
+        news = {"Symbol": "ABC", "ISIN": "INE1", "News": [{"Title": "Up", "Sentiment": "positive", "PublishDate": "2026-08-11"}]}
+        deals = [{"sym": "ABC", "date": "2026-08-09", "qty": 5}, {"sym": "XYZ", "date": "2026-07-01", "qty": 7}]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            save_json(root / "company_filings" / "A_B_filings.json", filings)
+            save_json(root / "market_news" / "ABC_news.json", news)
+            store = IntermediateStore(root / "intermediate.sqlite")
+            written = store.put_many([
+                ("company_filings/A_B_filings.json", filings),
+                ("market_news/ABC_news.json", news),
+                ("bulk_block_deals.json", deals),
+            ])
+
+            self.assertEqual(written, 5)
+            self.assertEqual(store.put("bulk_block_deals.json", deals), 0)
+            self.assertEqual(store.document("company_filings/A_B_filings.json"), filings)
+            self.assertEqual(store.document("market_news/ABC_news.json"), news)
+            self.assertEqual(store.document("bulk_block_deals.json"), deals)
+            self.assertIsNone(store.document("missing.json"))
+            self.assertEqual(
+                [row["news_id"] for row in store.rows(prefix="company_filings/", since="2026-08-01")],
+                ["2"],
+            )
+            self.assertEqual(list(store.rows(symbol="XYZ")), deals[1:])
+            self.assertEqual(load_intermediate(root / "bulk_block_deals.json", store), deals)
+            self.assertEqual(load_intermediate(root / "market_news" / "ABC_news.json"), news)
+            with self.assertRaises(FileNotFoundError):
+                load_intermediate(root / "missing.json", store)
+            self.assertIs(store.connect(), store.connect())
+            self.assertEqual(intermediate_name(BASE_PATH / "market_news" / "ABC_news.json"), "market_news/ABC_news.json")
+            self.assertIsNone(intermediate_name(BASE_PATH / "company_filings" / "A_B_filings.json"))
+
+            today = __import__("datetime").datetime(2026, 8, 15)
+            self.assertEqual(
+                collect_filing_events(store.grouped_rows("company_filings/"), today),
+                collect_filing_events_and_headlines([root / "company_filings" / "A_B_filings.json"], today),
+            )
+            self.assertEqual(
+                collect_news_feed(store.grouped_rows("market_news/")),
+                collect_market_news([root / "market_news" / "ABC_news.json"]),
+            )
+            store.close()
+
+    def test_filings_store_matches_per_file_events_and_earnings_dates(self):
+        documents = {
+            "ABC": [
+                {"news_id": "5", "news_date": "2026-08-14 18:00:00", "caption": "Outcome", "descriptor": "Financial Results"},
+                {"news_id": "4", "news_date": "2026-08-01 10:00:00", "caption": "Disclosure under Regulation 7(2)"},
+                {"news_id": "3", "news_date": "2026-07-30 10:00:00", "caption": "Trading window closure under SEBI (PIT)"},
+                {"news_id": "2", "news_date": "2026-05-10 17:00:00", "descriptor": "Financial Results"},
+                {"news_id": "1", "news_date": "2026-05-01 10:00:00", "caption": "Form C"},
+                {"news_id": "0", "news_date": "bad", "caption": "AGM"},
+            ],
+            "XYZ": [{"news_id": "9", "news_date": "2026-07-01 09:00:00", "cat": "Insider Trading"}],
+            "EMPTY": [],
+        }
+
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            store = FilingsStore(root / "filings_store.sqlite")
+            for symbol, items in documents.items():
+                save_json(root / f"{symbol}_filings.json", {"code": 0, "data": items})
+                store.replace_symbol(symbol, items)
+            self.assertEqual(store.replace_symbol("XYZ", documents["XYZ"] * 2), 1)
+            files = [root / f"{symbol}_filings.json" for symbol in documents]
+
+            for today in (__import__("datetime").datetime(2026, 8, 16, 9, 30), __import__("datetime").datetime(2026, 8, 16)):
+                self.assertEqual(
+                    collect_stored_filing_events(store, today),
+                    collect_filing_events_and_headlines(files, today),
+                )
+            self.assertEqual(
+                store.latest_results(),
+                {symbol: get_earnings_info(path)[0] for symbol, path in zip(documents, files) if get_earnings_info(path)[0]},
+            )
+            self.assertEqual(store.latest_results(since="2026-06-01"), {"ABC": "2026-08-14 18:00:00"})
+            self.assertEqual(store.filings("ABC"), documents["ABC"])
+
+    def test_filing_classifier_flags_overlapping_keywords_and_caches_by_news_id(self):
+        keywords = list(KEYWORD_CATEGORIES)
+        self.assertFalse([(a, b) for a in keywords for b in keywords if a != b and b.startswith(a)])
+
+        self.assertEqual(
+            classify_filing({"caption": "Insider Trading Window Closure", "descriptor": "Board Meeting Intimation"}),
+            {"insider": False, "results": False, "board_meeting": True, "dividend": False, "pledge": False},
+        )
+        self.assertTrue(classify_filing({"descriptor": "Form", "caption": "C disclosure"})["insider"])
+        self.assertEqual(
+            classify_filing({"descriptor": "Financial Results", "news_body": "Interim Dividend; creation of pledge"}),
+            {"insider": False, "results": True, "board_meeting": False, "dividend": True, "pledge": True},
+        )
+
+        classifier = FilingClassifier()
+        classifier({"news_id": 7, "caption": "SEBI (PIT) intimation"})
+        self.assertTrue(classifier({"news_id": "7", "caption": "changed"})["insider"])
+        classifier({"caption": "no id"})
+        classifier({"caption": "no id"})
+        self.assertEqual(classifier.classified, 3)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = FilingsStore(Path(tmp) / "filings_store.sqlite")
+            filings = [{"news_id": 2, "caption": "Dividend"}, {"news_id": 1, "caption": "Regulation 7(2)"}]
+            store.replace_symbol("ABC", filings)
+            self.assertEqual(store.classified, 2)
+            store.replace_symbol("ABC", [{"news_id": 3, "caption": "Pledge"}] + filings)
+            self.assertEqual(store.classified, 1)
+
+            # A classifier version bump recomputes stored flags without dropping any filing.
+            with closing(sqlite3.connect(store.path)) as connection, connection:
+                connection.execute("UPDATE filings SET dividend = 0, pledge = 0")
+                connection.execute(f"PRAGMA user_version = {STORE_VERSION - 1}")
+            self.assertEqual(store.latest_results(), {})
+            self.assertEqual(len(store.filings("ABC")), 3)
+            with closing(store.connect()) as connection:
+                flags = dict(connection.execute("SELECT news_id, dividend + 2 * pledge FROM filings").fetchall())
+            self.assertEqual(flags, {"1": 0, "2": 1, "3": 2})
+
     def test_clean_records_strips_csv_keys_and_values(self):
         pandas = __import__("pandas")
         df = pandas.DataFrame([{" Symbol ": " ABC ", "Band": " 20 "}])